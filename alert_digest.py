@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Burst Coalescing for Load Alerts
+When a cycle finds more new loads than the threshold, they are packed into
+a few digest messages (grouped by lane or vehicle type, under Telegram's
+4096-character limit) instead of one message per load. Each digest carries
+buttons to expand a load's full detail.
+"""
+
+import os
+from collections import OrderedDict
+from message_templates import render, load_fields, escape_markdown
+
+DIGEST_THRESHOLD = int(os.getenv('DIGEST_THRESHOLD', 5))  # More new loads than this -> digest
+DIGEST_GROUP_BY = os.getenv('DIGEST_GROUP_BY', 'lane')  # 'lane' or 'vehicle'
+DIGEST_MAX_LOADS = int(os.getenv('DIGEST_MAX_LOADS', 30))  # Loads (and detail buttons) per message
+DIGEST_DETAIL_CACHE = 2000  # Full messages kept for expansion
+TELEGRAM_MAX_LENGTH = 4096
+
+def _value(load_info, field):
+    value = load_info.get(field, 'Unknown')
+    return '' if value in (None, '', 'Unknown') else str(value)
+
+def lane_label(load_info):
+    """ "TX → GA" (falls back to cities when states are missing)"""
+    origin = _value(load_info, 'pickup_state') or _value(load_info, 'pickup_city') or '?'
+    destination = _value(load_info, 'delivery_state') or _value(load_info, 'delivery_city') or '?'
+    return f"{origin} → {destination}"
+
+def group_label(load_info, group_by=DIGEST_GROUP_BY):
+    if group_by == 'vehicle':
+        return _value(load_info, 'vehicle_type') or 'Other vehicles'
+    return lane_label(load_info)
+
+def digest_line(load_info):
+    """One compact line per load"""
+    return render('digest_line', load_fields(load_info))
+
+def detail_keyboard(entries):
+    """Inline buttons (two per row) that expand a load to its full message"""
+    buttons = [
+        {'text': f"🔎 {_value(load_info, 'load_id') or key[:8]}", 'callback_data': f"detail_{key}"}
+        for load_info, key in entries
+    ]
+    if not buttons:
+        return None
+    return {'inline_keyboard': [buttons[i:i + 2] for i in range(0, len(buttons), 2)]}
+
+class AlertDigest:
+    """Packs bursts of new loads into digest messages and keeps full details for expansion"""
+
+    def __init__(self, threshold=DIGEST_THRESHOLD, group_by=DIGEST_GROUP_BY, max_loads=DIGEST_MAX_LOADS):
+        self.threshold = threshold
+        self.group_by = group_by
+        self.max_loads = max_loads
+        self.details = OrderedDict()
+
+    def should_coalesce(self, count):
+        return count > self.threshold
+
+    def remember(self, key, full_message):
+        """Keep a load's full message so a digest button can expand it"""
+        self.details[key] = full_message
+        self.details.move_to_end(key)
+        while len(self.details) > DIGEST_DETAIL_CACHE:
+            self.details.popitem(last=False)
+
+    def detail(self, key):
+        return self.details.get(key)
+
+    def build(self, loads, title):
+        """Pack (load_info, key) pairs into [(text, keyboard, keys)] under the length limit"""
+        groups = OrderedDict()
+        for load_info, key in loads:
+            groups.setdefault(group_label(load_info, self.group_by), []).append((load_info, key))
+
+        # Busiest groups first
+        ordered = sorted(groups.items(), key=lambda item: -len(item[1]))
+
+        messages = []
+        text = title
+        entries = []
+
+        def flush():
+            nonlocal text, entries
+            if entries:
+                messages.append((text, detail_keyboard(entries), [key for _, key in entries]))
+            text = f"{title} (cont.)"
+            entries = []
+
+        for label, group in ordered:
+            label = escape_markdown(label)
+            header = f"\n\n**{label}** ({len(group)})"
+            first = True
+            for load_info, key in group:
+                line = "\n" + digest_line(load_info)
+                block = (header if first else "") + line
+                if len(text) + len(block) > TELEGRAM_MAX_LENGTH or len(entries) >= self.max_loads:
+                    flush()
+                    block = f"\n\n**{label}** (cont.)" + line
+                text += block
+                entries.append((load_info, key))
+                first = False
+
+        flush()
+        return messages
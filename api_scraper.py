@@ -9,10 +9,28 @@ import json
 import time
 import re
 import os
+import signal
 from datetime import datetime
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
 from enhanced_parser import SylectusLoadParser
+from company_index import CompanyIndex
+from dedup_store import DedupStore
+from load_keys import canonical_load_key
+from state_writer import StateWriter
+from board_snapshot import BoardSnapshot
+from load_lifecycle import LoadLifecycleTracker
+from raw_capture_store import RawCaptureStore
+from debug_capture import DebugCapture
+from load_history import LoadHistory
+from io_writer import BackgroundWriter
+from session_validation import get_validation_cache
+from telegram_outbox import TelegramOutbox
+from alert_digest import AlertDigest
+from message_templates import render, load_fields
+from subscribers import SubscriberRegistry
+from telegram_interactions import TelegramInteractions, load_keyboard
+from profile_cache import ProfileEmailCache, ProfileRateLimiter, ProfileCacheWarmer, PROFILE_FETCH_TIMEOUT
 
 load_dotenv()
 
@@ -23,11 +41,38 @@ CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', 120))
 class SylectusAPIClient:
     def __init__(self, startup_mode=False):
         self.session = requests.Session()
+        self.cookie_string = None  # As loaded - the validation cache knows the session by this string
         self.base_url = "https://www.sylectus.com"
         self.load_board_api = f"{self.base_url}/II14_managepostedloads.asp"
         self.startup_mode = startup_mode
-        self.sent_items = self.load_sent_items() if not startup_mode else set()
-        self.enhanced_parser = SylectusLoadParser()
+        self.dedup = DedupStore()
+        
+        # All artifact writes go through one background thread, off the alert path
+        self.io_writer = BackgroundWriter()
+        self.state = StateWriter(self.dedup, writer=self.io_writer)
+        
+        # Last board seen before shutdown - a warm restart only alerts on loads added since
+        self.snapshot = BoardSnapshot()
+        self.warm_start_keys = set()
+        if not startup_mode and self.snapshot.load():
+            self.warm_start_keys = set(self.snapshot.loads)
+        self.lifecycle = LoadLifecycleTracker()
+        self.raw_captures = RawCaptureStore()
+        self.debug_captures = DebugCapture(writer=self.io_writer)
+        self.history = LoadHistory()
+        self.company_index = CompanyIndex()
+        self.enhanced_parser = SylectusLoadParser(company_index=self.company_index)
+        self.outbox = TelegramOutbox()
+        self.digest = AlertDigest()
+        self.subscribers = SubscriberRegistry()
+        self.interactions = TelegramInteractions(self.outbox, self.dedup)
+        self.interactions.register('detail_', self.handle_detail)
+        
+        # Profile email cache, shared rate budget and idle-time warmer
+        self.profile_cache = ProfileEmailCache()
+        self.profile_rate_limiter = ProfileRateLimiter()
+        self.profile_warmer = ProfileCacheWarmer(self.profile_cache, self.fetch_company_email, self.profile_rate_limiter)
+        self.board_profile_urls = set()
         
         # Set headers to mimic browser
         self.session.headers.update({
@@ -39,70 +84,30 @@ class SylectusAPIClient:
             'Upgrade-Insecure-Requests': '1'
         })
     
-    def load_sent_items(self):
-        """Load previously sent items"""
-        try:
-            with open('sent_items.txt', 'r') as f:
-                return set(line.strip() for line in f.readlines())
-        except FileNotFoundError:
-            return set()
+    def save_load_details(self, load_info):
+        """Stage detailed load information for analysis (written at cycle commit)"""
+        self.state.stage_load_details(load_info)
     
-    def save_sent_item(self, item_id):
-        """Save item ID to prevent duplicates"""
-        with open('sent_items.txt', 'a') as f:
-            f.write(f"{item_id}\n")
+    def send_to_telegram(self, message_text, keyboard=None):
+        """Queue message for the outbox sender (persisted, rate limited, retried)"""
+        return self.outbox.enqueue(message_text, reply_markup=keyboard) is not None
     
-    def save_load_details(self, load_info):
-        """Save detailed load information for analysis"""
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"load_details_{timestamp}_{load_info['load_id']}.json"
-            
-            with open(filename, 'w') as f:
-                json.dump(load_info, f, indent=2)
-            
-            print(f"💾 Load details saved: {filename}")
-            
-        except Exception as e:
-            print(f"❌ Error saving load details: {e}")
+    def send_load_alert(self, load_info, unique_id, message_text):
+        """Fan a load alert out to every subscriber whose filters match"""
+        chat_ids = self.interactions.active_chats(self.subscribers.match(load_info))
+        if not chat_ids:
+            return True  # No subscriber wants it (or all paused) - nothing to deliver
+        self.interactions.remember(unique_id, load_info)
+        keyboard = load_keyboard(unique_id, load_info.get('contact_email'))
+        return self.outbox.enqueue_fanout(message_text, chat_ids, reply_markup=keyboard, load_key=unique_id)
     
-    def send_to_telegram(self, message_text):
-        """Send message to Telegram with rate limiting"""
-        try:
-            # Add delay to avoid rate limiting (max 30 messages per second for bots)
-            time.sleep(1)
-            
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-            data = {
-                'chat_id': TELEGRAM_CHAT_ID,
-                'text': message_text[:4096],  # Telegram max message length
-                'parse_mode': 'Markdown'
-            }
-            
-            response = requests.post(url, data=data, timeout=10)
-            
-            if response.status_code == 200:
-                print("✅ Message sent to Telegram")
-                return True
-            elif response.status_code == 429:  # Rate limited
-                print("⚠️ Telegram rate limit hit, waiting...")
-                retry_after = response.json().get('parameters', {}).get('retry_after', 60)
-                time.sleep(retry_after)
-                # Retry once
-                response = requests.post(url, data=data, timeout=10)
-                if response.status_code == 200:
-                    print("✅ Message sent after retry")
-                    return True
-                else:
-                    print(f"❌ Telegram retry failed: {response.status_code}")
-                    return False
-            else:
-                print(f"❌ Telegram error: {response.status_code} - {response.text}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Telegram error: {e}")
-            return False
+    def handle_detail(self, chat_id, unique_id, callback_query):
+        """Digest button: send the load's full alert to the chat that asked"""
+        message = self.digest.detail(unique_id)
+        if message is None:
+            return "⚠️ Details no longer available"
+        self.outbox.enqueue(message, chat_id=chat_id, reply_markup=load_keyboard(unique_id))
+        return "🔎 Sending details"
     
     def load_session_cookies(self):
         """Load session cookies from extracted files"""
@@ -119,6 +124,7 @@ class SylectusAPIClient:
                     for line in f:
                         if line.startswith('SYLECTUS_COOKIE='):
                             cookie_string = line.split('=', 1)[1].strip().strip('"')
+                            self.cookie_string = cookie_string
                             
                             # Parse cookie string
                             for cookie in cookie_string.split('; '):
@@ -132,6 +138,7 @@ class SylectusAPIClient:
             # Fallback to .env file
             cookie_string = os.getenv('SYLECTUS_COOKIE')
             if cookie_string:
+                self.cookie_string = cookie_string
                 for cookie in cookie_string.split('; '):
                     if '=' in cookie:
                         name, value = cookie.split('=', 1)
@@ -147,92 +154,108 @@ class SylectusAPIClient:
             return False
     
     def get_company_email(self, profile_url):
-        """Get company email from profile page"""
+        """Get company email from profile page (served from cache when warm)"""
+        hit, email = self.profile_cache.get(profile_url)
+        if hit:
+            print(f"📧 Cached profile email: {email or 'none on profile'}")
+            return email
+        
+        # Share the request budget with the idle-time warmer
+        self.profile_rate_limiter.acquire()
+        fetched, email = self.fetch_company_email(profile_url)
+        if fetched:
+            self.profile_cache.put(profile_url, email)
+        return email
+    
+    def extract_profile_email(self, html):
+        """Find a contact email in a company profile page (None if there is none)"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Look for email patterns in the page text
+        page_text = soup.get_text()
+        
+        # Enhanced email patterns
+        email_patterns = [
+            r'E-?mail[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'Contact[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'Email[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
+            r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+        ]
+        
+        for pattern in email_patterns:
+            matches = re.findall(pattern, page_text, re.IGNORECASE)
+            for match in matches:
+                email = match if isinstance(match, str) else match[0]
+                # Clean up email address
+                email = re.sub(r'[A-Z]{3,}$', '', email)  # Remove trailing uppercase text
+                email = email.strip()
+                
+                # Skip common false positives
+                if not any(skip in email.lower() for skip in ['example.com', 'test.com', 'domain.com']):
+                    # Validate email format
+                    if re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+                        print(f"✅ Email found in profile text: {email}")
+                        return email
+        
+        # Check for mailto links
+        mailto_links = soup.find_all('a', href=re.compile(r'mailto:'))
+        for link in mailto_links:
+            href = link.get('href', '')
+            email = href.replace('mailto:', '').strip()
+            if '@' in email and '.' in email:
+                print(f"✅ Email found in mailto: {email}")
+                return email
+        
+        # Check for emails in form fields or input values
+        inputs = soup.find_all('input')
+        for input_tag in inputs:
+            value = input_tag.get('value', '')
+            if '@' in value and '.' in value:
+                email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', value)
+                if email_match:
+                    email = email_match.group(1)
+                    print(f"✅ Email found in input field: {email}")
+                    return email
+        
+        # Check for emails in JavaScript or hidden elements
+        scripts = soup.find_all('script')
+        for script in scripts:
+            if script.string:
+                email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', script.string)
+                if email_match:
+                    email = email_match.group(1)
+                    print(f"✅ Email found in JavaScript: {email}")
+                    return email
+        
+        print("❌ No email found in company profile")
+        return None
+    
+    def fetch_company_email(self, profile_url):
+        """Fetch company profile page and extract email - returns (fetched, email)"""
         try:
             # Make request to company profile page
             full_url = f"{self.base_url}/{profile_url}"
             print(f"📧 Fetching email from: {profile_url}")
             
-            # Add delay to avoid rate limiting
-            time.sleep(2)
-            
-            response = self.session.get(full_url, timeout=15)
+            response = self.session.get(full_url, timeout=PROFILE_FETCH_TIMEOUT)
             
             if response.status_code == 200:
-                # Save profile page for debugging
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                with open(f"profile_debug_{timestamp}.html", "w", encoding='utf-8') as f:
-                    f.write(response.text)
-                
-                # Parse the profile page for email
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Look for email patterns in the page text
-                page_text = soup.get_text()
-                
-                # Enhanced email patterns
-                email_patterns = [
-                    r'E-?mail[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-                    r'Contact[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-                    r'Email[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-                    r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-                ]
-                
-                for pattern in email_patterns:
-                    matches = re.findall(pattern, page_text, re.IGNORECASE)
-                    for match in matches:
-                        email = match if isinstance(match, str) else match[0]
-                        # Clean up email address
-                        email = re.sub(r'[A-Z]{3,}$', '', email)  # Remove trailing uppercase text
-                        email = email.strip()
-                        
-                        # Skip common false positives
-                        if not any(skip in email.lower() for skip in ['example.com', 'test.com', 'domain.com']):
-                            # Validate email format
-                            if re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
-                                print(f"✅ Email found in profile text: {email}")
-                                return email
-                
-                # Check for mailto links
-                mailto_links = soup.find_all('a', href=re.compile(r'mailto:'))
-                for link in mailto_links:
-                    href = link.get('href', '')
-                    email = href.replace('mailto:', '').strip()
-                    if '@' in email and '.' in email:
-                        print(f"✅ Email found in mailto: {email}")
-                        return email
-                
-                # Check for emails in form fields or input values
-                inputs = soup.find_all('input')
-                for input_tag in inputs:
-                    value = input_tag.get('value', '')
-                    if '@' in value and '.' in value:
-                        email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', value)
-                        if email_match:
-                            email = email_match.group(1)
-                            print(f"✅ Email found in input field: {email}")
-                            return email
-                
-                # Check for emails in JavaScript or hidden elements
-                scripts = soup.find_all('script')
-                for script in scripts:
-                    if script.string:
-                        email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', script.string)
-                        if email_match:
-                            email = email_match.group(1)
-                            print(f"✅ Email found in JavaScript: {email}")
-                            return email
-                
-                print("❌ No email found in company profile")
-                print(f"📄 Profile page saved for debugging: profile_debug_{timestamp}.html")
-                return None
+                email = self.extract_profile_email(response.text)
+                if email is None:
+                    path = self.debug_captures.capture('profile', response.text, failed=True)
+                    print(f"📄 Profile page saved for debugging: {path}")
+                else:
+                    # Sampled so the parser can be checked against pages that worked
+                    self.debug_captures.capture('profile', response.text)
+                return True, email
             else:
                 print(f"❌ Profile page request failed: {response.status_code}")
-                return None
+                self.debug_captures.capture(f'profile_http{response.status_code}', response.text, failed=True)
+                return False, None
                 
         except Exception as e:
             print(f"❌ Error fetching company email: {e}")
-            return None
+            return False, None
     
     def call_load_board_api(self):
         """Call the load board API to get fresh data"""
@@ -245,14 +268,18 @@ class SylectusAPIClient:
             # Make API call to refresh load data
             response = self.session.post(self.load_board_api, timeout=30)
             
+            if 'Login.aspx' in response.url:
+                # Cookies are dead - make sure no session check trusts a cached "valid"
+                print("🔒 Redirected to login - session expired")
+                # The jar has picked up Set-Cookie values since - use the string the session was loaded from
+                get_validation_cache().invalidate(self.cookie_string or self.session.cookies)
+                return None
+            
             if response.status_code == 200:
                 print(f"✅ API call successful ({len(response.text)} bytes)")
                 
-                # Also save raw HTML for analysis
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                with open(f"raw_html_{timestamp}.html", "w", encoding='utf-8') as f:
-                    f.write(response.text)
-                print(f"💾 Raw HTML saved for analysis")
+                # Also keep raw HTML for analysis (stored once per distinct body)
+                self.io_writer.submit(self.raw_captures.put, response.text, label='raw HTML capture')
                 
                 return response.text
             else:
@@ -268,6 +295,7 @@ class SylectusAPIClient:
         try:
             soup = BeautifulSoup(html_content, 'html.parser')
             loads = []
+            profile_urls = set()
             
             # Look for table rows containing load data
             tables = soup.find_all('table')
@@ -284,6 +312,9 @@ class SylectusAPIClient:
                             # Use enhanced parser for comprehensive data extraction
                             load_info = self.enhanced_parser.parse_load_row_comprehensive(row)
                             if load_info and load_info['load_id'] != 'Unknown':
+                                if 'profile_url' in load_info:
+                                    profile_urls.add(load_info['profile_url'])
+                                self.company_index.observe(load_info)
                                 # Try to get email from company profile if available
                                 if 'profile_url' in load_info and load_info.get('contact_email', 'Unknown') == 'Unknown':
                                     print(f"🔍 Attempting email extraction for {load_info.get('company', 'Unknown')}")
@@ -297,6 +328,8 @@ class SylectusAPIClient:
                                     print(f"⚠️ No profile URL found for {load_info.get('company', 'Unknown')}")
                                 loads.append(load_info)
             
+            # Brokers currently on the board - targets for the idle-time warmer
+            self.board_profile_urls = profile_urls
             return loads
             
         except Exception as e:
@@ -625,106 +658,89 @@ class SylectusAPIClient:
     
     def format_telegram_message(self, load_info):
         """Format comprehensive load info for Telegram"""
-        message = f"""🆕 **NEW SYLECTUS LOAD**
-
-🏢 **Company:** {load_info['company']}
-🆔 **Load ID:** {load_info['load_id']}
-
-📍 **PICKUP:**
-   📍 {load_info['pickup_city']}, {load_info['pickup_state']}
-   📅 {load_info['pickup_date']} {load_info['pickup_time']}
-
-📍 **DELIVERY:**
-   📍 {load_info['delivery_city']}, {load_info['delivery_state']}
-   📅 {load_info['delivery_date']} {load_info['delivery_time']}
-
-🚛 **LOAD DETAILS:**
-   📏 Miles: {load_info['miles']}
-   📦 Pieces: {load_info['pieces']}
-   ⚖️ Weight: {load_info['weight']}"""
-
-        if load_info.get('vehicle_type') != 'Unknown':
-            message += f"\n   🚐 Vehicle: {load_info['vehicle_type']}"
-        
-        if load_info.get('dimensions') != 'Unknown':
-            message += f"\n   📐 Dimensions: {load_info['dimensions']}"
-        
-        if load_info.get('rate', 'Unknown') != 'Unknown':
-            message += f"\n\n💰 **Rate:** {load_info['rate']}"
+        # Broker context from the company index (no extra requests)
+        broker_context = self.company_index.describe(load_info.get('company_id'))
+        return render('full', load_fields(load_info, broker_context=broker_context))
+    
+    def send_digest(self, new_loads_batch):
+        """Pack a burst of new loads into digest messages; returns loads sent"""
+        if self.startup_mode:
+            title = f"🚀 **STARTUP SCAN COMPLETE** - {len(new_loads_batch)} loads available"
         else:
-            # Calculate rate estimate
-            try:
-                miles_val = load_info.get('miles', 'Unknown')
-                if miles_val != 'Unknown' and str(miles_val).isdigit():
-                    miles = int(miles_val)
-                    rate = miles * 0.75  # $0.75 per mile estimate
-                    message += f"\n\n💰 **Est. Rate:** ${rate:.0f}"
-            except:
-                pass
-        
-        # Payment terms
-        payment_section = ""
-        if load_info.get('credit_score', 'Unknown') != 'Unknown':
-            payment_section += f"\n💳 Credit Score: {load_info['credit_score']}"
+            title = f"🚨 **{len(new_loads_batch)} NEW LOADS FOUND**"
         
-        if load_info.get('days_to_pay', 'Unknown') != 'Unknown':
-            payment_section += f"\n📅 Payment Terms: {load_info['days_to_pay']}"
+        for load_info, unique_id in new_loads_batch:
+            self.save_load_details(load_info)
+            self.digest.remember(unique_id, self.format_telegram_message(load_info))
+            self.interactions.remember(unique_id, load_info)
         
-        if payment_section:
-            message += f"\n\n**PAYMENT INFO:**{payment_section}"
+        # Each subscriber gets a digest of just the loads matching their filters
+        loads_by_chat = {}
+        for load_info, unique_id in new_loads_batch:
+            for chat_id in self.interactions.active_chats(self.subscribers.match(load_info)):
+                loads_by_chat.setdefault(chat_id, []).append((load_info, unique_id))
         
-        # Contact information (prioritize email)
-        contact_section = ""
-        has_email = False
+        failed = set()
+        message_count = 0
+        for chat_id, chat_loads in loads_by_chat.items():
+            for text, keyboard, keys in self.digest.build(chat_loads, title):
+                message_count += 1
+                if self.outbox.enqueue(text, chat_id=chat_id, reply_markup=keyboard) is None:
+                    print(f"❌ Failed to queue digest with {len(keys)} loads for chat {chat_id}")
+                    failed.update(keys)
         
-        if load_info.get('contact_email', 'Unknown') != 'Unknown':
-            contact_section += f"\n📧 **Email: {load_info['contact_email']}**"
-            has_email = True
+        sent = 0
+        for load_info, unique_id in new_loads_batch:
+            if unique_id not in failed:
+                self.state.mark_sent(unique_id)
+                sent += 1
         
-        if load_info.get('contact_phone', 'Unknown') != 'Unknown':
-            contact_section += f"\n📞 Phone: {load_info['contact_phone']}"
-        
-        broker_email = load_info.get('broker_email', 'Unknown')
-        contact_email = load_info.get('contact_email', 'Unknown')
-        if broker_email != 'Unknown' and broker_email != contact_email:
-            contact_section += f"\n📧 Broker Email: {broker_email}"
-            has_email = True
-        
-        if contact_section:
-            message += f"\n\n**CONTACT INFO:**{contact_section}"
-        
-        # Add email status indicator
-        if not has_email:
-            message += f"\n\n⚠️ **NO EMAIL FOUND** - Check company profile"
-            if 'profile_url' in load_info:
-                message += f"\n🔗 Profile: {load_info['profile_url']}"
-        else:
-            message += f"\n\n✅ **Email Available**"
-        
-        # Special instructions
-        if load_info.get('special_instructions', 'Unknown') != 'Unknown':
-            message += f"\n\n⚠️ **Special Instructions:** {load_info['special_instructions']}"
-        
-        message += f"\n\n⏰ **Found:** {load_info.get('found_time', 'Unknown')}"
-        message += f"\n🌐 **Via API Scraper**"
-        
-        # Add debug info for development (optional)
-        debug_cells = load_info.get('all_cells', [])
-        if debug_cells:
-            message += f"\n\n🔧 **Debug:** {len(debug_cells)} cells analyzed"
-        
-        return message
+        print(f"📦 Coalesced {len(new_loads_batch)} new loads into {message_count} digest messages for {len(loads_by_chat)} chats")
+        return sent
+    
+    def wait_for_next_poll(self, interval):
+        """Sleep until the next poll, warming profile emails in the meantime"""
+        next_poll = time.time() + interval
+        self.profile_cache.save()
+        self.company_index.save()
+        self.profile_warmer.start(self.board_profile_urls, next_poll)
+        try:
+            time.sleep(max(0, next_poll - time.time()))
+        finally:
+            # Poll is due - stop warming immediately
+            self.profile_warmer.stop()
+    
+    def shutdown(self):
+        """Persist caches, board snapshot and dedup window for a warm restart"""
+        self.profile_warmer.stop()
+        self.profile_cache.save()
+        self.company_index.save()
+        self.state.close()
+        self.io_writer.close()
+        self.snapshot.save()
+        self.interactions.stop()
+        self.lifecycle.close()
+        self.raw_captures.close()
+        self.debug_captures.close()
+        self.history.close()
+        self.dedup.close()
+        self.outbox.stop()
+        print("💾 State saved for warm restart")
     
     def monitor_loads(self):
         """Main monitoring loop"""
         print("🚀 Starting API-based monitoring...")
+        self.outbox.start()
         
         # Load session cookies
         if not self.load_session_cookies():
             self.send_to_telegram("❌ No session cookies found. Please run network_monitor.py first.")
+            self.outbox.stop()
             return
         
         self.send_to_telegram("🚀 API Scraper started - monitoring load board...")
+        self.dedup.start_compaction()
+        self.interactions.start()
         
         while True:
             try:
@@ -732,30 +748,34 @@ class SylectusAPIClient:
                 html_data = self.call_load_board_api()
                 
                 if html_data:
+                    self.subscribers.refresh()
+                    
                     # Extract loads
                     loads = self.extract_loads_from_html(html_data)
                     
                     new_loads_count = 0
                     new_loads_batch = []
+                    board = {}
                     
                     # First collect all new loads (or all loads if startup mode)
                     for load_info in loads:
                         # Create unique identifier
-                        unique_id = f"{load_info['load_id']}_{load_info['pickup_city']}, {load_info['pickup_state']}_{load_info['delivery_city']}, {load_info['delivery_state']}"
+                        unique_id = canonical_load_key(load_info)
+                        board[unique_id] = load_info
                         
-                        if self.startup_mode or unique_id not in self.sent_items:
+                        if self.startup_mode:
+                            new_loads_batch.append((load_info, unique_id))
+                        elif unique_id not in self.warm_start_keys and not self.state.seen(unique_id):
                             new_loads_batch.append((load_info, unique_id))
                     
-                    # Send new loads with rate limiting
-                    if new_loads_batch:
+                    # Send new loads (bursts are coalesced into digests)
+                    if self.digest.should_coalesce(len(new_loads_batch)):
+                        new_loads_count = self.send_digest(new_loads_batch)
+                    elif new_loads_batch:
                         if self.startup_mode:
                             # Send startup summary
                             summary_msg = f"🚀 **STARTUP SCAN COMPLETE** - Found {len(new_loads_batch)} loads available - Sending details..."
                             self.send_to_telegram(summary_msg)
-                        elif len(new_loads_batch) > 5:
-                            # If too many new loads, send summary first
-                            summary_msg = f"🚨 **{len(new_loads_batch)} NEW LOADS FOUND** - Sending details..."
-                            self.send_to_telegram(summary_msg)
                         
                         for load_info, unique_id in new_loads_batch:
                             # Save detailed load data for analysis
@@ -764,17 +784,36 @@ class SylectusAPIClient:
                             # Format and send message
                             message = self.format_telegram_message(load_info)
                             
-                            if self.send_to_telegram(message):
-                                self.save_sent_item(unique_id)
+                            if self.send_load_alert(load_info, unique_id, message):
+                                self.state.mark_sent(unique_id)
                                 new_loads_count += 1
-                                print(f"✅ New load sent: {load_info['company']} - {load_info['load_id']}")
+                                print(f"✅ New load queued: {load_info['company']} - {load_info['load_id']}")
                             else:
-                                print(f"❌ Failed to send load: {load_info['load_id']}")
-                                break  # Stop sending if Telegram fails
+                                print(f"❌ Failed to queue load: {load_info['load_id']}")
+                    
+                    # One group commit for the whole cycle
+                    self.state.commit()
+                    
+                    # Appear / update / disappear events for the whole board
+                    lifecycle_events = self.lifecycle.observe(board)
+                    
+                    # Covered loads: mark their alerts so nobody calls about them
+                    self.outbox.retract_alerts(lifecycle_events['removed'])
+                    
+                    # Every load seen this cycle, in one batch
+                    alerted = {key: info for key, info in board.items() if self.state.seen(key)}
+                    self.io_writer.submit(self.history.record_cycle, board, alerted=alerted, label='load history')
+                    
+                    # Remember alerted loads still on the board for the next warm restart
+                    self.snapshot.update(alerted)
+                    self.io_writer.submit(self.snapshot.save, label='board snapshot')
                     
                     if self.startup_mode:
                         print(f"📊 Startup scan complete. Found {len(loads)} total loads, sent {new_loads_count}")
                         self.startup_mode = False  # Switch to normal mode after first scan
+                    elif self.warm_start_keys:
+                        print(f"♻️ Warm restart scan complete. Found {len(loads)} total loads, {new_loads_count} new since shutdown")
+                        self.warm_start_keys = set()
                     else:
                         print(f"📊 Scan complete. Found {len(loads)} total loads, {new_loads_count} new")
                 
@@ -785,21 +824,31 @@ class SylectusAPIClient:
                 
                 # Wait for next check
                 print(f"⏰ Waiting {CHECK_INTERVAL} seconds...")
-                time.sleep(CHECK_INTERVAL)
+                self.wait_for_next_poll(CHECK_INTERVAL)
                 
             except KeyboardInterrupt:
                 print("\n🛑 Monitoring stopped by user")
                 self.send_to_telegram("🛑 API Scraper stopped")
+                self.shutdown()
                 break
             except Exception as e:
                 print(f"❌ Error in monitoring loop: {e}")
                 self.send_to_telegram(f"⚠️ API Scraper error: {e}")
                 time.sleep(60)  # Wait before retrying
 
+def handle_sigterm(signum, frame):
+    """Treat SIGTERM (pkill, systemd stop) like Ctrl+C so state is saved"""
+    raise KeyboardInterrupt
+
 def main():
     """Main entry point"""
     import sys
-    startup_mode = '--startup' in sys.argv or len(sys.argv) == 1  # Default to startup mode
+    # Warm restart by default; --resend-all re-sends every load on the board.
+    # --startup used to mean resend-all; deployed service files may still pass it.
+    if '--startup' in sys.argv:
+        print("ℹ️ --startup is deprecated and ignored (warm restart). Use --resend-all to re-send every load")
+    startup_mode = '--resend-all' in sys.argv
+    signal.signal(signal.SIGTERM, handle_sigterm)
     client = SylectusAPIClient(startup_mode=startup_mode)
     client.monitor_loads()
 
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Rotating Bloom Filter for Dedup Lookups
+Time-windowed Bloom filter that answers "definitely not seen" in memory so
+most dedup checks never touch the store. Memory stays flat: old generations
+are dropped as the window rotates.
+"""
+
+import os
+import math
+import json
+import time
+import hashlib
+import threading
+
+DEDUP_BLOOM_FILE = os.getenv('DEDUP_BLOOM_FILE', 'dedup_bloom.bin')
+DEDUP_BLOOM_CAPACITY = int(os.getenv('DEDUP_BLOOM_CAPACITY', 100000))  # Expected keys per window
+DEDUP_BLOOM_FP_RATE = float(os.getenv('DEDUP_BLOOM_FP_RATE', 0.001))
+DEDUP_BLOOM_MAX_BYTES = int(os.getenv('DEDUP_BLOOM_MAX_BYTES', 4 * 1024 * 1024))
+DEDUP_BLOOM_GENERATIONS = 4
+
+class RotatingBloomFilter:
+    """Bloom filter split into time generations; a key is kept for at least `window` seconds"""
+
+    def __init__(self, window, capacity=DEDUP_BLOOM_CAPACITY, fp_rate=DEDUP_BLOOM_FP_RATE,
+                 max_bytes=DEDUP_BLOOM_MAX_BYTES, generations=DEDUP_BLOOM_GENERATIONS):
+        self.generations = max(2, generations)
+        # Dropping the oldest of N generations still leaves N-1 spans covering the window
+        self.span = window / (self.generations - 1)
+        self.lock = threading.Lock()
+
+        # Lookups test every generation, so split the false-positive budget between them
+        per_generation_keys = max(1, math.ceil(capacity / (self.generations - 1)))
+        per_generation_fp = fp_rate / self.generations
+        bits = math.ceil(-per_generation_keys * math.log(per_generation_fp) / (math.log(2) ** 2))
+
+        max_bits = max(64, (max_bytes // self.generations) * 8)
+        if bits > max_bits:
+            print(f"⚠️ Bloom filter capped at {max_bytes} bytes - false-positive rate will exceed {fp_rate}")
+            bits = max_bits
+
+        self.num_bits = bits
+        self.num_bytes = (bits + 7) // 8
+        self.num_hashes = max(1, round(bits / per_generation_keys * math.log(2)))
+
+        now = time.time()
+        self.filters = [(now, bytearray(self.num_bytes))]
+        self.watermark = None  # Owner-defined sync position stored with the saved filter
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _rotate(self, now):
+        """Start new generations as spans elapse, dropping the oldest"""
+        while now - self.filters[-1][0] >= self.span:
+            start = self.filters[-1][0] + self.span
+            if now - start >= self.span * self.generations:
+                # Idle for longer than the whole window - everything has aged out
+                self.filters = [(now, bytearray(self.num_bytes))]
+                return
+            self.filters.append((start, bytearray(self.num_bytes)))
+            if len(self.filters) > self.generations:
+                self.filters.pop(0)
+
+    def add(self, key):
+        """Add key to the current generation"""
+        positions = self._positions(key)
+        with self.lock:
+            self._rotate(time.time())
+            bits = self.filters[-1][1]
+            for pos in positions:
+                bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, key):
+        """False means definitely not added within the window"""
+        positions = self._positions(key)
+        with self.lock:
+            self._rotate(time.time())
+            for _, bits in self.filters:
+                if all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+                    return True
+        return False
+
+    def _params(self):
+        return {
+            'num_bits': self.num_bits,
+            'num_hashes': self.num_hashes,
+            'span': self.span,
+            'generations': self.generations
+        }
+
+    def save(self, path=DEDUP_BLOOM_FILE, watermark=None):
+        """Persist generations (and the owner's sync watermark) so a restart starts warm"""
+        try:
+            with self.lock:
+                header = dict(self._params(), starts=[start for start, _ in self.filters], watermark=watermark)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(json.dumps(header).encode('utf-8') + b'\n')
+                    for _, bits in self.filters:
+                        f.write(bits)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"❌ Error saving bloom filter: {e}")
+            return False
+
+    def load(self, path=DEDUP_BLOOM_FILE):
+        """Restore saved generations; returns False if missing or sized differently"""
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                if any(header.get(name) != value for name, value in self._params().items()):
+                    print("⚠️ Saved bloom filter has different parameters, rebuilding")
+                    return False
+                filters = []
+                for start in header['starts']:
+                    bits = bytearray(f.read(self.num_bytes))
+                    if len(bits) != self.num_bytes:
+                        return False
+                    filters.append((start, bits))
+
+            with self.lock:
+                self.filters = filters or self.filters
+                self.watermark = header.get('watermark')
+                self._rotate(time.time())
+            return True
+
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"⚠️ Could not load bloom filter: {e}")
+            return False
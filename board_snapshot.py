@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Board Snapshot Persistence
+Saves the loads currently on the board so a restarted monitor resumes from
+where it stopped instead of re-alerting everything
+"""
+
+import os
+import json
+import time
+
+BOARD_SNAPSHOT_FILE = os.getenv('BOARD_SNAPSHOT_FILE', 'board_snapshot.json')
+SNAPSHOT_FIELDS = [
+    'load_id', 'company', 'company_id', 'pickup_city', 'pickup_state',
+    'delivery_city', 'delivery_state', 'pickup_date', 'vehicle_type', 'miles'
+]
+
+def summarize_load(load_info):
+    """Compact copy of a load for the snapshot"""
+    return {field: load_info.get(field, 'Unknown') for field in SNAPSHOT_FIELDS}
+
+class BoardSnapshot:
+    """Last seen board state (canonical key -> load summary), persisted as JSON"""
+
+    def __init__(self, snapshot_file=BOARD_SNAPSHOT_FILE):
+        self.snapshot_file = snapshot_file
+        self.loads = {}
+        self.saved_at = None
+
+    def load(self):
+        """Load the previous snapshot; returns the number of loads restored"""
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                data = json.load(f)
+            self.loads = data.get('loads', {})
+            self.saved_at = data.get('saved_at')
+            age_minutes = (time.time() - self.saved_at) / 60 if self.saved_at else 0
+            print(f"📂 Restored board snapshot: {len(self.loads)} loads ({age_minutes:.0f} min old)")
+        except FileNotFoundError:
+            self.loads = {}
+        except Exception as e:
+            print(f"⚠️ Could not load board snapshot: {e}")
+            self.loads = {}
+        return len(self.loads)
+
+    def update(self, board):
+        """Replace the snapshot with the current board (key -> load_info)"""
+        self.loads = {key: summarize_load(load_info) for key, load_info in board.items()}
+
+    def save(self):
+        """Write the snapshot atomically"""
+        try:
+            self.saved_at = time.time()
+            tmp_file = f"{self.snapshot_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({'saved_at': self.saved_at, 'loads': self.loads}, f)
+            os.replace(tmp_file, self.snapshot_file)
+        except Exception as e:
+            print(f"❌ Error saving board snapshot: {e}")
+
+    def __contains__(self, key):
+        return key in self.loads
+
+    def __len__(self):
+        return len(self.loads)
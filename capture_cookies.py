@@ -76,7 +76,7 @@ def main():
     print("2. Update server .env:")
     print(f"   ssh -i ~/.ssh/sylectus_key root@157.245.242.222 'cp /opt/sylectus-scraper/{filename} /opt/sylectus-scraper/.env'")
     print("3. Restart scraper:")
-    print("   ssh -i ~/.ssh/sylectus_key root@157.245.242.222 'pkill -f api_scraper && cd /opt/sylectus-scraper && python3 api_scraper.py --startup > /tmp/scraper.log 2>&1 &'")
+    print("   ssh -i ~/.ssh/sylectus_key root@157.245.242.222 'pkill -f api_scraper && cd /opt/sylectus-scraper && python3 api_scraper.py > /tmp/scraper.log 2>&1 &'")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Company Entity Index for Sylectus Brokers
+Normalizes company names to stable ids and keeps incremental reputation
+aggregates (loads posted, typical lanes, credit score and days-to-pay history)
+"""
+
+import os
+import re
+import json
+import time
+import threading
+
+COMPANY_INDEX_FILE = os.getenv('COMPANY_INDEX_FILE', 'company_index.json')
+
+# Legal suffixes dropped when normalizing names ("ACME LOGISTICS, LLC." == "Acme Logistics LLC")
+COMPANY_SUFFIXES = {'LLC', 'INC', 'CORP', 'CORPORATION', 'CO', 'LTD', 'LP', 'LLP', 'COMPANY', 'INCORPORATED'}
+MAX_RECENT_LOADS = 200
+MAX_HISTORY = 50
+MAX_HEADER_CACHE = 5000
+
+def normalize_company_name(name):
+    """Normalize a company name to its canonical comparison form"""
+    if not name:
+        return ''
+    text = name.replace('\xa0', ' ').upper()
+    text = text.replace('&', ' AND ')
+    text = text.replace('.', '')
+    text = re.sub(r'[^A-Z0-9 ]+', ' ', text)
+    words = text.split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+def company_id_for(name):
+    """Stable company id derived from the normalized name"""
+    normalized = normalize_company_name(name)
+    return normalized.lower().replace(' ', '_') if normalized else None
+
+class CompanyIndex:
+    """In-memory company index with O(1) lookups, persisted as JSON"""
+
+    def __init__(self, index_file=COMPANY_INDEX_FILE):
+        self.index_file = index_file
+        self.companies = {}
+        self.name_ids = {}  # raw name -> company id
+        self.header_cache = {}  # raw company cell text -> parsed header fields
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Load the index from disk"""
+        try:
+            with open(self.index_file, 'r') as f:
+                self.companies = json.load(f)
+            print(f"📂 Loaded {len(self.companies)} companies from index")
+        except FileNotFoundError:
+            self.companies = {}
+        except Exception as e:
+            print(f"⚠️ Could not load company index: {e}")
+            self.companies = {}
+
+    def save(self):
+        """Write the index to disk atomically (only when changed)"""
+        if not self.dirty:
+            return
+        try:
+            with self.lock:
+                data = json.dumps(self.companies)
+                self.dirty = False
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(data)
+            os.replace(tmp_file, self.index_file)
+        except Exception as e:
+            print(f"❌ Error saving company index: {e}")
+
+    def resolve_id(self, name):
+        """Company id for a raw name (memoized)"""
+        company_id = self.name_ids.get(name)
+        if company_id is None and name:
+            company_id = company_id_for(name)
+            self.name_ids[name] = company_id
+        return company_id
+
+    def resolve_header(self, cell_text, parse_header):
+        """Parse a company header cell once and reuse the result for repeat rows"""
+        header = self.header_cache.get(cell_text)
+        if header is None:
+            header = parse_header(cell_text)
+            if header.get('company'):
+                header['company_id'] = self.resolve_id(header['company'])
+            if len(self.header_cache) >= MAX_HEADER_CACHE:
+                self.header_cache.clear()
+            self.header_cache[cell_text] = header
+        return header
+
+    def get(self, company_id):
+        """Company record by id"""
+        return self.companies.get(company_id)
+
+    def _append_history(self, history, value, now):
+        if value in (None, 'Unknown'):
+            return
+        if history and history[-1][1] == value:
+            return
+        history.append([now, value])
+        del history[:-MAX_HISTORY]
+
+    def observe(self, load_info):
+        """Fold a parsed load into its company's aggregates"""
+        company_id = load_info.get('company_id') or self.resolve_id(load_info.get('company'))
+        if not company_id or load_info.get('company', 'Unknown') == 'Unknown':
+            return None
+
+        load_info['company_id'] = company_id
+        now = time.time()
+
+        with self.lock:
+            record = self.companies.get(company_id)
+            if record is None:
+                record = {
+                    'id': company_id,
+                    'name': load_info['company'],
+                    'profile_url': None,
+                    'loads_posted': 0,
+                    'lanes': {},
+                    'credit_history': [],
+                    'days_to_pay_history': [],
+                    'recent_loads': [],
+                    'first_seen': now,
+                    'last_seen': now
+                }
+                self.companies[company_id] = record
+
+            record['last_seen'] = now
+            if load_info.get('profile_url'):
+                record['profile_url'] = load_info['profile_url']
+
+            self._append_history(record['credit_history'], load_info.get('credit_score'), now)
+            self._append_history(record['days_to_pay_history'], load_info.get('days_to_pay'), now)
+
+            # Count each load once, however many polls it stays on the board
+            load_id = load_info.get('load_id')
+            if load_id and load_id != 'Unknown' and load_id not in record['recent_loads']:
+                record['recent_loads'].append(load_id)
+                del record['recent_loads'][:-MAX_RECENT_LOADS]
+                record['loads_posted'] += 1
+
+                pickup_state = load_info.get('pickup_state', 'Unknown')
+                delivery_state = load_info.get('delivery_state', 'Unknown')
+                if pickup_state != 'Unknown' and delivery_state != 'Unknown':
+                    lane = f"{pickup_state}→{delivery_state}"
+                    record['lanes'][lane] = record['lanes'].get(lane, 0) + 1
+
+            self.dirty = True
+
+        return company_id
+
+    def typical_lanes(self, company_id, limit=3):
+        """Most frequently posted lanes for a company"""
+        record = self.companies.get(company_id)
+        if not record:
+            return []
+        lanes = sorted(record['lanes'].items(), key=lambda item: item[1], reverse=True)
+        return [lane for lane, _ in lanes[:limit]]
+
+    def describe(self, company_id):
+        """Short broker context line for alerts"""
+        record = self.companies.get(company_id)
+        if not record:
+            return None
+
+        parts = [f"{record['loads_posted']} loads seen"]
+
+        lanes = self.typical_lanes(company_id)
+        if lanes:
+            parts.append(f"lanes {', '.join(lanes)}")
+
+        credit = record['credit_history']
+        if credit:
+            trend = f"credit {credit[-1][1]}"
+            if len(credit) > 1:
+                trend += f" (was {credit[-2][1]})"
+            parts.append(trend)
+
+        days = record['days_to_pay_history']
+        if days:
+            parts.append(f"pays {days[-1][1]}")
+
+        return ' · '.join(parts)
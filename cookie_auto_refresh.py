@@ -10,6 +10,8 @@ import subprocess
 import datetime
 from pathlib import Path
 
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+
 class AutoCookieRefresh:
     def __init__(self):
         self.server_ip = "157.245.242.222"
@@ -67,7 +69,7 @@ class AutoCookieRefresh:
             
             if bot_token and chat_id:
                 import requests
-                url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+                url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
                 payload = {
                     'chat_id': chat_id,
                     'text': f"🤖 AUTO REFRESH\n\n{message}",
@@ -149,7 +151,7 @@ class AutoCookieRefresh:
             self.log("🔄 Restarting scraper...")
             subprocess.run([
                 'ssh', '-i', self.ssh_key, f'root@{self.server_ip}',
-                'pkill -f api_scraper; cd /opt/sylectus-scraper && python3 api_scraper.py --startup > /tmp/scraper.log 2>&1 &'
+                'pkill -f api_scraper; cd /opt/sylectus-scraper && python3 api_scraper.py > /tmp/scraper.log 2>&1 &'
             ], timeout=60)
             
             self.log("✅ Scraper restarted with fresh cookies")
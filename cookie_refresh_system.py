@@ -10,6 +10,10 @@ import datetime
 import requests
 import subprocess
 from pathlib import Path
+from session_lifetime import SessionLifetimeEstimator
+from session_validation import cookie_fingerprint
+
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
 
 class CookieMonitor:
     def __init__(self, cookie_file_path="/opt/sylectus-scraper/.env"):
@@ -17,7 +21,12 @@ class CookieMonitor:
         self.server_ip = "157.245.242.222"
         self.ssh_key = "~/.ssh/sylectus_key"
         self.check_interval = 3600  # Check every hour
-        self.warning_hours = 2  # Warn when 2 hours left
+        self.warning_hours = 2  # Warn when 2 hours are left of the predicted lifetime
+        self.default_warning_age = 20  # Warn at this age until enough sessions have been observed
+        # The session stores usually live on the server, so this machine may never learn a lifetime
+        self.lifetime = SessionLifetimeEstimator(margin_minutes=self.warning_hours * 60,
+                                                 default_hours=self.default_warning_age + self.warning_hours)
+        self.warned_cookie = None  # Fingerprint of the cookie already warned about
         
     def extract_cookie_from_env(self, env_file):
         """Extract SYLECTUS_COOKIE from .env file"""
@@ -103,7 +112,7 @@ class CookieMonitor:
                 return
             
             # Send message
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+            url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
             payload = {
                 'chat_id': chat_id,
                 'text': f"🍪 COOKIE ALERT\n\n{message}",
@@ -158,7 +167,8 @@ class CookieMonitor:
             return valid, {
                 'reason': reason,
                 'age_hours': age_hours,
-                'cookie_present': True
+                'cookie_present': True,
+                'fingerprint': cookie_fingerprint(cookie)
             }
             
         except Exception as e:
@@ -173,7 +183,11 @@ class CookieMonitor:
         """Main monitoring loop"""
         print("🍪 Cookie Refresh Monitor Started")
         print(f"📊 Checking every {self.check_interval/3600:.1f} hours")
-        print(f"⚠️  Warning threshold: {self.warning_hours} hours")
+        if self.lifetime.learned():
+            print(f"⚠️  Warning threshold: {self.warning_hours} hours before the predicted expiry "
+                  f"({self.lifetime.lifetime_hours():.1f} hours)")
+        else:
+            print(f"⚠️  Warning threshold: {self.default_warning_age} hours (no session history yet)")
         print("=" * 50)
         
         while True:
@@ -181,17 +195,26 @@ class CookieMonitor:
                 print(f"\n🔍 Cookie Status Check - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 
                 valid, details = self.check_server_cookie_status()
+                sleep_seconds = self.check_interval
                 
                 if valid:
-                    age = details.get('age_hours', 0)
+                    age = details.get('age_hours') or 0
                     print(f"✅ Cookie valid (age: {age:.1f} hours)")
                     
-                    # Check if cookie is getting old (warn after 20 hours)
-                    if age > 20:
+                    # Warn once per cookie, shortly before the lifetime learned from past sessions runs out
+                    self.lifetime.refresh()
+                    lifetime = self.lifetime.lifetime_hours()
+                    created_at = time.time() - age * 3600
+                    if not self.lifetime.due_for_refresh(created_at):
+                        # Wake up in time to warn before the predicted expiry
+                        sleep_seconds = self.lifetime.next_check_delay(created_at, max_delay=self.check_interval)
+                    elif details['fingerprint'] != self.warned_cookie:
+                        self.warned_cookie = details['fingerprint']
                         message = f"""
 Cookie is getting old and may expire soon.
 
 🕐 Cookie Age: {age:.1f} hours
+📈 Predicted Lifetime: {lifetime:.1f} hours
 ⚠️  Recommended: Refresh cookies manually
 
 📋 Steps to refresh:
@@ -226,8 +249,8 @@ Cookie is getting old and may expire soon.
                     print("🚨 Cookie expiration alert sent")
                     self.send_telegram_alert(message)
                 
-                print(f"⏰ Next check in {self.check_interval/3600:.1f} hours...")
-                time.sleep(self.check_interval)
+                print(f"⏰ Next check in {sleep_seconds/3600:.1f} hours...")
+                time.sleep(sleep_seconds)
                 
             except KeyboardInterrupt:
                 print("\n👋 Cookie monitor stopped")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Sampled Debug Capture
+One place for debug pages and screenshots. Failures are always kept,
+successes are sampled 1 in N per label, and the capture directory is capped
+by size with the least recently written captures (successes first) evicted.
+Files are written by the background I/O writer, so a capture costs the
+caller a counter bump and a queue put.
+"""
+
+import os
+from collections import OrderedDict
+from datetime import datetime
+from io_writer import BackgroundWriter
+
+DEBUG_CAPTURE_DIR = os.getenv('DEBUG_CAPTURE_DIR', 'debug_captures')
+DEBUG_SAMPLE_EVERY = int(os.getenv('DEBUG_SAMPLE_EVERY', 50))  # Keep 1 in N successful captures per label
+DEBUG_CAPTURE_MAX_BYTES = int(os.getenv('DEBUG_CAPTURE_MAX_BYTES', 100 * 1024 * 1024))
+
+class DebugCapture:
+    """Sampling, size-capped debug artifact writer"""
+
+    def __init__(self, directory=DEBUG_CAPTURE_DIR, sample_every=DEBUG_SAMPLE_EVERY,
+                 max_bytes=DEBUG_CAPTURE_MAX_BYTES, writer=None):
+        self.directory = directory
+        self.sample_every = max(1, sample_every)
+        self.max_bytes = max_bytes
+        self.counters = {}
+        self.dropped = 0
+        self.owns_writer = writer is None
+        self.writer = writer or BackgroundWriter(name='debug-capture')
+
+        # Existing captures in write order: path -> size
+        self.files = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        existing = [os.path.join(directory, name) for name in os.listdir(directory)]
+        for path in sorted(existing, key=os.path.getmtime):
+            if os.path.isfile(path):
+                self.files[path] = os.path.getsize(path)
+                self.total_bytes += self.files[path]
+
+    def capture(self, label, content, failed=False, extension='html'):
+        """Queue a capture if the sampling rules keep it; returns the file path or None"""
+        if not failed:
+            count = self.counters.get(label, 0)
+            self.counters[label] = count + 1
+            if count % self.sample_every:
+                return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        status = 'fail' if failed else 'ok'
+        path = os.path.join(self.directory, f"{status}_{label}_{timestamp}.{extension}")
+        data = content.encode('utf-8') if isinstance(content, str) else content
+
+        # Failures may wait for room; a sampled success is not worth blocking for
+        if not self.writer.submit(self._write, path, data, label=f'debug capture {label}', block=failed):
+            self.dropped += 1
+            return None
+        return path
+
+    def _write(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.files[path] = len(data)
+        self.total_bytes += len(data)
+        self._evict()
+
+    def _evict(self):
+        """Remove oldest captures past the size cap, successes before failures"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        ordered = ([p for p in self.files if not os.path.basename(p).startswith('fail_')] +
+                   [p for p in self.files if os.path.basename(p).startswith('fail_')])
+        for path in ordered:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.total_bytes -= self.files.pop(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Flush queued captures (and stop the writer if it is ours)"""
+        if self.owns_writer:
+            self.writer.close()
+        else:
+            self.writer.flush()
+        if self.dropped:
+            print(f"⚠️ {self.dropped} debug captures dropped (writer busy)")
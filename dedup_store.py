@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Dedup Store for Sent Load Notifications
+SQLite-backed replacement for sent_items.txt with insert times, TTL expiry
+and background compaction, shared by all scrapers
+
+The Bloom filter in front of the store answers misses without touching
+SQLite. It is synced from the insert-time index at startup and then at most
+every DEDUP_SYNC_INTERVAL seconds, which picks up keys marked by another
+scraper or before a crash that skipped saving the filter.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from bloom_filter import RotatingBloomFilter, DEDUP_BLOOM_FILE
+from load_keys import legacy_key_to_canonical
+
+DEDUP_DB_FILE = os.getenv('DEDUP_DB_FILE', 'dedup_store.db')
+DEDUP_TTL = int(os.getenv('DEDUP_TTL', 14 * 86400))  # Forget loads after 14 days
+DEDUP_COMPACT_INTERVAL = int(os.getenv('DEDUP_COMPACT_INTERVAL', 3600))
+LEGACY_SENT_ITEMS_FILE = 'sent_items.txt'
+VACUUM_THRESHOLD = 10000  # Rows removed before the file is rebuilt
+DEDUP_SYNC_INTERVAL = float(os.getenv('DEDUP_SYNC_INTERVAL', 60))  # Seconds between Bloom filter syncs
+
+class DedupStore:
+    """Indexed seen/mark store with TTL expiry"""
+
+    def __init__(self, db_path=DEDUP_DB_FILE, ttl=DEDUP_TTL, legacy_file=LEGACY_SENT_ITEMS_FILE,
+                 bloom_file=DEDUP_BLOOM_FILE):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.bloom_file = bloom_file
+        self.lock = threading.Lock()
+        self.removed_since_vacuum = 0
+        self.stop_event = threading.Event()
+        self.compactor = None
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.init_database()
+
+        if legacy_file:
+            self.import_legacy_file(legacy_file)
+
+        # In-memory front: keys the filter has never seen skip the point lookup
+        self.bloom = RotatingBloomFilter(window=ttl)
+        self.synced_through = 0  # Every key inserted up to this time is in the filter
+        self.last_sync = time.time()
+        if bloom_file and self.bloom.load(bloom_file) and self.bloom.watermark is not None:
+            # Pick up marks made after the filter was saved (crash, other scrapers)
+            self.synced_through = self.bloom.watermark
+            added = self.sync_bloom()
+            if added:
+                print(f"🌸 Bloom filter re-synced {added} recent keys from the store")
+        else:
+            self.warm_bloom()
+
+    def init_database(self):
+        """Create the keyed table and insert-time index"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sent_items (
+                    item_key TEXT PRIMARY KEY,
+                    inserted_at REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_sent_items_inserted_at ON sent_items (inserted_at)')
+            self.conn.commit()
+
+    def import_legacy_file(self, legacy_file):
+        """One-time import of sent_items.txt, converted to canonical keys (renamed afterwards)"""
+        if not os.path.exists(legacy_file):
+            return
+
+        try:
+            now = time.time()
+            with open(legacy_file, 'r') as f:
+                legacy_keys = [line.strip() for line in f if line.strip()]
+            keys = {legacy_key_to_canonical(key) for key in legacy_keys} - {None}
+
+            with self.lock:
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO sent_items (item_key, inserted_at) VALUES (?, ?)',
+                    ((key, now) for key in keys)
+                )
+                self.conn.commit()
+
+            try:
+                os.replace(legacy_file, f"{legacy_file}.migrated")
+            except OSError:
+                # Bind-mounted files can't be renamed - empty it instead
+                open(legacy_file, 'w').close()
+            print(f"📦 Imported {len(keys)} of {len(legacy_keys)} entries from {legacy_file}")
+
+        except Exception as e:
+            print(f"⚠️ Could not import {legacy_file}: {e}")
+
+    def warm_bloom(self):
+        """Rebuild the bloom filter from live store entries"""
+        self.synced_through = 0
+        added = self.sync_bloom()
+        if added:
+            print(f"🌸 Bloom filter warmed with {added} keys")
+
+    def sync_bloom(self):
+        """Add keys inserted since the last sync to the filter; returns the number read"""
+        with self.lock:
+            since = max(time.time() - self.ttl, self.synced_through)
+            rows = self.conn.execute(
+                'SELECT item_key, inserted_at FROM sent_items WHERE inserted_at > ?',
+                (since,)
+            ).fetchall()
+            for key, inserted_at in rows:
+                self.bloom.add(key)
+                self.synced_through = max(self.synced_through, inserted_at)
+            self.last_sync = time.time()
+        return len(rows)
+
+    def seen(self, key):
+        """True if key was marked within the TTL window"""
+        if time.time() - self.last_sync >= DEDUP_SYNC_INTERVAL:
+            # Periodic catch-up with marks from other scrapers
+            self.sync_bloom()
+        if not self.bloom.might_contain(key):
+            return False
+
+        # Possible hit - verify against the store
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM sent_items WHERE item_key = ? AND inserted_at > ?',
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        return row is not None
+
+    def mark(self, key):
+        """Record key as sent (refreshes its insert time)"""
+        self.mark_many([key])
+
+    def mark_many(self, keys):
+        """Record a group of keys in a single transaction"""
+        if not keys:
+            return
+        for key in keys:
+            self.bloom.add(key)
+        with self.lock:
+            # Take the write lock before stamping, so insert times across scrapers
+            # follow commit order and sync_bloom() never passes an uncommitted mark
+            self.conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO sent_items (item_key, inserted_at) VALUES (?, ?)',
+                ((key, now) for key in keys)
+            )
+            self.conn.commit()
+
+    def count(self):
+        """Number of stored keys (including not yet expired ones)"""
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM sent_items').fetchone()[0]
+
+    def expire(self):
+        """Delete entries older than the TTL"""
+        with self.lock:
+            cursor = self.conn.execute(
+                'DELETE FROM sent_items WHERE inserted_at <= ?',
+                (time.time() - self.ttl,)
+            )
+            self.conn.commit()
+            removed = cursor.rowcount
+        self.removed_since_vacuum += removed
+        return removed
+
+    def compact(self):
+        """Expire old entries and reclaim space"""
+        try:
+            removed = self.expire()
+            with self.lock:
+                self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                if self.removed_since_vacuum >= VACUUM_THRESHOLD:
+                    self.conn.execute('VACUUM')
+                    self.removed_since_vacuum = 0
+            if removed:
+                print(f"🧹 Dedup store expired {removed} entries")
+        except Exception as e:
+            print(f"⚠️ Dedup compaction failed: {e}")
+
+    def start_compaction(self, interval=DEDUP_COMPACT_INTERVAL):
+        """Run compaction periodically in a background thread"""
+        if self.compactor and self.compactor.is_alive():
+            return
+
+        def compact_loop():
+            while not self.stop_event.wait(interval):
+                self.compact()
+
+        self.compactor = threading.Thread(target=compact_loop, daemon=True)
+        self.compactor.start()
+
+    def close(self):
+        """Stop compaction, save the bloom filter and close the database"""
+        self.stop_event.set()
+        if self.compactor:
+            self.compactor.join(timeout=5)
+        if self.bloom_file:
+            self.sync_bloom()  # Saved watermark covers everything up to now
+            self.bloom.save(self.bloom_file, watermark=self.synced_through)
+        with self.lock:
+            self.conn.close()
@@ -10,8 +10,9 @@ from bs4 import BeautifulSoup
 from datetime import datetime
 
 class SylectusLoadParser:
-    def __init__(self):
+    def __init__(self, company_index=None):
         self.debug_mode = True
+        self.company_index = company_index
         
     def parse_load_row_comprehensive(self, row_element):
         """Extract absolutely everything from a load row"""
@@ -162,18 +163,41 @@ class SylectusLoadParser:
                         print(f"✅ Profile URL found (fallback): {profile_url}")
                         return
     
+    def parse_company_header(self, first_cell):
+        """Parse company name and payment terms from the company cell text"""
+        header = {}
+        
+        # Company name is usually before "Days to Pay"
+        if 'Days to Pay' in first_cell:
+            company = first_cell.split('Days to Pay')[0].strip()
+            company = company.replace('\xa0', ' ').strip()
+            if company:
+                header['company'] = company
+        
+        credit_match = re.search(r'Credit\s*Score[:\s]*(\d+)%?', first_cell, re.IGNORECASE)
+        if credit_match:
+            header['credit_score'] = f"{credit_match.group(1)}%"
+        
+        days_match = re.search(r'Days\s*to\s*Pay[:\s]*(\d+)', first_cell, re.IGNORECASE)
+        if days_match:
+            header['days_to_pay'] = f"{days_match.group(1)} days"
+        
+        return header
+    
     def _parse_company_info(self, load_data):
         """Extract company information"""
         if load_data['all_cells']:
             first_cell = load_data['all_cells'][0]['text']
             
-            # Company name is usually before "Days to Pay"
-            if 'Days to Pay' in first_cell:
-                company = first_cell.split('Days to Pay')[0].strip()
-                company = company.replace('\xa0', ' ').strip()
-                if company:
-                    load_data['company'] = company
-                    print(f"✅ Company extracted: {company}")
+            # Same broker header repeats across rows - let the company index parse it once
+            if self.company_index is not None:
+                header = self.company_index.resolve_header(first_cell, self.parse_company_header)
+            else:
+                header = self.parse_company_header(first_cell)
+            
+            load_data.update(header)
+            if 'company' in header:
+                print(f"✅ Company extracted: {header['company']}")
     
     def _parse_load_details(self, load_data):
         """Extract load ID, miles, weight, etc."""
@@ -299,16 +323,19 @@ class SylectusLoadParser:
     
     def _parse_payment_info(self, load_data):
         """Extract credit score, payment terms"""
+        if load_data['credit_score'] != 'Unknown' and load_data['days_to_pay'] != 'Unknown':
+            return  # Already taken from the company header
+        
         full_text = ' '.join([cell['text'] for cell in load_data['all_cells']])
         
         # Credit score
         credit_match = re.search(r'Credit\s*Score[:\s]*(\d+)%?', full_text, re.IGNORECASE)
-        if credit_match:
+        if credit_match and load_data['credit_score'] == 'Unknown':
             load_data['credit_score'] = f"{credit_match.group(1)}%"
         
         # Days to pay
         days_match = re.search(r'Days\s*to\s*Pay[:\s]*(\d+)', full_text, re.IGNORECASE)
-        if days_match:
+        if days_match and load_data['days_to_pay'] == 'Unknown':
             load_data['days_to_pay'] = f"{days_match.group(1)} days"
     
     def _extract_hidden_contact_info(self, load_data):
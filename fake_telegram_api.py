@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Local Fake Telegram Bot API
+A small stand-in for api.telegram.org for offline testing. It records every
+message, enforces Telegram-like global and per-chat rate limits (answering
+429 with retry_after), can inject latency and random flood errors, and
+supports sendMessage, editMessageText, editMessageReplyMarkup, deleteMessage,
+answerCallbackQuery and getUpdates.
+
+Usage:
+    python3 fake_telegram_api.py --port 8081 --latency 50
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 python3 api_scraper.py
+
+    # Load-test the outbox (and digest coalescing) against the fake server
+    python3 fake_telegram_api.py --bench 300 --chats 5
+    python3 fake_telegram_api.py --bench 300 --chats 5 --digest
+
+    # Simulate a button press
+    curl -X POST localhost:8081/inject -d '{"chat_id": 1, "callback_data": "stop_loads"}'
+"""
+
+import os
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from telegram_outbox import TokenBucket
+
+FAKE_TELEGRAM_PORT = 8081
+
+class FakeTelegramState:
+    """Messages, pending updates and rate limits of the fake bot"""
+
+    def __init__(self, global_rate=30, chat_rate=1, chat_burst=3, flood_probability=0.0,
+                 retry_after=5, record_file=None):
+        self.lock = threading.Lock()
+        self.updates_ready = threading.Condition(self.lock)
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets = {}
+        self.flood_probability = flood_probability
+        self.retry_after = retry_after
+        self.record_file = record_file
+
+        self.messages = {}  # (chat_id, message_id) -> message
+        self.next_message_id = 1
+        self.updates = []
+        self.next_update_id = 1
+        self.counts = {}
+        self.first_send = None
+        self.last_send = None
+
+    def count(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def check_rate(self, chat_id):
+        """Seconds the caller must wait (0 if the send is allowed)"""
+        if self.flood_probability and random.random() < self.flood_probability:
+            return self.retry_after
+
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self.chat_buckets[chat_id] = bucket
+
+        wait = max(bucket.wait_time(), self.global_bucket.wait_time())
+        if wait > 0:
+            return max(1, math.ceil(wait))
+        bucket.consume()
+        self.global_bucket.consume()
+        return 0
+
+    def record(self, method, params):
+        if self.record_file:
+            with open(self.record_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'time': time.time(), 'method': method, 'params': params}) + '\n')
+
+    def send_message(self, params):
+        chat_id = str(params.get('chat_id'))
+        text = params.get('text', '')
+        if not chat_id or not text:
+            return 400, "Bad Request: message text is empty", None
+        if len(text) > 4096:
+            return 400, "Bad Request: message is too long", None
+
+        with self.lock:
+            wait = self.check_rate(chat_id)
+            if wait:
+                self.count('rate_limited')
+                return 429, f"Too Many Requests: retry after {wait}", {'retry_after': wait}
+
+            message = {
+                'message_id': self.next_message_id,
+                'chat': {'id': chat_id},
+                'date': int(time.time()),
+                'text': text
+            }
+            if params.get('reply_markup'):
+                message['reply_markup'] = json.loads(params['reply_markup'])
+            self.messages[(chat_id, self.next_message_id)] = message
+            self.next_message_id += 1
+            self.count('sendMessage')
+
+            now = time.time()
+            self.first_send = self.first_send or now
+            self.last_send = now
+        return 200, None, message
+
+    def edit_message(self, params, field):
+        key = (str(params.get('chat_id')), int(params.get('message_id', 0)))
+        with self.lock:
+            message = self.messages.get(key)
+            if message is None:
+                return 400, "Bad Request: message to edit not found", None
+            if field == 'text':
+                message['text'] = params.get('text', '')
+                message['edited'] = True
+                # Like Telegram: an edit without reply_markup removes the inline keyboard
+                if params.get('reply_markup'):
+                    message['reply_markup'] = json.loads(params['reply_markup'])
+                else:
+                    message.pop('reply_markup', None)
+            else:
+                message['reply_markup'] = json.loads(params.get('reply_markup') or '{}')
+            self.count('edit')
+        return 200, None, message
+
+    def delete_message(self, params):
+        key = (str(params.get('chat_id')), int(params.get('message_id', 0)))
+        with self.lock:
+            if self.messages.pop(key, None) is None:
+                return 400, "Bad Request: message to delete not found", None
+            self.count('deleteMessage')
+        return 200, None, True
+
+    def push_update(self, update):
+        with self.updates_ready:
+            update['update_id'] = self.next_update_id
+            self.next_update_id += 1
+            self.updates.append(update)
+            self.updates_ready.notify_all()
+        return update
+
+    def get_updates(self, params):
+        offset = int(params.get('offset', 0) or 0)
+        timeout = min(float(params.get('timeout', 0) or 0), 50)
+        deadline = time.time() + timeout
+        with self.updates_ready:
+            # Updates below the offset are confirmed and forgotten
+            self.updates = [u for u in self.updates if u['update_id'] >= offset]
+            while not self.updates and time.time() < deadline:
+                self.updates_ready.wait(deadline - time.time())
+            return 200, None, list(self.updates)
+
+    def stats(self):
+        with self.lock:
+            sent = self.counts.get('sendMessage', 0)
+            elapsed = (self.last_send - self.first_send) if sent > 1 else 0
+            return dict(self.counts, messages_per_second=round(sent / elapsed, 2) if elapsed else None)
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """Routes /bot<token>/<method> plus /stats and /inject"""
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def _params(self):
+        parsed = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8')
+            if 'json' in (self.headers.get('Content-Type') or '') or body.startswith('{'):
+                params.update(json.loads(body))
+            else:
+                params.update({k: v[-1] for k, v in parse_qs(body).items()})
+        return parsed.path, params
+
+    def _reply(self, status, description=None, result=None, parameters=None):
+        if status == 200:
+            body = {'ok': True, 'result': result}
+        else:
+            body = {'ok': False, 'error_code': status, 'description': description}
+            if parameters:
+                body['parameters'] = parameters
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def handle_request(self):
+        state = self.server.state
+        path, params = self._params()
+
+        if path == '/stats':
+            return self._reply(200, result=state.stats())
+        if path == '/inject':
+            update = {'callback_query': {
+                'id': str(random.randint(1, 10 ** 9)),
+                'data': params.get('callback_data', ''),
+                'from': {'id': params.get('user_id', 1), 'username': params.get('username', 'tester')},
+                'message': {'message_id': params.get('message_id'), 'chat': {'id': params.get('chat_id')}}
+            }} if 'callback_data' in params else params
+            return self._reply(200, result=state.push_update(update))
+
+        parts = path.strip('/').split('/')
+        if len(parts) != 2 or not parts[0].startswith('bot'):
+            return self._reply(404, "Not Found")
+        method = parts[1]
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        state.record(method, params)
+
+        if method == 'sendMessage':
+            status, description, result = state.send_message(params)
+            parameters = result if status == 429 else None
+            return self._reply(status, description, None if parameters else result, parameters)
+        if method == 'editMessageText':
+            return self._reply(*state.edit_message(params, 'text'))
+        if method == 'editMessageReplyMarkup':
+            return self._reply(*state.edit_message(params, 'reply_markup'))
+        if method == 'deleteMessage':
+            return self._reply(*state.delete_message(params))
+        if method == 'getUpdates':
+            return self._reply(*state.get_updates(params))
+        if method == 'answerCallbackQuery':
+            state.count('answerCallbackQuery')
+            return self._reply(200, result=True)
+        if method == 'getMe':
+            return self._reply(200, result={'id': 1, 'is_bot': True, 'username': 'fake_bot'})
+        return self._reply(404, f"Not Found: method {method}")
+
+def start_server(port=FAKE_TELEGRAM_PORT, latency_ms=0, **state_options):
+    """Start the fake API in a background thread; returns the server (server.base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeTelegramHandler)
+    server.daemon_threads = True
+    server.state = FakeTelegramState(**state_options)
+    server.latency = latency_ms / 1000
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def synthetic_load(i):
+    states = ['TX', 'GA', 'OH', 'IL', 'CA', 'FL']
+    return {
+        'load_id': str(100000 + i), 'company': f'BROKER {i % 17}',
+        'pickup_city': f'CITY {i % 11}', 'pickup_state': states[i % len(states)],
+        'delivery_city': f'CITY {i % 7}', 'delivery_state': states[(i * 7) % len(states)],
+        'pickup_date': '12/01', 'miles': str(100 + i % 900), 'vehicle_type': 'SPRINTER'
+    }
+
+def run_bench(count, chats, latency_ms, digest, global_rate, chat_rate, chat_burst, flood_probability):
+    """Push `count` alerts through TelegramOutbox against the fake server"""
+    from telegram_outbox import TelegramOutbox
+    from alert_digest import AlertDigest
+
+    server = start_server(0, latency_ms, global_rate=global_rate, chat_rate=chat_rate,
+                          chat_burst=chat_burst, flood_probability=flood_probability, retry_after=1)
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_outbox.db')
+    outbox = TelegramOutbox(db_path=db_path, bot_token='bench', default_chat_id='1', api_base=server.base_url)
+
+    loads = [(synthetic_load(i), f"{i:016x}") for i in range(count)]
+    messages = []
+    for chat in range(chats):
+        chat_id = str(1000 + chat)
+        if digest:
+            for text, keyboard, _ in AlertDigest().build(loads, f"🚨 **{count} NEW LOADS FOUND**"):
+                messages.append((text, chat_id, keyboard))
+        else:
+            for load_info, _ in loads:
+                messages.append((f"🆕 Load {load_info['load_id']} {load_info['pickup_state']} → {load_info['delivery_state']}", chat_id, None))
+
+    start_time = time.time()
+    for text, chat_id, keyboard in messages:
+        outbox.enqueue(text, chat_id=chat_id, reply_markup=keyboard)
+    enqueue_time = time.time() - start_time
+
+    outbox.start()
+    while outbox.pending_count():
+        time.sleep(0.05)
+    elapsed = time.time() - start_time
+    outbox.stop(drain_timeout=0)
+    server.shutdown()
+
+    stats = server.state.stats()
+    print(f"📊 {count} alerts x {chats} chats -> {len(messages)} messages ({'digest' if digest else 'one per load'})")
+    print(f"   Enqueue: {enqueue_time:.2f}s ({len(messages) / max(enqueue_time, 1e-9):.0f} msg/s)")
+    print(f"   Delivered {stats.get('sendMessage', 0)} in {elapsed:.2f}s ({stats.get('sendMessage', 0) / elapsed:.1f} msg/s)")
+    print(f"   429 responses: {stats.get('rate_limited', 0)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local fake Telegram Bot API')
+    parser.add_argument('--port', type=int, default=FAKE_TELEGRAM_PORT)
+    parser.add_argument('--latency', type=float, default=0, help='Added latency per call (ms)')
+    parser.add_argument('--global-rate', type=float, default=30, help='Bot-wide sends per second')
+    parser.add_argument('--chat-rate', type=float, default=1, help='Sends per second per chat')
+    parser.add_argument('--chat-burst', type=int, default=3)
+    parser.add_argument('--flood-probability', type=float, default=0.0, help='Chance of a random 429')
+    parser.add_argument('--retry-after', type=int, default=5)
+    parser.add_argument('--record', help='Append every call to this JSONL file')
+    parser.add_argument('--bench', type=int, help='Run an outbox load test with this many alerts')
+    parser.add_argument('--chats', type=int, default=1)
+    parser.add_argument('--digest', action='store_true', help='Coalesce bench alerts into digests')
+    args = parser.parse_args()
+
+    if args.bench:
+        run_bench(args.bench, args.chats, args.latency, args.digest, args.global_rate,
+                  args.chat_rate, args.chat_burst, args.flood_probability)
+        return
+
+    server = start_server(args.port, args.latency, global_rate=args.global_rate, chat_rate=args.chat_rate,
+                          chat_burst=args.chat_burst, flood_probability=args.flood_probability,
+                          retry_after=args.retry_after, record_file=args.record)
+    print(f"🧪 Fake Telegram API on {server.base_url} (set TELEGRAM_API_BASE to use it)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n📊 {json.dumps(server.state.stats())}")
+
+if __name__ == "__main__":
+    main()
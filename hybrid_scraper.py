@@ -13,6 +13,13 @@ import json
 from datetime import datetime
 from dotenv import load_dotenv
 from mcp_firecrawl_client import FirecrawlMCPClient
+from dedup_store import DedupStore
+from load_keys import canonical_load_key
+from state_writer import StateWriter
+from telegram_outbox import TelegramOutbox
+from subscribers import SubscriberRegistry
+from telegram_interactions import TelegramInteractions, load_keyboard
+from message_templates import render, load_fields
 
 # Load environment variables
 load_dotenv()
@@ -31,46 +38,16 @@ class HybridSylectusScraper:
     def __init__(self):
         self.session_cookies = None
         self.load_board_url = None
-        self.sent_items = self.load_sent_items()
+        self.dedup = DedupStore()
+        self.state = StateWriter(self.dedup)
         self.firecrawl_client = FirecrawlMCPClient()
+        self.outbox = TelegramOutbox()
+        self.subscribers = SubscriberRegistry()
+        self.interactions = TelegramInteractions(self.outbox, self.dedup)
         
-    def load_sent_items(self):
-        """Load previously sent items"""
-        try:
-            with open('sent_items.txt', 'r') as f:
-                return set(line.strip() for line in f.readlines())
-        except FileNotFoundError:
-            return set()
-    
-    def save_sent_item(self, item_id):
-        """Save item ID to prevent duplicates"""
-        with open('sent_items.txt', 'a') as f:
-            f.write(f"{item_id}\n")
-    
     def send_to_telegram(self, message_text, keyboard=None):
-        """Send message to Telegram"""
-        try:
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-            data = {
-                'chat_id': TELEGRAM_CHAT_ID,
-                'text': message_text,
-                'parse_mode': 'Markdown'
-            }
-            
-            if keyboard:
-                data['reply_markup'] = json.dumps(keyboard)
-            
-            response = requests.post(url, data=data, timeout=10)
-            
-            if response.status_code == 200:
-                print("✅ Message sent successfully to Telegram")
-                return True
-            else:
-                print(f"❌ Failed to send message. Status code: {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"❌ Error sending message: {e}")
-            return False
+        """Queue message for the outbox sender (persisted, rate limited, retried)"""
+        return self.outbox.enqueue(message_text, reply_markup=keyboard) is not None
     
     def perform_login_and_setup(self):
         """Use existing successful Playwright login to get to load board"""
@@ -318,71 +295,38 @@ class HybridSylectusScraper:
     def process_new_loads(self, loads):
         """Process and send notifications for new loads"""
         new_loads_count = 0
+        self.subscribers.refresh()
         
         for load_data in loads:
             try:
                 # Create unique identifier
-                load_id = f"{load_data['company']}_{load_data['load_id']}_{load_data['pickup_city']}_{load_data['delivery_city']}"
+                load_id = canonical_load_key(load_data)
                 
                 # Check if already sent
-                if load_id in self.sent_items:
+                if self.state.seen(load_id):
                     continue
                 
                 print(f"🆕 NEW LOAD: {load_data['company']} - Load {load_data['load_id']}")
                 
-                # Calculate recommended rate
-                try:
-                    recommended_rate = int(load_data['miles']) * 0.75 if load_data['miles'].isdigit() else 0
-                    rate_text = f"{recommended_rate:.0f}$" if recommended_rate > 0 else "N/A"
-                except:
-                    rate_text = "N/A"
-                
                 # Format message
-                message = f"""**Pick-up at:** {load_data['pickup_city']}
-**Pick-up date:** {load_data['pickup_date']} (Scheduled)
-
-**Deliver to:** {load_data['delivery_city']}
-**Delivery date:** {load_data['delivery_date']} (Scheduled)
-
-**Miles:** {load_data['miles']}
-**Pieces:** {load_data['pieces']}
-**Weight:** {load_data['weight']}
-**Suggested Truck Size:** {load_data['vehicle_type'].lower()}
-
-**Driver:** {load_data['company']}
-**Load-N:** {load_data['load_id']}
-**Email:** {load_data['email']}
-
-**Recommended Rate:** {rate_text}
-
-⏰ **Found:** {datetime.now().strftime('%I:%M %p')}"""
-                
-                # Create keyboard
-                keyboard = {
-                    'inline_keyboard': [
-                        [
-                            {'text': 'BID', 'callback_data': f'bid_{load_data["load_id"]}'},
-                            {'text': 'SKIP', 'callback_data': f'skip_{load_data["load_id"]}'}
-                        ],
-                        [
-                            {'text': 'Stop Loads', 'callback_data': 'stop_loads'},
-                            {'text': 'Contact Dispatcher', 'url': f'mailto:{load_data["email"]}'}
-                        ]
-                    ]
-                }
+                message = render('compact', load_fields(load_data, found_time=datetime.now().strftime('%I:%M %p')))
                 
-                # Send notification
-                if self.send_to_telegram(message, keyboard):
-                    self.save_sent_item(load_id)
-                    self.sent_items.add(load_id)
-                    new_loads_count += 1
+                # Create keyboard (buttons are handled by the interaction service)
+                keyboard = load_keyboard(load_id, load_data.get('email'))
+                self.interactions.remember(load_id, load_data)
                 
-                time.sleep(1)  # Rate limiting
+                # Send notification to every matching subscriber that has not paused alerts
+                chat_ids = self.interactions.active_chats(self.subscribers.match(load_data))
+                if not chat_ids or self.outbox.enqueue_fanout(message, chat_ids, reply_markup=keyboard):
+                    self.state.mark_sent(load_id)
+                    new_loads_count += 1
                 
             except Exception as e:
                 print(f"❌ Error processing load: {e}")
                 continue
         
+        # One group commit for the whole cycle
+        self.state.commit()
         return new_loads_count
     
     def run_monitoring_cycle(self):
@@ -415,6 +359,9 @@ def main():
     scraper = HybridSylectusScraper()
     
     print("🚀 Starting Hybrid Sylectus Scraper...")
+    scraper.outbox.start()
+    scraper.dedup.start_compaction()
+    scraper.interactions.start()
     scraper.send_to_telegram("🚀 **Hybrid Scraper Started**\n\nUsing Playwright + Firecrawl approach...")
     
     try:
@@ -439,6 +386,11 @@ def main():
     except Exception as e:
         print(f"❌ Critical error: {e}")
         scraper.send_to_telegram(f"❌ **Hybrid Scraper Error**\n\n{str(e)}")
+    finally:
+        scraper.interactions.stop()
+        scraper.state.close()
+        scraper.dedup.close()
+        scraper.outbox.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Background I/O Writer
+A single thread that owns artifact persistence (raw captures, debug pages,
+archived load details, history and snapshot files). The polling thread hands
+it a callable and moves on, so a slow disk delays the writes, not the
+alerts. The queue is bounded: when the disk falls far enough behind,
+submit() blocks the producer instead of letting memory grow. Tasks run in
+submission order, and close() drains the queue before returning.
+"""
+
+import os
+import time
+import queue
+import threading
+
+IO_QUEUE_SIZE = int(os.getenv('IO_QUEUE_SIZE', 256))
+IO_SLOW_WRITE_SECONDS = 2.0  # Tasks slower than this are reported
+
+class BackgroundWriter:
+    """Bounded FIFO of write tasks executed on one thread"""
+
+    def __init__(self, max_queue=IO_QUEUE_SIZE, name='io-writer'):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.name = name
+        self.thread = None
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.blocked_seconds = 0.0
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+
+    def submit(self, task, *args, label=None, block=True, **kwargs):
+        """Queue task(*args, **kwargs); blocks while the queue is full unless block=False (returns False if dropped)"""
+        self.start()
+        item = (task, args, kwargs, label or getattr(task, '__name__', 'write'))
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            if not block:
+                return False
+
+        # Backpressure: wait for the disk to catch up
+        start_time = time.time()
+        self.queue.put(item)
+        waited = time.time() - start_time
+        self.blocked_seconds += waited
+        if waited >= 0.5:
+            print(f"⏳ I/O writer backlog - waited {waited:.1f}s to queue {item[3]}")
+        return True
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                task, args, kwargs, label = item
+                start_time = time.time()
+                task(*args, **kwargs)
+                self.completed += 1
+                elapsed = time.time() - start_time
+                if elapsed > IO_SLOW_WRITE_SECONDS:
+                    print(f"🐢 Slow write: {label} took {elapsed:.1f}s")
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Background write failed ({item[3]}): {e}")
+            finally:
+                self.queue.task_done()
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def flush(self):
+        """Wait until every queued task has run"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def close(self):
+        """Flush and stop the thread"""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join()
+        if self.failed:
+            print(f"⚠️ I/O writer finished with {self.failed} failed writes")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Load Analytics
+Compacts the load history database into Parquet files partitioned by the
+day a load was first seen, and computes lane statistics on whole columns
+with pandas/NumPy: loads per lane, miles percentiles, posting-hour
+histogram and broker mix. Month-scale questions read a few columnar files
+instead of looping over per-load dicts.
+
+Requires the optional packages pandas, numpy and pyarrow.
+
+Usage:
+    python3 load_analytics.py export [--full]   # run periodically (e.g. hourly from cron)
+    python3 load_analytics.py stats [days]      # lane report, default last 30 days
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import sqlite3
+from datetime import datetime, timedelta
+from load_history import LOAD_HISTORY_DB_FILE
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+LOAD_PARQUET_DIR = os.getenv('LOAD_PARQUET_DIR', 'load_parquet')
+EXPORT_STATE_FILE = '_export_state.json'
+LANE = ['pickup_state', 'delivery_state']
+
+HISTORY_QUERY = '''
+    SELECT l.*, c.name AS company_name FROM loads l JOIN companies c ON c.id = l.company
+    WHERE l.first_seen >= ? AND l.first_seen < ?
+'''
+
+def _require(*modules):
+    missing = [name for name, module in modules if module is None]
+    if missing:
+        print(f"❌ Missing optional packages: {', '.join(missing)} (pip install {' '.join(missing)})")
+        return False
+    return True
+
+def _day_bounds(day):
+    start = datetime.strptime(day, '%Y-%m-%d')
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+def export_parquet(history_db=LOAD_HISTORY_DB_FILE, directory=LOAD_PARQUET_DIR, full=False):
+    """Rewrite the day partitions touched since the last export; returns the number of days written"""
+    if not _require(('pandas', pd), ('pyarrow', pyarrow)):
+        return 0
+    os.makedirs(directory, exist_ok=True)
+    state_path = os.path.join(directory, EXPORT_STATE_FILE)
+    since = 0
+    if not full and os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            since = json.load(f).get('exported_through', 0)
+
+    started = time.time()
+    conn = sqlite3.connect(history_db)
+    days = [row[0] for row in conn.execute(
+        "SELECT DISTINCT date(first_seen, 'unixepoch', 'localtime') FROM loads WHERE last_seen > ?", (since,)
+    )]
+
+    for day in sorted(days):
+        frame = pd.read_sql_query(HISTORY_QUERY, conn, params=_day_bounds(day))
+        partition = os.path.join(directory, f"day={day}")
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, 'loads.parquet')
+        tmp_path = f"{path}.tmp"
+        frame.to_parquet(tmp_path, engine='pyarrow', compression='zstd', index=False)
+        os.replace(tmp_path, path)
+    conn.close()
+
+    tmp_state = f"{state_path}.tmp"
+    with open(tmp_state, 'w') as f:
+        json.dump({'exported_through': started}, f)
+    os.replace(tmp_state, state_path)
+
+    print(f"🗂️ Exported {len(days)} day partitions to {directory}")
+    return len(days)
+
+def load_frame(days=30, directory=LOAD_PARQUET_DIR, history_db=LOAD_HISTORY_DB_FILE):
+    """Loads first seen in the last N days, from Parquet partitions (or the history DB if not exported)"""
+    cutoff = time.time() - days * 86400
+    first_day = datetime.fromtimestamp(cutoff).strftime('%Y-%m-%d')
+    files = [path for path in sorted(glob.glob(os.path.join(directory, 'day=*', 'loads.parquet')))
+             if os.path.basename(os.path.dirname(path))[4:] >= first_day]
+
+    if files and pyarrow is not None:
+        frame = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+        return frame[frame['first_seen'] >= cutoff]
+
+    conn = sqlite3.connect(history_db)
+    frame = pd.read_sql_query(HISTORY_QUERY, conn, params=(cutoff, time.time() + 1))
+    conn.close()
+    return frame
+
+def lane_counts(frame, top=20):
+    """Loads per (origin, destination), busiest first"""
+    return frame.groupby(LANE).size().sort_values(ascending=False).head(top)
+
+def miles_distribution(frame, min_loads=5):
+    """p10/p50/p90 miles and load count per lane"""
+    miles = frame.dropna(subset=['miles']).groupby(LANE)['miles']
+    stats = miles.quantile([0.1, 0.5, 0.9]).unstack()
+    stats.columns = ['p10', 'p50', 'p90']
+    stats['loads'] = miles.size()
+    return stats[stats['loads'] >= min_loads].sort_values('loads', ascending=False)
+
+def posting_hours(frame):
+    """24-bucket histogram of the local hour loads first appeared"""
+    local_zone = datetime.now().astimezone().tzinfo
+    hours = pd.to_datetime(frame['first_seen'], unit='s', utc=True).dt.tz_convert(local_zone).dt.hour
+    return np.bincount(hours.to_numpy(), minlength=24)
+
+def broker_mix(frame, top=15):
+    """Share of loads per broker"""
+    return frame['company_name'].value_counts(normalize=True).head(top)
+
+def print_stats(days=30):
+    if not _require(('pandas', pd), ('numpy', np)):
+        return
+    frame = load_frame(days)
+    print(f"📊 {len(frame)} loads in the last {days:g} days")
+    if frame.empty:
+        return
+
+    print("\n🛣️ Busiest lanes")
+    for (origin, destination), count in lane_counts(frame).items():
+        print(f"   {origin or '?'}→{destination or '?'}: {count}")
+
+    print("\n📏 Miles by lane (p10 / p50 / p90)")
+    for (origin, destination), row in miles_distribution(frame).head(15).iterrows():
+        print(f"   {origin or '?'}→{destination or '?'}: {row['p10']:.0f} / {row['p50']:.0f} / {row['p90']:.0f}  (n={row['loads']:.0f})")
+
+    print("\n🕐 Posting hour")
+    histogram = posting_hours(frame)
+    peak = histogram.max() or 1
+    for hour, count in enumerate(histogram):
+        print(f"   {hour:02d}:00 {'█' * int(30 * count / peak)} {count}")
+
+    print("\n🏢 Broker mix")
+    for broker, share in broker_mix(frame).items():
+        print(f"   {broker:<35} {share:6.1%}")
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'export':
+        export_parquet(full='--full' in sys.argv)
+    elif command == 'stats':
+        print_stats(float(sys.argv[2]) if len(sys.argv) > 2 else 30)
+    else:
+        print(__doc__)
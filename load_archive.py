@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Compressed Load Archive
+Alerted load records are appended as compact NDJSON to compressed segments
+(gzip, or zstd when the zstandard package is installed) that rotate by size
+or age. Each batch is written as one independent compressed member, and a
+sidecar SQLite index maps load_id -> (segment, offset, length), so a single
+load is read back with one seek and one small decompress.
+
+Usage:
+    python3 load_archive.py <load_id>          # print an archived load
+    python3 load_archive.py --import-legacy    # archive and remove load_details_*.json files
+"""
+
+import io
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOAD_ARCHIVE_DIR = os.getenv('LOAD_ARCHIVE_DIR', 'load_archive')
+ARCHIVE_COMPRESSION = os.getenv('ARCHIVE_COMPRESSION', 'gzip')  # 'gzip' or 'zstd'
+ARCHIVE_SEGMENT_BYTES = int(os.getenv('ARCHIVE_SEGMENT_BYTES', 32 * 1024 * 1024))
+ARCHIVE_SEGMENT_SECONDS = int(os.getenv('ARCHIVE_SEGMENT_SECONDS', 86400))
+SEGMENT_EXTENSIONS = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+
+def compress(data, compression):
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def decompress(data, segment):
+    if segment.endswith(SEGMENT_EXTENSIONS['zstd']):
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+class LoadArchive:
+    """Append-only rotating NDJSON archive with a load_id index (opened on first use)"""
+
+    def __init__(self, directory=LOAD_ARCHIVE_DIR, compression=ARCHIVE_COMPRESSION,
+                 segment_bytes=ARCHIVE_SEGMENT_BYTES, segment_seconds=ARCHIVE_SEGMENT_SECONDS):
+        if compression == 'zstd' and zstandard is None:
+            print("⚠️ zstandard not installed - archiving with gzip")
+            compression = 'gzip'
+        self.directory = directory
+        self.compression = compression
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.lock = threading.Lock()
+        self.conn = None
+        self.segment = None
+        self.segment_started = None
+
+    def _open(self):
+        if self.conn is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(self.directory, 'index.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive_index (
+                load_id TEXT PRIMARY KEY,
+                segment TEXT,
+                offset INTEGER,
+                length INTEGER,
+                saved_at TEXT
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+
+        # Keep appending to the newest segment if it is still within limits
+        pattern = os.path.join(self.directory, f"loads_*{SEGMENT_EXTENSIONS[self.compression]}")
+        segments = sorted(glob.glob(pattern))
+        if segments:
+            self.segment = os.path.basename(segments[-1])
+            self.segment_started = os.path.getctime(segments[-1])
+
+    def _segment_for_write(self):
+        """Current segment, rotating when it is too big or too old"""
+        now = time.time()
+        path = os.path.join(self.directory, self.segment) if self.segment else None
+        if (path is None or not os.path.exists(path)
+                or os.path.getsize(path) >= self.segment_bytes
+                or now - self.segment_started >= self.segment_seconds):
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            self.segment = f"loads_{stamp}{SEGMENT_EXTENSIONS[self.compression]}"
+            self.segment_started = now
+        return self.segment
+
+    def append_many(self, records):
+        """Append records ({'saved_at', 'load_info'}) as one compressed member; returns count"""
+        if not records:
+            return 0
+        lines = [json.dumps(record, separators=(',', ':')) for record in records]
+        member = compress(('\n'.join(lines) + '\n').encode('utf-8'), self.compression)
+
+        with self.lock:
+            self._open()
+            segment = self._segment_for_write()
+            path = os.path.join(self.directory, segment)
+            with open(path, 'ab') as f:
+                offset = f.tell()
+                f.write(member)
+
+            entries = [
+                (str(record['load_info'].get('load_id')), segment, offset, len(member), record.get('saved_at'))
+                for record in records
+            ]
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO archive_index (load_id, segment, offset, length, saved_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', entries)
+            self.conn.commit()
+        return len(records)
+
+    def get(self, load_id):
+        """Latest archived record for a load_id (None if not archived)"""
+        with self.lock:
+            self._open()
+            row = self.conn.execute(
+                'SELECT segment, offset, length FROM archive_index WHERE load_id = ?', (str(load_id),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        segment, offset, length = row
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            member = f.read(length)
+
+        # A member holds one cycle's batch; the newest matching line wins
+        found = None
+        for line in decompress(member, segment).decode('utf-8').splitlines():
+            record = json.loads(line)
+            if str(record['load_info'].get('load_id')) == str(load_id):
+                found = record
+        return found
+
+    def records(self):
+        """Yield every archived record in write order, oldest segment first (re-archived loads appear once per copy)"""
+        pattern = os.path.join(self.directory, 'loads_*.ndjson.*')
+        for path in sorted(glob.glob(pattern), key=os.path.basename):
+            try:
+                with open(path, 'rb') as raw:
+                    if path.endswith(SEGMENT_EXTENSIONS['zstd']):
+                        stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+                    else:
+                        stream = gzip.GzipFile(fileobj=raw)  # Reads across members
+                    for line in io.TextIOWrapper(stream, encoding='utf-8'):
+                        if line.strip():
+                            yield json.loads(line)
+            except (EOFError, OSError, ValueError) as e:
+                # A member cut short by a crash ends the segment
+                print(f"⚠️ Stopped reading {os.path.basename(path)}: {e}")
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+def import_legacy_files(archive, pattern='load_details_*.json'):
+    """Move old one-file-per-load JSON dumps into the archive"""
+    records = []
+    archived_paths = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, 'r') as f:
+                load_info = json.load(f)
+            # load_details_<YYYYmmdd>_<HHMMSS>_<load_id>.json
+            parts = os.path.basename(path).split('_')
+            saved_at = f"{parts[2]}_{parts[3]}" if len(parts) > 4 else None
+            records.append({'saved_at': saved_at, 'load_info': load_info})
+            archived_paths.append(path)
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+
+    for i in range(0, len(records), 500):
+        archive.append_many(records[i:i + 500])
+    for path in archived_paths:
+        os.remove(path)
+    print(f"📦 Archived {len(records)} legacy load detail files")
+    return len(records)
+
+if __name__ == "__main__":
+    archive = LoadArchive()
+    if len(sys.argv) > 1 and sys.argv[1] == '--import-legacy':
+        import_legacy_files(archive)
+    elif len(sys.argv) > 1:
+        record = archive.get(sys.argv[1])
+        print(json.dumps(record, indent=2) if record else f"❌ Load {sys.argv[1]} not in archive")
+    else:
+        print(__doc__)
+    archive.close()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Load History Database
+Every load seen on the board, in an indexed SQLite table (WAL mode) with
+brokers normalized into their own table. Each monitoring cycle is written
+as one batched upsert, and lane, date and broker questions become index
+lookups instead of scans over JSON dumps.
+
+Usage:
+    python3 load_history.py TX GA 7          # TX→GA loads first seen in the last 7 days
+    python3 load_history.py TX→GA            # all TX→GA loads
+    python3 load_history.py '*' GA 1         # anything into GA today
+    python3 load_history.py --lanes 7        # busiest lanes in the last 7 days
+    python3 load_history.py --import         # backfill from the load archive
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from load_keys import canonical_load_key, load_location, normalize_field
+
+LOAD_HISTORY_DB_FILE = os.getenv('LOAD_HISTORY_DB_FILE', 'load_history.db')
+QUERY_LIMIT = 200
+
+LOAD_COLUMNS = ['load_id', 'pickup_city', 'pickup_state', 'pickup_date', 'delivery_city', 'delivery_state',
+                'delivery_date', 'miles', 'pieces', 'weight', 'vehicle_type', 'rate', 'credit_score']
+
+def parse_number(value):
+    """First number in a field like '1,234 mi' (None for placeholders)"""
+    match = re.search(r'-?\d[\d,]*\.?\d*', str(value or ''))
+    return float(match.group(0).replace(',', '')) if match else None
+
+def parse_date(value, now=None):
+    """MM/DD/YYYY or MM/DD (current year) as ISO YYYY-MM-DD; other text is kept as-is"""
+    text = normalize_field(value)
+    for fmt in ('%m/%d/%Y', '%m/%d/%y'):
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    match = re.match(r'^(\d{1,2})/(\d{1,2})$', text)
+    if match:
+        year = (now or datetime.now()).year
+        try:
+            return datetime(year, int(match.group(1)), int(match.group(2))).strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+    return text or None
+
+def history_row(load_info):
+    """Column values for one parsed load dict"""
+    pickup_city, pickup_state = load_location(load_info, 'pickup')
+    delivery_city, delivery_state = load_location(load_info, 'delivery')
+    return {
+        'load_id': normalize_field(load_info.get('load_id')) or None,
+        'pickup_city': pickup_city or None,
+        'pickup_state': pickup_state or None,
+        'pickup_date': parse_date(load_info.get('pickup_date')),
+        'delivery_city': delivery_city or None,
+        'delivery_state': delivery_state or None,
+        'delivery_date': parse_date(load_info.get('delivery_date')),
+        'miles': parse_number(load_info.get('miles')),
+        'pieces': parse_number(load_info.get('pieces')),
+        'weight': parse_number(load_info.get('weight')),
+        'vehicle_type': normalize_field(load_info.get('vehicle_type')) or None,
+        'rate': parse_number(load_info.get('rate')),
+        'credit_score': parse_number(load_info.get('credit_score'))
+    }
+
+class LoadHistory:
+    """Indexed history of every load seen, written once per cycle"""
+
+    def __init__(self, db_path=LOAD_HISTORY_DB_FILE):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.company_ids = {}  # name -> companies.id
+        self.init_database()
+
+    def init_database(self):
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS companies (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE,
+                    company_id TEXT,
+                    contact_email TEXT
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS loads (
+                    load_key TEXT PRIMARY KEY,
+                    load_id TEXT,
+                    company INTEGER REFERENCES companies (id),
+                    pickup_city TEXT,
+                    pickup_state TEXT,
+                    pickup_date TEXT,
+                    delivery_city TEXT,
+                    delivery_state TEXT,
+                    delivery_date TEXT,
+                    miles REAL,
+                    pieces REAL,
+                    weight REAL,
+                    vehicle_type TEXT,
+                    rate REAL,
+                    credit_score REAL,
+                    first_seen REAL,
+                    last_seen REAL,
+                    alerted INTEGER DEFAULT 0
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_loads_lane ON loads (pickup_state, delivery_state)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_loads_pickup_date ON loads (pickup_date)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_loads_company ON loads (company)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_loads_first_seen ON loads (first_seen)')
+            self.conn.commit()
+
+            for company_id, name in cursor.execute('SELECT id, name FROM companies'):
+                self.company_ids[name] = company_id
+
+    def _company_id(self, cursor, load_info):
+        name = normalize_field(load_info.get('company') or load_info.get('broker_name')) or 'UNKNOWN'
+        company_id = self.company_ids.get(name)
+        if company_id is None:
+            email = load_info.get('contact_email') or load_info.get('email')
+            cursor.execute('INSERT OR IGNORE INTO companies (name, company_id, contact_email) VALUES (?, ?, ?)',
+                           (name, load_info.get('company_id'), email if email and '@' in str(email) else None))
+            company_id = cursor.execute('SELECT id FROM companies WHERE name = ?', (name,)).fetchone()[0]
+            self.company_ids[name] = company_id
+        return company_id
+
+    def record_cycle(self, board, alerted=(), now=None):
+        """Upsert one poll's loads (key -> load_info) in a single transaction"""
+        if not board:
+            return 0
+        now = now or time.time()
+        alerted = set(alerted)
+        columns = ', '.join(LOAD_COLUMNS)
+        placeholders = ', '.join('?' for _ in LOAD_COLUMNS)
+        refreshed = ', '.join(f'{column} = excluded.{column}' for column in LOAD_COLUMNS)
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            rows = []
+            for key, load_info in board.items():
+                row = history_row(load_info)
+                rows.append([key, self._company_id(cursor, load_info)] + [row[column] for column in LOAD_COLUMNS] +
+                            [now, now, int(key in alerted)])
+            cursor.executemany(f'''
+                INSERT INTO loads (load_key, company, {columns}, first_seen, last_seen, alerted)
+                VALUES (?, ?, {placeholders}, ?, ?, ?)
+                ON CONFLICT (load_key) DO UPDATE SET
+                    {refreshed}, company = excluded.company,
+                    last_seen = MAX(last_seen, excluded.last_seen),
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    alerted = MAX(alerted, excluded.alerted)
+            ''', rows)
+            self.conn.commit()
+        return len(rows)
+
+    def query(self, origin=None, destination=None, days=None, company=None, pickup_date=None, limit=QUERY_LIMIT):
+        """Loads matching a lane / age / broker / pickup date filter, newest first"""
+        where, params = [], []
+        if origin:
+            where.append('l.pickup_state = ?')
+            params.append(origin.upper())
+        if destination:
+            where.append('l.delivery_state = ?')
+            params.append(destination.upper())
+        if days:
+            where.append('l.first_seen >= ?')
+            params.append(time.time() - days * 86400)
+        if company:
+            where.append('l.company IN (SELECT id FROM companies WHERE name LIKE ?)')
+            params.append(f'%{company.upper()}%')
+        if pickup_date:
+            where.append('l.pickup_date = ?')
+            params.append(pickup_date)
+
+        sql = 'SELECT l.*, c.name AS company_name FROM loads l JOIN companies c ON c.id = l.company'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY l.first_seen DESC LIMIT ?'
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def lane_counts(self, days=7, limit=20):
+        """[(origin, destination, loads)] busiest first"""
+        with self.lock:
+            return [tuple(row) for row in self.conn.execute('''
+                SELECT pickup_state, delivery_state, COUNT(*) AS n FROM loads
+                WHERE first_seen >= ? GROUP BY pickup_state, delivery_state ORDER BY n DESC LIMIT ?
+            ''', (time.time() - days * 86400, limit))]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def import_archive(history):
+    """Backfill history from the compressed load archive (first seen = archive time)"""
+    from load_archive import LoadArchive
+    archive = LoadArchive()
+    board, batch_time, imported = {}, None, 0
+    for record in archive.records():
+        try:
+            saved_at = datetime.strptime(record.get('saved_at') or '', '%Y%m%d_%H%M%S').timestamp()
+        except ValueError:
+            saved_at = None
+        if board and saved_at != batch_time:
+            imported += history.record_cycle(board, alerted=board, now=batch_time)
+            board = {}
+        batch_time = saved_at
+        load_info = record['load_info']
+        board[canonical_load_key(load_info)] = load_info
+    imported += history.record_cycle(board, alerted=board, now=batch_time)
+    archive.close()
+    print(f"📥 Imported {imported} archived loads into load history")
+
+def print_loads(loads):
+    for load in loads:
+        seen = datetime.fromtimestamp(load['first_seen']).strftime('%m/%d %H:%M')
+        miles = f"{load['miles']:.0f} mi" if load['miles'] is not None else '? mi'
+        print(f"{seen}  {load['pickup_city'] or '?'}, {load['pickup_state'] or '?'} → "
+              f"{load['delivery_city'] or '?'}, {load['delivery_state'] or '?'}  {miles:>8}  "
+              f"{load['vehicle_type'] or ''}  {load['company_name']}  #{load['load_id']}")
+
+if __name__ == "__main__":
+    history = LoadHistory()
+    args = sys.argv[1:]
+    if args and args[0] == '--import':
+        import_archive(history)
+    elif args and args[0] == '--lanes':
+        days = float(args[1]) if len(args) > 1 else 7
+        for origin, destination, count in history.lane_counts(days):
+            print(f"   {origin or '?'}→{destination or '?'}: {count}")
+    elif args:
+        # "TX GA 7" or "TX→GA 7"; '*' matches any state
+        if '→' in args[0] or '>' in args[0]:
+            args = re.split(r'→|->|>', args[0]) + args[1:]
+        origin, destination = (args + ['*', '*'])[:2]
+        days = float(args[2]) if len(args) > 2 else None
+        loads = history.query(None if origin == '*' else origin, None if destination == '*' else destination, days)
+        print_loads(loads)
+        print(f"📊 {len(loads)} loads")
+    else:
+        print(__doc__)
+    history.close()
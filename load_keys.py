@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Canonical Load Keys
+Normalizes the fields that identify a load and hashes them to a fixed 64-bit
+key, so every scraper produces the same compact dedup key for the same load
+"""
+
+import re
+import hashlib
+
+LOAD_KEY_BYTES = 8  # 64-bit digest, 16 hex characters
+
+def normalize_field(value):
+    """Uppercase, collapse whitespace, treat placeholders as empty"""
+    if value is None:
+        return ''
+    text = re.sub(r'\s+', ' ', str(value).replace('\xa0', ' ')).strip().upper()
+    return '' if text in ('UNKNOWN', 'N/A', 'NONE') else text
+
+def split_city_state(value):
+    """Split "DALLAS, TX" or "DALLAS, TX 75201" into (city, state)"""
+    text = normalize_field(value)
+    match = re.match(r'^(.*?),\s*([A-Z]{2})(?:\s+\d{5})?$', text)
+    if match:
+        return match.group(1).strip(), match.group(2)
+    return text, ''
+
+def load_location(load_info, prefix):
+    """Normalized (city, state) for 'pickup' or 'delivery'"""
+    city = load_info.get(f'{prefix}_city')
+    state = normalize_field(load_info.get(f'{prefix}_state'))
+    if state:
+        return normalize_field(city), state
+    # Playwright scrapers store "CITY, ST" in the city field
+    return split_city_state(city)
+
+def canonical_key(load_id, pickup_city, pickup_state, delivery_city, delivery_state):
+    """Hash normalized identifying fields to a fixed-size hex key"""
+    fields = [normalize_field(load_id), pickup_city, pickup_state, delivery_city, delivery_state]
+    return hashlib.blake2b('|'.join(fields).encode('utf-8'), digest_size=LOAD_KEY_BYTES).hexdigest()
+
+def canonical_load_key(load_info):
+    """Canonical dedup key for a parsed load dict from any scraper"""
+    pickup_city, pickup_state = load_location(load_info, 'pickup')
+    delivery_city, delivery_state = load_location(load_info, 'delivery')
+    return canonical_key(load_info.get('load_id'), pickup_city, pickup_state, delivery_city, delivery_state)
+
+def legacy_key_to_canonical(legacy_key):
+    """Convert an old sent_items.txt line to its canonical key (None if unrecognized)
+
+    api_scraper:      "{load_id}_{pickup_city}, {pickup_state}_{delivery_city}, {delivery_state}"
+    scraper_complete: "{company}_{load_id}_{pickup_city}_{delivery_city}" (cities as "CITY, ST")
+    """
+    parts = legacy_key.strip().rsplit('_', 3)
+    if len(parts) == 4:
+        _, load_id, pickup, delivery = parts
+    elif len(parts) == 3:
+        load_id, pickup, delivery = parts
+    else:
+        return None
+
+    if not normalize_field(load_id):
+        return None
+
+    pickup_city, pickup_state = split_city_state(pickup)
+    delivery_city, delivery_state = split_city_state(delivery)
+    return canonical_key(load_id, pickup_city, pickup_state, delivery_city, delivery_state)
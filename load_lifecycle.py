@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Load Lifecycle Tracker
+Follows loads across consecutive polls: when each load appeared, changed and
+left the board (usually because it was covered). Only changes touch the
+database, and time-on-board histograms by lane and broker are updated as
+loads leave, so the cost per poll is O(changes) on top of the set diff.
+
+Usage:
+    python3 load_lifecycle.py            # time-on-board report by lane and broker
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+
+LIFECYCLE_DB_FILE = os.getenv('LIFECYCLE_DB_FILE', 'load_lifecycle.db')
+REMOVAL_CONFIRM_POLLS = int(os.getenv('REMOVAL_CONFIRM_POLLS', 2))  # Missing this many polls in a row = removed
+SUSPECT_SHRINK_RATIO = 0.5  # A board that loses more than half its loads at once is treated as a failed poll
+MIN_BOARD_FOR_SHRINK_CHECK = 10
+MAX_POLL_GAP = 900  # Loads that vanished while we were not polling have unknown lifetimes
+
+# Histogram bucket upper edges in minutes
+LIFETIME_BUCKETS = [1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 360, 480, 720, 1440, float('inf')]
+TRACKED_FIELDS = ['pickup_date', 'delivery_date', 'miles', 'pieces', 'weight', 'vehicle_type', 'rate']
+
+def lane_of(load_info):
+    return f"{load_info.get('pickup_state', '?')}→{load_info.get('delivery_state', '?')}"
+
+def fingerprint(load_info):
+    """Short hash of the fields whose change counts as an update"""
+    text = '|'.join(str(load_info.get(field, '')) for field in TRACKED_FIELDS)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+class LifetimeHistogram:
+    """Fixed-bucket histogram of minutes on board"""
+
+    def __init__(self, counts=None, total=0.0):
+        self.counts = counts or [0] * len(LIFETIME_BUCKETS)
+        self.total = total
+
+    def add(self, minutes):
+        for i, edge in enumerate(LIFETIME_BUCKETS):
+            if minutes <= edge:
+                self.counts[i] += 1
+                break
+        self.total += minutes
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, p):
+        """Upper bucket edge containing the p-th percentile"""
+        target = self.count * p / 100
+        running = 0
+        for i, n in enumerate(self.counts):
+            running += n
+            if running >= target and n:
+                return LIFETIME_BUCKETS[i]
+        return None
+
+    def summary(self):
+        count = self.count
+        return {
+            'count': count,
+            'mean_minutes': round(self.total / count, 1) if count else None,
+            'p10': self.percentile(10),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90)
+        }
+
+class LoadLifecycleTracker:
+    """Active loads and completed lifetimes, maintained from consecutive polls"""
+
+    def __init__(self, db_path=LIFECYCLE_DB_FILE):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.init_database()
+
+        self.active = {}  # key -> {'first_seen', 'fingerprint', 'lane', 'broker', 'missed'}
+        self.last_poll = None
+        self.suspect_polls = 0
+        self.by_lane = {}
+        self.by_broker = {}
+        self.load_state()
+
+    def init_database(self):
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS active_loads (
+                    load_key TEXT PRIMARY KEY,
+                    load_id TEXT,
+                    lane TEXT,
+                    broker TEXT,
+                    first_seen REAL,
+                    fingerprint TEXT,
+                    updates INTEGER DEFAULT 0,
+                    missed INTEGER DEFAULT 0
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS load_lifetimes (
+                    load_key TEXT,
+                    load_id TEXT,
+                    lane TEXT,
+                    broker TEXT,
+                    first_seen REAL,
+                    last_seen REAL,
+                    removed_at REAL,
+                    minutes_on_board REAL,
+                    reliable INTEGER
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lifetimes_lane ON load_lifetimes (lane)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lifetimes_broker ON load_lifetimes (broker)')
+            cursor.execute('CREATE TABLE IF NOT EXISTS tracker_state (name TEXT PRIMARY KEY, value TEXT)')
+            self.conn.commit()
+
+    def load_state(self):
+        """Restore active loads and rebuild histograms once at startup"""
+        with self.lock:
+            for key, lane, broker, first_seen, fp, missed in self.conn.execute(
+                    'SELECT load_key, lane, broker, first_seen, fingerprint, missed FROM active_loads'):
+                self.active[key] = {'first_seen': first_seen, 'fingerprint': fp, 'lane': lane,
+                                    'broker': broker, 'missed': missed}
+            row = self.conn.execute("SELECT value FROM tracker_state WHERE name = 'last_poll'").fetchone()
+            self.last_poll = float(row[0]) if row else None
+
+            for lane, broker, minutes in self.conn.execute(
+                    'SELECT lane, broker, minutes_on_board FROM load_lifetimes WHERE reliable = 1'):
+                self._add_lifetime(lane, broker, minutes)
+
+    def _add_lifetime(self, lane, broker, minutes):
+        self.by_lane.setdefault(lane, LifetimeHistogram()).add(minutes)
+        self.by_broker.setdefault(broker, LifetimeHistogram()).add(minutes)
+
+    def _suspect_poll(self, board):
+        """Empty or sharply shrunken boards usually mean a failed or partial poll"""
+        present = sum(1 for key in self.active if key in board)
+        if not board and self.active:
+            return True
+        return len(self.active) >= MIN_BOARD_FOR_SHRINK_CHECK and present < len(self.active) * SUSPECT_SHRINK_RATIO
+
+    def observe(self, board, now=None):
+        """Apply one poll (key -> load_info); returns {'appeared', 'updated', 'removed'} key lists"""
+        now = now or time.time()
+        events = {'appeared': [], 'updated': [], 'removed': []}
+
+        if self._suspect_poll(board):
+            # A real mass removal shows up on consecutive polls; a glitch does not
+            self.suspect_polls += 1
+            if self.suspect_polls < REMOVAL_CONFIRM_POLLS:
+                print(f"⚠️ Lifecycle: board went from {len(self.active)} to {len(board)} loads - ignoring this poll")
+                return events
+        self.suspect_polls = 0
+
+        # Polls far apart mean we were down; removals in the gap have unknown times
+        reliable = self.last_poll is not None and now - self.last_poll <= MAX_POLL_GAP
+
+        inserts, updates, missed_changes, removals = [], [], [], []
+        for key, load_info in board.items():
+            entry = self.active.get(key)
+            fp = fingerprint(load_info)
+            if entry is None:
+                entry = {'first_seen': now, 'fingerprint': fp, 'lane': lane_of(load_info),
+                         'broker': load_info.get('company_id') or load_info.get('company', 'Unknown'), 'missed': 0}
+                self.active[key] = entry
+                inserts.append((key, load_info.get('load_id'), entry['lane'], entry['broker'], now, fp))
+                events['appeared'].append(key)
+                continue
+            if entry['missed']:
+                entry['missed'] = 0
+                missed_changes.append((0, key))
+            if entry['fingerprint'] != fp:
+                entry['fingerprint'] = fp
+                updates.append((fp, key))
+                events['updated'].append(key)
+
+        # Loads that disappeared (only the missing ones are touched)
+        for key in [key for key in self.active if key not in board]:
+            entry = self.active[key]
+            entry['missed'] += 1
+            if entry['missed'] < REMOVAL_CONFIRM_POLLS:
+                missed_changes.append((entry['missed'], key))
+                continue
+            del self.active[key]
+            # Last seen at the poll before the first miss
+            last_seen = entry.get('last_seen') or self.last_poll or now
+            minutes = max(0.0, (last_seen - entry['first_seen']) / 60)
+            removals.append((key, entry, last_seen, minutes))
+            events['removed'].append(key)
+            if reliable:
+                self._add_lifetime(entry['lane'], entry['broker'], minutes)
+
+        for key, entry in self.active.items():
+            if not entry['missed']:
+                entry['last_seen'] = now
+
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO active_loads (load_key, load_id, lane, broker, first_seen, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', inserts)
+            cursor.executemany('UPDATE active_loads SET fingerprint = ?, updates = updates + 1 WHERE load_key = ?', updates)
+            cursor.executemany('UPDATE active_loads SET missed = ? WHERE load_key = ?', missed_changes)
+            for key, entry, last_seen, minutes in removals:
+                cursor.execute('''
+                    INSERT INTO load_lifetimes (load_key, load_id, lane, broker, first_seen, last_seen, removed_at, minutes_on_board, reliable)
+                    SELECT load_key, load_id, lane, broker, first_seen, ?, ?, ?, ? FROM active_loads WHERE load_key = ?
+                ''', (last_seen, now, minutes, int(reliable), key))
+                cursor.execute('DELETE FROM active_loads WHERE load_key = ?', (key,))
+            cursor.execute("INSERT OR REPLACE INTO tracker_state (name, value) VALUES ('last_poll', ?)", (str(now),))
+            self.conn.commit()
+
+        self.last_poll = now
+        if any(events.values()):
+            print(f"🔁 Lifecycle: {len(events['appeared'])} new, {len(events['updated'])} updated, "
+                  f"{len(events['removed'])} removed, {len(self.active)} on board")
+        return events
+
+    def distribution(self, group='lane', min_count=1):
+        """Time-on-board summary per lane or broker"""
+        histograms = self.by_lane if group == 'lane' else self.by_broker
+        return {label: h.summary() for label, h in histograms.items() if h.count >= min_count}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def print_report(tracker, top=15):
+    for group in ('lane', 'broker'):
+        stats = sorted(tracker.distribution(group).items(), key=lambda item: -item[1]['count'])[:top]
+        print(f"\n⏱️ Time on board by {group} (minutes)")
+        for label, summary in stats:
+            print(f"   {label:<30} n={summary['count']:<5} p10≤{summary['p10']:<5} "
+                  f"p50≤{summary['p50']:<5} p90≤{summary['p90']:<5} mean={summary['mean_minutes']}")
+
+    # The fastest lanes set the polling interval we need
+    lanes = [s for s in tracker.distribution('lane', min_count=5).values() if s['p10'] is not None]
+    if lanes:
+        fastest = min(s['p10'] for s in lanes)
+        print(f"\n💡 10% of loads on the fastest lanes are gone within {fastest} min - poll at least that often")
+
+if __name__ == "__main__":
+    tracker = LoadLifecycleTracker(sys.argv[1] if len(sys.argv) > 1 else LIFECYCLE_DB_FILE)
+    print(f"📋 {len(tracker.active)} loads currently on board")
+    print_report(tracker)
+    tracker.close()
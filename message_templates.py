@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Precompiled Telegram Message Templates
+Templates are parsed once at import into literal/field pieces. Field values
+are Markdown-escaped through a memoized escape function, and rendered
+messages are cached per record version (the values a template uses), so
+re-sending or editing the same record does not render it again.
+
+Template syntax (one template line per message line):
+    {field}          value, escaped; missing values print as "Unknown"
+    ?line            line is dropped if any of its fields is unknown
+    ?if:flag line    line is kept only when `flag` is set and its fields are known
+    +line            section header, kept only if a line below it (up to
+                     the next blank line or ^line) is rendered
+    ^line            line follows a section without keeping its header
+    [[ ... ]]        inline group, dropped if any of its fields is unknown
+"""
+
+import re
+from string import Formatter
+from functools import lru_cache
+from collections import OrderedDict
+
+RENDER_CACHE_SIZE = 5000
+UNKNOWN_VALUES = (None, '', 'Unknown')
+MARKDOWN_SPECIAL = re.compile(r'([_*`\[])')
+MARKDOWN_ESCAPED = re.compile(r'\\([_*`\[])')
+
+@lru_cache(maxsize=8192)
+def escape_markdown(text):
+    """Escape Telegram (legacy) Markdown characters in a value"""
+    return MARKDOWN_SPECIAL.sub(r'\\\1', text)
+
+def unescape_markdown(text):
+    """Drop escape backslashes, for text resent without parse_mode"""
+    return MARKDOWN_ESCAPED.sub(r'\1', text)
+
+def _known(value):
+    return value not in UNKNOWN_VALUES
+
+def _compile_pieces(text):
+    """Split text into (literal, field) pairs once"""
+    return [(literal, field) for literal, field, _, _ in Formatter().parse(text)]
+
+class TemplateLine:
+    """One compiled template line"""
+
+    def __init__(self, source):
+        self.blank = not source.strip()
+        self.detached = source.startswith('^')
+        if self.detached:
+            source = source[1:]
+        self.header = source.startswith('+')
+        self.optional = source.startswith('?')
+        self.condition = None
+
+        if source.startswith('?if:'):
+            self.condition, _, source = source[4:].partition(' ')
+        elif self.header or self.optional:
+            source = source[1:]
+
+        # Alternate plain text and [[optional groups]]
+        self.segments = []
+        for i, part in enumerate(re.split(r'\[\[(.*?)\]\]', source)):
+            if part:
+                self.segments.append((i % 2 == 1, _compile_pieces(part)))
+
+        self.fields = {field for _, pieces in self.segments for _, field in pieces if field}
+
+    def render(self, values):
+        """Rendered line, or None if the line is dropped"""
+        if self.condition and not values.get(self.condition):
+            return None
+
+        out = []
+        for optional_group, pieces in self.segments:
+            group = []
+            for literal, field in pieces:
+                group.append(literal)
+                if field is None:
+                    continue
+                value = values.get(field)
+                if not _known(value):
+                    if optional_group:
+                        group = None
+                        break
+                    if self.optional:
+                        return None
+                    # Fields left empty by the parser stay empty
+                    value = 'Unknown' if value is None else value
+                group.append(escape_markdown(str(value)))
+            if group is not None:
+                out.append(''.join(group))
+        return ''.join(out)
+
+class MessageTemplate:
+    """A template compiled to lines, rendered with a per-record cache"""
+
+    def __init__(self, name, source):
+        self.name = name
+        self.lines = [TemplateLine(line) for line in source.split('\n')]
+        fields = set()
+        for line in self.lines:
+            fields |= line.fields
+            if line.condition:
+                fields.add(line.condition)
+        self.fields = tuple(sorted(fields))
+
+    def render(self, values):
+        out = []
+        pending_header = None
+        for line in self.lines:
+            if line.blank:
+                out.append('')
+                pending_header = None
+                continue
+            if line.detached:
+                pending_header = None
+            text = line.render(values)
+            if line.header:
+                pending_header = text
+                continue
+            if text is None:
+                continue
+            if pending_header is not None:
+                out.append(pending_header)
+                pending_header = None
+            out.append(text)
+
+        # Dropped sections leave runs of blank lines behind
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(out)).strip()
+
+FULL_TEMPLATE = """🆕 **NEW SYLECTUS LOAD**
+
+🏢 **Company:** {company}
+🆔 **Load ID:** {load_id}
+
+📍 **PICKUP:**
+   📍 {pickup_city}, {pickup_state}
+   📅 {pickup_date} {pickup_time}
+
+📍 **DELIVERY:**
+   📍 {delivery_city}, {delivery_state}
+   📅 {delivery_date} {delivery_time}
+
+🚛 **LOAD DETAILS:**
+   📏 Miles: {miles}
+   📦 Pieces: {pieces}
+   ⚖️ Weight: {weight}
+?   🚐 Vehicle: {vehicle_type}
+?   📐 Dimensions: {dimensions}
+
+?💰 **Rate:** {rate}
+?💰 **Est. Rate:** ${est_rate}
+
++**PAYMENT INFO:**
+?💳 Credit Score: {credit_score}
+?📅 Payment Terms: {days_to_pay}
+^?📊 Broker: {broker_context}
+
++**CONTACT INFO:**
+?📧 **Email: {contact_email}**
+?📞 Phone: {contact_phone}
+?📧 Broker Email: {other_broker_email}
+
+?if:no_email ⚠️ **NO EMAIL FOUND** - Check company profile
+?if:no_email 🔗 Profile: {profile_url}
+?if:has_email ✅ **Email Available**
+
+?⚠️ **Special Instructions:** {special_instructions}
+
+⏰ **Found:** {found_time}
+🌐 **Via {source}**
+
+?🔧 **Debug:** {debug_cells} cells analyzed"""
+
+COMPACT_TEMPLATE = """**Pick-up at:** {pickup_city}
+**Pick-up date:** {pickup_date} (Scheduled)
+
+**Deliver to:** {delivery_city}
+**Delivery date:** {delivery_date} (Scheduled)
+
+**Miles:** {miles}
+**Pieces:** {pieces}
+**Weight:** {weight}
+**Suggested Truck Size:** {vehicle_size}
+
+**Driver:** {company}
+**Load-N:** {load_id}
+**Email:** {email}
+
+**Recommended Rate:** {recommended_rate}
+
+⏰ **Found:** {found_time}"""
+
+DIGEST_LINE_TEMPLATE = "• {load_id}[[ · {route}]][[ · {pickup_date}]][[ · {miles} mi]][[ · {vehicle_type}]][[ · {company}]]"
+
+TEMPLATES = {
+    'full': MessageTemplate('full', FULL_TEMPLATE),
+    'compact': MessageTemplate('compact', COMPACT_TEMPLATE),
+    'digest_line': MessageTemplate('digest_line', DIGEST_LINE_TEMPLATE)
+}
+
+def load_fields(load_info, **extra):
+    """Template values for a load, including derived fields"""
+    values = {'source': 'API Scraper'}
+    values.update(load_info)
+    values.update(extra)
+
+    miles = str(load_info.get('miles', ''))
+    per_mile = int(miles) * 0.75 if miles.isdigit() else 0  # $0.75 per mile estimate
+    if not _known(load_info.get('rate')) and per_mile:
+        values['est_rate'] = f"{per_mile:.0f}"
+    values['recommended_rate'] = f"{per_mile:.0f}$" if per_mile > 0 else "N/A"
+    values['vehicle_size'] = str(load_info.get('vehicle_type', 'Unknown')).lower()
+
+    contact_email = load_info.get('contact_email', 'Unknown')
+    broker_email = load_info.get('broker_email', 'Unknown')
+    if _known(broker_email) and broker_email != contact_email:
+        values['other_broker_email'] = broker_email
+    has_email = _known(contact_email) or _known(values.get('other_broker_email'))
+    values['has_email'] = has_email
+    values['no_email'] = not has_email
+
+    pickup = load_info.get('pickup_city')
+    delivery = load_info.get('delivery_city')
+    if _known(pickup) or _known(delivery):
+        values['route'] = f"{pickup if _known(pickup) else '?'} → {delivery if _known(delivery) else '?'}"
+
+    debug_cells = load_info.get('all_cells')
+    values['debug_cells'] = len(debug_cells) if debug_cells else None
+    return values
+
+_render_cache = OrderedDict()
+
+def render(template_name, values):
+    """Render a template; identical record versions come from the cache"""
+    template = TEMPLATES[template_name]
+    key = (template_name,) + tuple(str(values.get(field)) for field in template.fields)
+
+    message = _render_cache.get(key)
+    if message is not None:
+        _render_cache.move_to_end(key)
+        return message
+
+    message = template.render(values)
+    _render_cache[key] = message
+    while len(_render_cache) > RENDER_CACHE_SIZE:
+        _render_cache.popitem(last=False)
+    return message
@@ -14,12 +14,18 @@ import json
 import time
 import random
 import requests
-import sqlite3
 import hashlib
 import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+from session_db import get_session_db
+from session_validation import first_valid, validate_all, get_validation_cache
+
+LOG_HEALTH_SQL = '''
+    INSERT INTO session_health (session_id, timestamp, response_time, success, error_message)
+    SELECT id, ?, ?, ?, ? FROM sessions WHERE profile_name = ?
+'''
 
 try:
     import undetected_chromedriver as uc
@@ -36,6 +42,7 @@ class AdvancedSessionManager:
     def __init__(self, base_url="https://www.sylectus.com"):
         self.base_url = base_url
         self.session_db = "session_data.db"
+        self.db = get_session_db(self.session_db)
         self.profile_dir = Path("chrome_profiles")
         self.profiles = {}
         self.active_drivers = {}
@@ -55,9 +62,10 @@ class AdvancedSessionManager:
     
     def init_database(self):
         """Initialize SQLite database for session storage"""
-        conn = sqlite3.connect(self.session_db)
-        cursor = conn.cursor()
-        
+        with self.db.transaction() as cursor:
+            self._create_tables(cursor)
+    
+    def _create_tables(self, cursor):
         # Sessions table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
@@ -88,8 +96,9 @@ class AdvancedSessionManager:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Indexes for the active-session scans and health history
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions (status, expiry_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_health_session ON session_health (session_id, timestamp)')
     
     def generate_realistic_profile(self) -> Dict:
         """Generate realistic browser profile"""
@@ -297,13 +306,10 @@ class AdvancedSessionManager:
     
     def save_session(self, profile_name: str, session_data: Dict, credentials: Dict = None):
         """Save session to database"""
-        conn = sqlite3.connect(self.session_db)
-        cursor = conn.cursor()
-        
         # Calculate expiry time (24 hours from now)
         expiry_time = datetime.now() + timedelta(hours=24)
         
-        cursor.execute('''
+        self.db.execute('''
             INSERT OR REPLACE INTO sessions 
             (profile_name, cookies, session_tokens, user_agent, viewport, 
              created_at, last_used, expiry_time, status, login_credentials, fingerprint)
@@ -322,24 +328,16 @@ class AdvancedSessionManager:
             session_data.get('fingerprint', '')
         ))
         
-        conn.commit()
-        conn.close()
-        
         print(f"💾 Session saved: {profile_name}")
     
     def load_existing_sessions(self):
         """Load existing sessions from database"""
-        conn = sqlite3.connect(self.session_db)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        sessions = self.db.fetchall('''
             SELECT profile_name, cookies, session_tokens, user_agent, expiry_time, status
             FROM sessions 
             WHERE status = 'active' AND expiry_time > ?
         ''', (datetime.now(),))
         
-        sessions = cursor.fetchall()
-        
         for session in sessions:
             profile_name, cookies, tokens, user_agent, expiry, status = session
             self.session_pool.append({
@@ -350,45 +348,55 @@ class AdvancedSessionManager:
                 "expiry": expiry
             })
         
-        conn.close()
         print(f"📂 Loaded {len(self.session_pool)} existing sessions")
     
     def test_session_validity(self, session_data: Dict) -> bool:
-        """Test if a session is still valid"""
+        """Test if a session is still valid (recent results come from the validation cache)"""
         try:
-            session = requests.Session()
-            
-            # Set cookies
-            for cookie in session_data['cookies']:
-                session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
-            
-            # Set headers
-            session.headers.update({
-                'User-Agent': session_data['user_agent'],
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Connection': 'keep-alive'
-            })
-            
-            # Test with load board API
-            response = session.get(f"{self.base_url}/II14_managepostedloads.asp", timeout=10)
-            
-            # Check if we get valid response (not redirected to login)
-            if response.status_code == 200 and 'Login.aspx' not in response.url:
-                return True
-            
-            return False
+            return get_validation_cache().validate(
+                session_data['cookies'], lambda: self._check_session(session_data))
             
         except Exception as e:
             print(f"❌ Session validation failed: {e}")
+            self.log_session_health(session_data, 0, False, str(e))
             return False
     
+    def _check_session(self, session_data: Dict) -> bool:
+        """Live validation request for a pooled session"""
+        session = requests.Session()
+        
+        # Set cookies
+        for cookie in session_data['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+        
+        # Set headers
+        session.headers.update({
+            'User-Agent': session_data['user_agent'],
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Connection': 'keep-alive'
+        })
+        
+        # Test with load board API
+        start_time = time.time()
+        response = session.get(f"{self.base_url}/II14_managepostedloads.asp", timeout=10)
+        
+        # Check if we get valid response (not redirected to login)
+        valid = response.status_code == 200 and 'Login.aspx' not in response.url
+        self.log_session_health(session_data, time.time() - start_time, valid)
+        return valid
+    
+    def log_session_health(self, session_data: Dict, response_time: float, success: bool, error_message: str = None):
+        """Record a validation result in session_health (written in batches)"""
+        if session_data.get('profile_name'):
+            self.db.log(LOG_HEALTH_SQL, (datetime.now(), response_time, success, error_message, session_data['profile_name']))
+    
     def get_valid_session(self) -> Optional[Dict]:
-        """Get a valid session from the pool"""
-        for session in self.session_pool:
-            if self.test_session_validity(session):
-                print(f"✅ Found valid session: {session['profile_name']}")
-                return session
+        """Get a valid session from the pool (checked concurrently, first healthy answer wins)"""
+        session = first_valid(self.session_pool, self.test_session_validity)
+        if session:
+            print(f"✅ Found valid session: {session['profile_name']}")
+            return session
         
         print("⚠️  No valid sessions found in pool")
         return None
@@ -487,20 +495,16 @@ class AdvancedSessionManager:
                 try:
                     print("🔍 Monitoring session health...")
                     
-                    # Check each session in pool
-                    for session in self.session_pool[:]:  # Copy list to avoid modification during iteration
-                        if not self.test_session_validity(session):
+                    # Check every session in the pool at once (copy to avoid modification during iteration)
+                    for session, valid in validate_all(self.session_pool[:], self.test_session_validity):
+                        if not valid:
                             print(f"⚠️  Session expired: {session['profile_name']}")
                             
                             # Try to refresh if credentials available
-                            conn = sqlite3.connect(self.session_db)
-                            cursor = conn.cursor()
-                            cursor.execute(
+                            result = self.db.fetchone(
                                 'SELECT login_credentials FROM sessions WHERE profile_name = ?',
                                 (session['profile_name'],)
                             )
-                            result = cursor.fetchone()
-                            conn.close()
                             
                             if result and result[0]:
                                 credentials = json.loads(result[0])
@@ -514,6 +518,9 @@ class AdvancedSessionManager:
                                     self.session_pool.append(new_session)
                                     print(f"✅ Session refreshed: {session['profile_name']}")
                     
+                    # Health rows are read by other processes (session lifetime estimate)
+                    self.db.flush_logs()
+                    
                     print(f"💤 Session monitor sleeping for {check_interval/3600:.1f} hours...")
                     time.sleep(check_interval)
                     
@@ -529,12 +536,7 @@ class AdvancedSessionManager:
         """Clean up expired sessions and drivers"""
         try:
             # Clean up database
-            conn = sqlite3.connect(self.session_db)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM sessions WHERE expiry_time < ?', (datetime.now(),))
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
+            deleted_count = self.db.execute('DELETE FROM sessions WHERE expiry_time < ?', (datetime.now(),)).rowcount
             
             # Clean up session pool
             self.session_pool = [s for s in self.session_pool if 
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Profile Email Cache for Sylectus Broker Profiles
+Keeps emails extracted from company profile pages between polls and uses the
+idle time between board polls to prefetch profiles before their loads show up
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+PROFILE_CACHE_FILE = os.getenv('PROFILE_CACHE_FILE', 'profile_cache.json')
+PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', 86400))  # 24 hours
+PROFILE_NEGATIVE_TTL = int(os.getenv('PROFILE_NEGATIVE_TTL', 21600))  # Retry "no email" profiles after 6 hours
+PROFILE_REFRESH_MARGIN = int(os.getenv('PROFILE_REFRESH_MARGIN', 3600))  # Warm entries expiring within 1 hour
+PROFILE_MIN_INTERVAL = float(os.getenv('PROFILE_MIN_INTERVAL', 2))  # Seconds between profile requests
+PROFILE_HOURLY_BUDGET = int(os.getenv('PROFILE_HOURLY_BUDGET', 120))  # Max profile requests per hour
+PROFILE_FETCH_TIMEOUT = 15
+
+class ProfileRateLimiter:
+    """Shared request budget for profile page fetches (inline and warmer)"""
+
+    def __init__(self, min_interval=PROFILE_MIN_INTERVAL, hourly_budget=PROFILE_HOURLY_BUDGET):
+        self.min_interval = min_interval
+        self.hourly_budget = hourly_budget
+        self.last_request = 0.0
+        self.history = deque()
+        self.lock = threading.Lock()
+
+    def _wait_time(self, now):
+        """Seconds until the next request is allowed (0 if allowed now)"""
+        while self.history and now - self.history[0] >= 3600:
+            self.history.popleft()
+
+        wait = max(0.0, self.last_request + self.min_interval - now)
+        if self.hourly_budget and len(self.history) >= self.hourly_budget:
+            wait = max(wait, self.history[0] + 3600 - now)
+        return wait
+
+    def acquire(self, stop_event=None, deadline=None):
+        """Block until a request slot is free; returns False if stopped or past deadline"""
+        while True:
+            with self.lock:
+                now = time.time()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    self.last_request = now
+                    self.history.append(now)
+                    return True
+
+            if deadline is not None and now + wait >= deadline:
+                return False
+
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+class ProfileEmailCache:
+    """TTL cache of profile URL -> email, persisted as JSON"""
+
+    def __init__(self, cache_file=PROFILE_CACHE_FILE, ttl=PROFILE_CACHE_TTL, negative_ttl=PROFILE_NEGATIVE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # Warmer and poller may save at the same time
+        self.load()
+
+    def load(self):
+        """Load cached entries from disk"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                self.entries = json.load(f)
+            print(f"📂 Loaded {len(self.entries)} cached profile emails")
+        except FileNotFoundError:
+            self.entries = {}
+        except Exception as e:
+            print(f"⚠️ Could not load profile cache: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Drop expired entries and write the cache to disk atomically"""
+        try:
+            with self.save_lock:
+                self.prune()
+                with self.lock:
+                    data = json.dumps(self.entries)
+                tmp_file = f"{self.cache_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    f.write(data)
+                os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"❌ Error saving profile cache: {e}")
+
+    def _expires_at(self, entry):
+        ttl = self.ttl if entry.get('email') else self.negative_ttl
+        return entry['fetched_at'] + ttl
+
+    def get(self, profile_url):
+        """Return (hit, email) for a fresh cache entry"""
+        with self.lock:
+            entry = self.entries.get(profile_url)
+            if entry and self._expires_at(entry) > time.time():
+                return True, entry.get('email')
+        return False, None
+
+    def put(self, profile_url, email):
+        """Store the result of a profile fetch (None means no email on the page)"""
+        with self.lock:
+            self.entries[profile_url] = {'email': email, 'fetched_at': time.time()}
+
+    def expires_in(self, profile_url):
+        """Seconds until the entry expires (negative or None if missing/expired)"""
+        with self.lock:
+            entry = self.entries.get(profile_url)
+            if not entry:
+                return None
+            return self._expires_at(entry) - time.time()
+
+    def prune(self):
+        """Drop expired entries"""
+        now = time.time()
+        with self.lock:
+            expired = [url for url, entry in self.entries.items() if self._expires_at(entry) <= now]
+            for url in expired:
+                del self.entries[url]
+        return len(expired)
+
+class ProfileCacheWarmer:
+    """Prefetches profile emails for brokers on the board while the poller is idle"""
+
+    def __init__(self, cache, fetch_email, rate_limiter, refresh_margin=PROFILE_REFRESH_MARGIN):
+        self.cache = cache
+        self.fetch_email = fetch_email  # callable(profile_url) -> (fetched, email)
+        self.rate_limiter = rate_limiter
+        self.refresh_margin = refresh_margin
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def candidates(self, profile_urls):
+        """Profile URLs whose email is missing or close to expiry, most urgent first"""
+        pending = []
+        for url in profile_urls:
+            remaining = self.cache.expires_in(url)
+            if remaining is None or remaining <= self.refresh_margin:
+                pending.append((remaining if remaining is not None else float('-inf'), url))
+        pending.sort()
+        return [url for _, url in pending]
+
+    def start(self, profile_urls, deadline):
+        """Warm the cache in the background until deadline (next board poll)"""
+        self.stop()
+        urls = self.candidates(profile_urls)
+        if not urls:
+            return
+
+        print(f"🔥 Warming {len(urls)} profile emails until next poll...")
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(urls, deadline, self.stop_event), daemon=True)
+        self.thread.start()
+
+    def _run(self, urls, deadline, stop_event):
+        warmed = 0
+        for url in urls:
+            # Never start a fetch that could still be running when the poll is due
+            fetch_deadline = deadline - PROFILE_FETCH_TIMEOUT
+            if stop_event.is_set() or time.time() >= fetch_deadline:
+                break
+            if not self.rate_limiter.acquire(stop_event=stop_event, deadline=fetch_deadline):
+                break
+
+            try:
+                fetched, email = self.fetch_email(url)
+                if fetched:
+                    self.cache.put(url, email)
+                    warmed += 1
+            except Exception as e:
+                print(f"⚠️ Profile warm failed for {url}: {e}")
+
+        if warmed:
+            self.cache.save()
+            print(f"🔥 Warmed {warmed} profile emails")
+
+    def stop(self):
+        """Stop warming immediately (called when a board poll is due)"""
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=PROFILE_FETCH_TIMEOUT)
+        self.thread = None
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Raw Capture Store
+Keeps a replayable history of raw load board responses without writing a
+new file per poll: each distinct body is stored once (gzip) under its hash,
+and a timeline records which hash was seen when. Retention trims the
+timeline by age and total size and drops bodies nothing points to.
+
+ASP.NET hidden state fields change on every response, so they are ignored
+when computing the hash (the first body stored for a hash is kept as-is).
+
+Usage:
+    python3 raw_capture_store.py stats
+    python3 raw_capture_store.py list [N]
+    python3 raw_capture_store.py get <hash> > board.html
+"""
+
+import os
+import re
+import sys
+import gzip
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+RAW_CAPTURE_DIR = os.getenv('RAW_CAPTURE_DIR', 'raw_captures')
+RAW_CAPTURE_MAX_AGE = int(os.getenv('RAW_CAPTURE_MAX_AGE', 14 * 86400))
+RAW_CAPTURE_MAX_BYTES = int(os.getenv('RAW_CAPTURE_MAX_BYTES', 512 * 1024 * 1024))
+RAW_CAPTURE_IGNORE = os.getenv('RAW_CAPTURE_IGNORE', '')  # Extra regex of volatile content to ignore when hashing
+RETENTION_INTERVAL = 3600
+
+VOLATILE_PATTERNS = [
+    r'<input[^>]+name="__(?:VIEWSTATE|VIEWSTATEGENERATOR|EVENTVALIDATION|REQUESTDIGEST)"[^>]*>'
+]
+
+class RawCaptureStore:
+    """Deduplicated, compressed raw HTML history with a timeline"""
+
+    def __init__(self, directory=RAW_CAPTURE_DIR, max_age=RAW_CAPTURE_MAX_AGE, max_bytes=RAW_CAPTURE_MAX_BYTES):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.last_retention = 0
+
+        patterns = VOLATILE_PATTERNS + ([RAW_CAPTURE_IGNORE] if RAW_CAPTURE_IGNORE else [])
+        self.volatile = re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'captures.db'), check_same_thread=False)
+        self.init_database()
+
+    def init_database(self):
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS objects (
+                    hash TEXT PRIMARY KEY,
+                    raw_bytes INTEGER,
+                    stored_bytes INTEGER,
+                    first_seen REAL
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS timeline (
+                    captured_at REAL,
+                    hash TEXT,
+                    label TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_time ON timeline (captured_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_hash ON timeline (hash)')
+            self.conn.commit()
+
+    def content_hash(self, body):
+        normalized = self.volatile.sub('', body)
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.directory, 'objects', content_hash[:2], f"{content_hash}.html.gz")
+
+    def put(self, body, label='load_board', captured_at=None):
+        """Record a capture; the body is compressed and written only if it is new. Returns the hash"""
+        captured_at = captured_at or time.time()
+        content_hash = self.content_hash(body)
+
+        with self.lock:
+            known = self.conn.execute('SELECT 1 FROM objects WHERE hash = ?', (content_hash,)).fetchone()
+
+        if not known:
+            data = gzip.compress(body.encode('utf-8'), compresslevel=6)
+            path = self._object_path(content_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self.lock:
+            if not known:
+                self.conn.execute(
+                    'INSERT OR IGNORE INTO objects (hash, raw_bytes, stored_bytes, first_seen) VALUES (?, ?, ?, ?)',
+                    (content_hash, len(body), len(data), captured_at)
+                )
+            self.conn.execute('INSERT INTO timeline (captured_at, hash, label) VALUES (?, ?, ?)',
+                              (captured_at, content_hash, label))
+            self.conn.commit()
+
+        if time.time() - self.last_retention > RETENTION_INTERVAL:
+            self.apply_retention()
+        return content_hash
+
+    def get(self, content_hash):
+        """Raw body for a hash (None if pruned)"""
+        try:
+            with open(self._object_path(content_hash), 'rb') as f:
+                return gzip.decompress(f.read()).decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def timeline(self, since=None, limit=None):
+        """[(captured_at, hash, label)] oldest first"""
+        query = 'SELECT captured_at, hash, label FROM timeline WHERE captured_at >= ? ORDER BY captured_at'
+        params = [since or 0]
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def replay(self, since=None):
+        """Yield (captured_at, body) for parser regression runs"""
+        for captured_at, content_hash, _ in self.timeline(since):
+            body = self.get(content_hash)
+            if body is not None:
+                yield captured_at, body
+
+    def stats(self):
+        with self.lock:
+            captures = self.conn.execute('SELECT COUNT(*) FROM timeline').fetchone()[0]
+            objects, raw_bytes, stored_bytes = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(stored_bytes), 0) FROM objects'
+            ).fetchone()
+        return {'captures': captures, 'unique_bodies': objects, 'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}
+
+    def apply_retention(self):
+        """Drop timeline entries past max age (then oldest first past max size) and unreferenced bodies"""
+        self.last_retention = time.time()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('DELETE FROM timeline WHERE captured_at < ?', (time.time() - self.max_age,))
+
+            total = cursor.execute('SELECT COALESCE(SUM(stored_bytes), 0) FROM objects').fetchone()[0]
+            while total > self.max_bytes:
+                oldest = cursor.execute('SELECT MIN(captured_at) FROM timeline').fetchone()[0]
+                if oldest is None:
+                    break
+                # Trim an hour of history at a time
+                cursor.execute('DELETE FROM timeline WHERE captured_at < ?', (oldest + 3600,))
+                total = cursor.execute('''
+                    SELECT COALESCE(SUM(stored_bytes), 0) FROM objects
+                    WHERE hash IN (SELECT DISTINCT hash FROM timeline)
+                ''').fetchone()[0]
+
+            orphans = [row[0] for row in cursor.execute(
+                'SELECT hash FROM objects WHERE hash NOT IN (SELECT DISTINCT hash FROM timeline)'
+            )]
+            cursor.executemany('DELETE FROM objects WHERE hash = ?', [(h,) for h in orphans])
+            self.conn.commit()
+
+        for content_hash in orphans:
+            try:
+                os.remove(self._object_path(content_hash))
+            except FileNotFoundError:
+                pass
+        if orphans:
+            print(f"🧹 Raw capture retention removed {len(orphans)} bodies")
+        return len(orphans)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+if __name__ == "__main__":
+    store = RawCaptureStore()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'list':
+        limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        for captured_at, content_hash, label in store.timeline()[-limit:]:
+            print(f"{datetime.fromtimestamp(captured_at):%Y-%m-%d %H:%M:%S}  {content_hash}  {label}")
+    elif command == 'get' and len(sys.argv) > 2:
+        body = store.get(sys.argv[2])
+        print(body if body is not None else f"❌ {sys.argv[2]} not found")
+    else:
+        stats = store.stats()
+        ratio = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+        print(f"📦 {stats['captures']} captures, {stats['unique_bodies']} unique bodies, "
+              f"{stats['stored_bytes'] / 1024:.0f} KB stored ({ratio:.1f}x compression)")
+    store.close()
@@ -13,6 +13,13 @@ import re
 import json
 from datetime import datetime
 from dotenv import load_dotenv
+from dedup_store import DedupStore
+from load_keys import canonical_load_key
+from state_writer import StateWriter
+from telegram_outbox import TelegramOutbox
+from telegram_interactions import TelegramInteractions, load_keyboard
+from debug_capture import DebugCapture
+from message_templates import render, load_fields
 
 # Load environment variables
 load_dotenv()
@@ -28,50 +35,20 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', 300))
 
 # Step 3: Function to Send Telegram Message
+outbox = TelegramOutbox()
+interactions = TelegramInteractions(outbox)
+debug_capture = DebugCapture()
+
 def send_to_telegram(message_text, keyboard=None):
     """
     This function will take the scraped text as an argument.
-    It will construct the Telegram Bot API URL.
-    It will make a requests.post() call with the chat_id and text.
-    Include a print statement to confirm if the message was sent successfully.
+    It queues the message in the persisted outbox; the outbox sender thread
+    delivers it with rate limiting and retries.
     """
-    try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        data = {
-            'chat_id': TELEGRAM_CHAT_ID,
-            'text': message_text,
-            'parse_mode': 'Markdown'
-        }
-        
-        # Add keyboard if provided
-        if keyboard:
-            data['reply_markup'] = json.dumps(keyboard)
-        
-        response = requests.post(url, data=data, timeout=10)
-        
-        if response.status_code == 200:
-            print("✅ Message sent successfully to Telegram")
-            return True
-        else:
-            print(f"❌ Failed to send message. Status code: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Error sending message: {e}")
-        return False
-
-# Step 4: Advanced - Preventing Duplicate Notifications
-def load_sent_items():
-    """Load previously sent items from sent_items.txt"""
-    try:
-        with open('sent_items.txt', 'r') as f:
-            return set(line.strip() for line in f.readlines())
-    except FileNotFoundError:
-        return set()
-
-def save_sent_item(item_id):
-    """Save item ID to sent_items.txt to prevent duplicates"""
-    with open('sent_items.txt', 'a') as f:
-        f.write(f"{item_id}\n")
+    if outbox.enqueue(message_text, reply_markup=keyboard) is not None:
+        print("✅ Message queued for Telegram")
+        return True
+    return False
 
 def perform_complete_login(page):
     """Perform complete login sequence from codegen recording"""
@@ -99,8 +76,9 @@ def perform_complete_login(page):
         time.sleep(2)
         
         # Take screenshot for debugging
-        page.screenshot(path="login_page.png")
-        print("📸 Screenshot saved as login_page.png")
+        screenshot_path = debug_capture.capture('login_page', page.screenshot(), extension='png')
+        if screenshot_path:
+            print(f"📸 Screenshot saved as {screenshot_path}")
         
         # Fill Corporate ID
         print("🏢 Entering Corporate ID...")
@@ -284,7 +262,7 @@ def extract_load_details(row, iframe, page):
         print(f"❌ Error extracting load details: {e}")
         return None
 
-def scrape_all_loads(iframe, sent_items, page):
+def scrape_all_loads(iframe, state, page):
     """Scrape all loads from the iframe"""
     new_loads_found = 0
     
@@ -319,68 +297,37 @@ def scrape_all_loads(iframe, sent_items, page):
                     continue
                 
                 # Create unique identifier for this load
-                load_id = f"{load_data['company']}_{load_data['load_id']}_{load_data['pickup_city']}_{load_data['delivery_city']}"
+                load_id = canonical_load_key(load_data)
                 
                 # Step 4: Check if we've already sent this load
-                if load_id in sent_items:
+                if state.seen(load_id):
                     continue
                 
                 print(f"🆕 NEW LOAD: {load_data['company']} - Load {load_data['load_id']}")
                 
-                # Calculate recommended rate (miles × $0.75)
-                try:
-                    recommended_rate = int(load_data['miles']) * 0.75 if load_data['miles'].isdigit() else 0
-                    rate_text = f"{recommended_rate:.0f}$" if recommended_rate > 0 else "N/A"
-                except:
-                    rate_text = "N/A"
+                # Same escaped alert layout as the API scraper (estimated rate included)
+                email = load_data.get('email')
+                message = render('full', load_fields(
+                    dict(load_data, contact_email=email if email != 'Not provided' else 'Unknown'),
+                    pickup_time='', delivery_time='',  # Not parsed from the browser table
+                    found_time=datetime.now().strftime('%I:%M %p'), source='Browser Scraper'
+                ))
                 
-                # Format message to match the image format
-                message = f"""**Pick-up at:** {load_data['pickup_city']}
-**Pick-up date:** {load_data['pickup_date']} (Scheduled)
-
-**Deliver to:** {load_data['delivery_city']}
-**Delivery date:** {load_data['delivery_date']} (Scheduled)
-
-**Miles:** {load_data['miles']}
-**Pieces:** {load_data['pieces']}
-**Weight:** {load_data['weight']}
-**Dims:** 40x42x21
-**Suggested Truck Size:** {load_data['vehicle_type'].lower()}
-
-**Notes:** EMAIL ONLY Pickup Wednesday Deliver Friday NO Dispatch Services
-
-**Miles Out:** 80
-**Driver:** {load_data['company']}
-**Load-N:** {load_data['load_id']}
-
-**Recommended Rate:** {rate_text}
-
-⏰ **Found:** {datetime.now().strftime('%I:%M %p')}"""
+                # Create inline keyboard for Telegram (handled by the interaction service)
+                keyboard = load_keyboard(load_id)
+                interactions.remember(load_id, load_data)
                 
-                # Create inline keyboard for Telegram
-                keyboard = {
-                    'inline_keyboard': [
-                        [
-                            {'text': 'BID', 'callback_data': f'bid_{load_data["load_id"]}'},
-                            {'text': 'SKIP', 'callback_data': f'skip_{load_data["load_id"]}'}
-                        ],
-                        [
-                            {'text': 'Stop Loads', 'callback_data': 'stop_loads'},
-                            {'text': 'Contact Dispatcher', 'callback_data': f'contact_{load_data["load_id"]}'}
-                        ]
-                    ]
-                }
+                # "Stop Loads" pauses the chat - those loads are marked without alerting
+                if interactions.alerts_paused(TELEGRAM_CHAT_ID):
+                    state.mark_sent(load_id)
+                    continue
                 
                 # Call send_to_telegram function with keyboard
                 if send_to_telegram(message, keyboard):
                     # Save item ID to prevent duplicates
-                    save_sent_item(load_id)
-                    sent_items.add(load_id)
+                    state.mark_sent(load_id)
                     new_loads_found += 1
-                    print(f"✅ Sent notification for: {load_data['company']} Load {load_data['load_id']}")
-                
-                # Add a small delay to avoid sending messages too quickly
-                time.sleep(1)
+                    print(f"✅ Queued notification for: {load_data['company']} Load {load_data['load_id']}")
                 
             except Exception as e:
                 print(f"❌ Error processing row {idx}: {e}")
@@ -391,13 +338,21 @@ def scrape_all_loads(iframe, sent_items, page):
     except Exception as e:
         print(f"❌ Error scraping loads: {e}")
         return 0
+    finally:
+        # One group commit for the whole cycle
+        state.commit()
 
 # Step 3: Main Scraping Logic
 if __name__ == "__main__":
-    # Load previously sent items
-    sent_items = load_sent_items()
+    # Step 4: Advanced - Preventing Duplicate Notifications
+    dedup = DedupStore()
+    dedup.start_compaction()
+    state = StateWriter(dedup)
+    interactions.dedup = dedup
     
     print("🚀 Starting Complete Sylectus Scraper...")
+    outbox.start()
+    interactions.start()
     send_to_telegram("🚀 **Complete Scraper Started**\n\nUsing recorded workflow with email extraction...")
     
     # Start Playwright
@@ -463,7 +418,7 @@ if __name__ == "__main__":
                         print("⚠️ Could not refresh search, continuing with current results...")
                     
                     # Scrape all loads
-                    new_loads = scrape_all_loads(iframe, sent_items, page)
+                    new_loads = scrape_all_loads(iframe, state, page)
                     
                     if new_loads > 0:
                         print(f"✅ Found {new_loads} new loads this cycle")
@@ -491,6 +446,11 @@ if __name__ == "__main__":
         finally:
             # Shutdown: close the browser
             browser.close()
+            interactions.stop()
+            state.close()
+            dedup.close()
+            outbox.stop()
+            debug_capture.close()
             print("🔒 Browser closed")
             
     print("🏁 Scraper execution complete")
\ No newline at end of file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Shared Session Store Connections
+One SessionDatabase per database file, shared by every session store that
+uses it. Each thread keeps its own long-lived connection (WAL mode, relaxed
+fsync, sqlite3 statement cache), so the same SQL strings are prepared once
+per connection instead of on every connect/close. Activity log rows are
+buffered and inserted in batches; a background timer writes out whatever is
+buffered at least every LOG_FLUSH_SECONDS, so other processes reading the
+history never see it more than that far behind.
+"""
+
+import os
+import time
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SESSION_DB_STATEMENT_CACHE = 128
+LOG_BATCH_SIZE = int(os.getenv('SESSION_LOG_BATCH_SIZE', 50))
+LOG_FLUSH_SECONDS = 30
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+class SessionDatabase:
+    """Per-thread WAL connections with a buffered log writer"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        self.log_buffers = {}  # insert SQL -> pending rows
+        self.last_log_flush = time.time()
+        self.flusher = None
+
+    def connection(self):
+        """This thread's connection (opened on first use)"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=SESSION_DB_STATEMENT_CACHE,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def execute(self, sql, params=()):
+        """Run one statement and commit; returns the cursor"""
+        conn = self.connection()
+        cursor = conn.execute(sql, params)
+        conn.commit()
+        return cursor
+
+    def executemany(self, sql, rows):
+        conn = self.connection()
+        conn.executemany(sql, rows)
+        conn.commit()
+
+    def fetchone(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self):
+        """Cursor for several statements committed together"""
+        conn = self.connection()
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def log(self, sql, row):
+        """Buffer a log insert; flushed in batches by size or age"""
+        with self.lock:
+            self.log_buffers.setdefault(sql, []).append(row)
+            pending = sum(len(rows) for rows in self.log_buffers.values())
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self._flush_loop, name='session-log-flush', daemon=True)
+                self.flusher.start()
+        if pending >= LOG_BATCH_SIZE or time.time() - self.last_log_flush >= LOG_FLUSH_SECONDS:
+            self.flush_logs()
+
+    def _flush_loop(self):
+        # Quiet periods would otherwise leave the last few rows buffered indefinitely
+        while True:
+            time.sleep(LOG_FLUSH_SECONDS)
+            if self.log_buffers:
+                self.flush_logs()
+
+    def flush_logs(self):
+        """Write buffered log rows in one transaction"""
+        with self.lock:
+            buffers, self.log_buffers = self.log_buffers, {}
+            self.last_log_flush = time.time()
+        if not buffers:
+            return
+        try:
+            with self.transaction() as cursor:
+                for sql, rows in buffers.items():
+                    cursor.executemany(sql, rows)
+        except Exception as e:
+            print(f"⚠️ Could not write session logs: {e}")
+
+    def close(self):
+        """Flush logs and close every thread's connection"""
+        self.flush_logs()
+        with self.lock:
+            for conn in self.connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self.connections = []
+        self.local = threading.local()
+
+def get_session_db(db_path):
+    """Shared SessionDatabase for a file"""
+    key = os.path.abspath(db_path)
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = SessionDatabase(db_path)
+        return _databases[key]
+
+@atexit.register
+def _flush_all():
+    with _databases_lock:
+        databases = list(_databases.values())
+    for database in databases:
+        database.flush_logs()
@@ -7,8 +7,9 @@ Handles login with Playwright and extracts session cookies for MCP server usage
 from playwright.sync_api import sync_playwright
 import json
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from dotenv import load_dotenv
+from session_lifetime import SessionLifetimeEstimator
 
 load_dotenv()
 
@@ -113,12 +114,16 @@ class SylectusSessionExtractor:
             # Get domain info
             domains = list(set([cookie.get('domain', '') for cookie in cookies]))
             
+            # Predicted from past session lifetimes, capped by the cookies' own expiry
+            estimator = SessionLifetimeEstimator()
+            extracted_at = datetime.now()
             session_data = {
                 'cookies': session_cookies,
                 'raw_cookies': cookies,
                 'domains': domains,
-                'extracted_at': datetime.now().isoformat(),
-                'expires_at': (datetime.now() + timedelta(hours=6)).isoformat()  # Assume 6 hour session
+                'extracted_at': extracted_at.isoformat(),
+                'expires_at': datetime.fromtimestamp(estimator.predicted_expiry(extracted_at, cookies)).isoformat(),
+                'refresh_at': datetime.fromtimestamp(estimator.refresh_at(extracted_at, cookies)).isoformat()
             }
             
             print(f"✅ Extracted {len(session_cookies)} cookies from {len(domains)} domains")
@@ -151,6 +156,12 @@ class SylectusSessionExtractor:
                 print("⚠️ Stored session has expired")
                 return None
             
+            # Refresh shortly before the predicted expiry rather than after a failed request
+            refresh_at = session_data.get('refresh_at')
+            if refresh_at and datetime.now() > datetime.fromisoformat(refresh_at):
+                print("⏰ Stored session is close to its predicted expiry - refreshing")
+                return None
+            
             print("✅ Valid session loaded from file")
             return session_data
         except FileNotFoundError:
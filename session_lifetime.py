@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Session Lifetime Estimator
+Learns how long Sylectus sessions actually last from the validation history
+the session stores already keep (stealth session_logs, manager session_health)
+and schedules refreshes shortly before the predicted expiry instead of on a
+fixed clock. Sessions still alive count as censored observations
+(Kaplan-Meier), and a cookie's own expires attribute caps the prediction.
+
+Usage:
+    python3 session_lifetime.py           # show the learned lifetime
+"""
+
+import os
+import time
+import sqlite3
+from datetime import datetime
+
+DEFAULT_SESSION_LIFETIME_HOURS = float(os.getenv('DEFAULT_SESSION_LIFETIME_HOURS', 6))
+SESSION_REFRESH_MARGIN_MINUTES = float(os.getenv('SESSION_REFRESH_MARGIN_MINUTES', 30))
+SESSION_EXPIRY_QUANTILE = 0.2  # Refresh by the time 20% of sessions have died
+MIN_LIFETIME_OBSERVATIONS = 3
+SESSION_HISTORY_DBS = ['stealth_sessions.db', 'session_data.db']
+AUTH_COOKIE_KEYWORDS = ['session', 'auth', 'token', 'login', 'asp.net']
+
+def _timestamp(value):
+    """Epoch seconds from a stored datetime (sqlite3 default adapter format) or number"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+def _observations(created_at, checks):
+    """(hours, expired) from a creation time and [(checked_at, ok)] sorted by time"""
+    if created_at is None:
+        return None
+    last_ok = None
+    for checked_at, ok in checks:
+        if checked_at is None or checked_at < created_at:
+            continue
+        if ok:
+            last_ok = checked_at
+        elif last_ok is not None:
+            # Died somewhere after its last good check - count the conservative end
+            return (last_ok - created_at) / 3600, True
+    if last_ok is None:
+        return None
+    return (last_ok - created_at) / 3600, False
+
+def cookie_expiry(cookies):
+    """Earliest expires attribute of the session's auth cookies (epoch seconds or None)"""
+    if not isinstance(cookies, (list, tuple)):
+        return None
+    expiries = []
+    auth_expiries = []
+    for cookie in cookies:
+        expires = cookie.get('expires', cookie.get('expiry'))
+        if not isinstance(expires, (int, float)) or expires <= 0:
+            continue  # Browser-session cookie
+        expiries.append(expires)
+        if any(keyword in cookie.get('name', '').lower() for keyword in AUTH_COOKIE_KEYWORDS):
+            auth_expiries.append(expires)
+    candidates = auth_expiries or expiries
+    return min(candidates) if candidates else None
+
+class SessionLifetimeEstimator:
+    """Predicted session lifetime and refresh times"""
+
+    def __init__(self, history_dbs=SESSION_HISTORY_DBS, quantile=SESSION_EXPIRY_QUANTILE,
+                 margin_minutes=SESSION_REFRESH_MARGIN_MINUTES, default_hours=DEFAULT_SESSION_LIFETIME_HOURS):
+        self.history_dbs = history_dbs
+        self.quantile = quantile
+        self.margin = margin_minutes * 60
+        self.default_hours = default_hours
+        self.observations = []
+        self.refresh()
+
+    def _read(self, db_path):
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            sessions = {}
+            if {'stealth_sessions', 'session_logs'} <= tables:
+                for profile_id, created_at in conn.execute('SELECT profile_id, created_at FROM stealth_sessions'):
+                    sessions[profile_id] = (_timestamp(created_at), [])
+                for profile_id, timestamp, result in conn.execute(
+                        "SELECT profile_id, timestamp, result FROM session_logs "
+                        "WHERE action = 'validation' AND result IN ('success', 'failed') ORDER BY timestamp"):
+                    if profile_id in sessions:
+                        sessions[profile_id][1].append((_timestamp(timestamp), result == 'success'))
+            if {'sessions', 'session_health'} <= tables:
+                for session_id, created_at in conn.execute('SELECT id, created_at FROM sessions'):
+                    sessions[session_id] = (_timestamp(created_at), [])
+                for session_id, timestamp, success in conn.execute(
+                        'SELECT session_id, timestamp, success FROM session_health ORDER BY timestamp'):
+                    if session_id in sessions:
+                        sessions[session_id][1].append((_timestamp(timestamp), bool(success)))
+        finally:
+            conn.close()
+        return [obs for obs in (_observations(created, checks) for created, checks in sessions.values()) if obs]
+
+    def refresh(self):
+        """Re-read the validation history"""
+        observations = []
+        for db_path in self.history_dbs:
+            if os.path.exists(db_path):
+                try:
+                    observations.extend(self._read(db_path))
+                except sqlite3.Error as e:
+                    print(f"⚠️ Could not read session history from {db_path}: {e}")
+        self.observations = observations
+        return len(observations)
+
+    def learned(self):
+        """True once enough sessions have been seen to expire to trust the estimate"""
+        return sum(1 for _, died in self.observations if died) >= MIN_LIFETIME_OBSERVATIONS
+
+    def lifetime_hours(self):
+        """Hours by which SESSION_EXPIRY_QUANTILE of sessions have expired (Kaplan-Meier); default if too little data"""
+        if not self.learned():
+            return self.default_hours
+
+        survival = 1.0
+        at_risk = len(self.observations)
+        for hours, died in sorted(self.observations, key=lambda obs: (obs[0], not obs[1])):
+            if died:
+                survival *= (at_risk - 1) / at_risk
+                if survival <= 1 - self.quantile:
+                    return max(hours, 0.25)
+            at_risk -= 1
+        # Too few deaths to reach the quantile - the longest survivor is still a safe bound
+        return max(hours for hours, _ in self.observations)
+
+    def predicted_expiry(self, created_at, cookies=None):
+        """Epoch seconds when a session created at created_at is expected to expire"""
+        created_at = _timestamp(created_at)
+        expiry = created_at + self.lifetime_hours() * 3600
+        hard_limit = cookie_expiry(cookies)
+        if hard_limit and hard_limit > created_at:
+            expiry = min(expiry, hard_limit)
+        return expiry
+
+    def refresh_at(self, created_at, cookies=None):
+        """When to refresh: the predicted expiry minus the safety margin"""
+        expiry = self.predicted_expiry(created_at, cookies)
+        created = _timestamp(created_at)
+        # Never schedule before the session is a quarter of the way through its life
+        return max(expiry - self.margin, created + (expiry - created) / 4)
+
+    def due_for_refresh(self, created_at, cookies=None, now=None):
+        return (now or time.time()) >= self.refresh_at(created_at, cookies)
+
+    def next_check_delay(self, created_at, cookies=None, max_delay=7200, min_delay=300, now=None):
+        """Seconds to sleep before the next check: until the refresh time, within [min_delay, max_delay]"""
+        delay = self.refresh_at(created_at, cookies) - (now or time.time())
+        return max(min_delay, min(max_delay, delay))
+
+if __name__ == "__main__":
+    estimator = SessionLifetimeEstimator()
+    expired = sum(1 for _, died in estimator.observations if died)
+    print(f"📊 {len(estimator.observations)} sessions observed ({expired} expired)")
+    print(f"⏳ Predicted lifetime: {estimator.lifetime_hours():.1f} hours "
+          f"(refresh {SESSION_REFRESH_MARGIN_MINUTES:.0f} min before)")
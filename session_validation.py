@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Concurrent Session Validation
+Checks a pool of sessions in parallel instead of one GET after another.
+first_valid() returns as soon as any session answers healthy, so failover
+takes as long as the fastest healthy session rather than the sum of every
+dead session's timeout. Validations that miss the deadline count as failed.
+
+Results are cached by cookie fingerprint for a short TTL in a small SQLite
+table shared between processes, so the same cookies are not re-checked
+against the load board several times in a row. A scraper that gets
+redirected to the login page marks its cookies invalid right away.
+"""
+
+import os
+import math
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from session_db import get_session_db
+
+SESSION_VALIDATION_WORKERS = int(os.getenv('SESSION_VALIDATION_WORKERS', 5))
+SESSION_VALIDATION_DEADLINE = float(os.getenv('SESSION_VALIDATION_DEADLINE', 15))
+SESSION_VALIDATION_TTL = int(os.getenv('SESSION_VALIDATION_TTL', 300))
+SESSION_VALIDATION_DB = os.getenv('SESSION_VALIDATION_DB', 'session_validation.db')
+
+def cookie_fingerprint(cookies):
+    """Stable hash of cookie names and values from a cookie string, a list of cookie dicts or a cookie jar"""
+    if isinstance(cookies, str):
+        pairs = [part.strip().split('=', 1) for part in cookies.split(';') if '=' in part]
+    elif isinstance(cookies, (list, tuple)):
+        pairs = [(cookie['name'], cookie['value']) for cookie in cookies]
+    else:
+        pairs = [(cookie.name, cookie.value) for cookie in cookies]
+    text = '; '.join(f"{name.strip()}={value.strip()}" for name, value in sorted(pairs))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class ValidationCache:
+    """Recent validation results by cookie fingerprint"""
+
+    def __init__(self, db_path=SESSION_VALIDATION_DB, ttl=SESSION_VALIDATION_TTL):
+        self.ttl = ttl
+        self.db = get_session_db(db_path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS validation_cache (
+                fingerprint TEXT PRIMARY KEY,
+                valid INTEGER,
+                checked_at REAL
+            ) WITHOUT ROWID
+        ''')
+
+    def get(self, cookies):
+        """Cached result (True/False) or None if unknown or stale"""
+        row = self.db.fetchone('SELECT valid, checked_at FROM validation_cache WHERE fingerprint = ?',
+                               (cookie_fingerprint(cookies),))
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return bool(row[0])
+
+    def put(self, cookies, valid):
+        self.db.execute('INSERT OR REPLACE INTO validation_cache (fingerprint, valid, checked_at) VALUES (?, ?, ?)',
+                        (cookie_fingerprint(cookies), int(valid), time.time()))
+
+    def invalidate(self, cookies):
+        """The site rejected these cookies - remember them as invalid"""
+        self.put(cookies, False)
+
+    def validate(self, cookies, check):
+        """Cached result, or check() (a live request) and remember its answer"""
+        cached = self.get(cookies)
+        if cached is not None:
+            return cached
+        valid = bool(check())
+        self.put(cookies, valid)
+        return valid
+
+_validation_cache = None
+_validation_cache_lock = threading.Lock()
+
+def get_validation_cache():
+    """Process-wide ValidationCache (pool workers may ask for it at the same time)"""
+    global _validation_cache
+    with _validation_cache_lock:
+        if _validation_cache is None:
+            _validation_cache = ValidationCache()
+        return _validation_cache
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def _executor(workers):
+    """Long-lived pool per size; its threads (and their per-thread DB connections) are reused across rounds"""
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='session-validation')
+        return _executors[workers]
+
+def _wait_budget(count, workers, deadline):
+    # Candidates beyond the worker count start late; give each wave its own deadline
+    return deadline * math.ceil(count / workers)
+
+def first_valid(candidates, validate, deadline=SESSION_VALIDATION_DEADLINE, workers=SESSION_VALIDATION_WORKERS):
+    """First candidate (by answer time) for which validate(candidate) is true; None if none is"""
+    candidates = list(candidates)
+    if not candidates:
+        return None
+    workers = max(1, workers)
+    executor = _executor(workers)
+    futures = {executor.submit(validate, candidate): candidate for candidate in candidates}
+    try:
+        for future in as_completed(futures, timeout=_wait_budget(len(candidates), workers, deadline)):
+            try:
+                if future.result():
+                    return futures[future]
+            except Exception as e:
+                print(f"⚠️ Session validation error: {e}")
+    except FuturesTimeout:
+        print(f"⏱️ Session validation deadline reached ({deadline:.0f}s)")
+    finally:
+        # Stragglers finish in the background; their result is no longer needed
+        for future in futures:
+            future.cancel()
+    return None
+
+def validate_all(candidates, validate, deadline=SESSION_VALIDATION_DEADLINE, workers=SESSION_VALIDATION_WORKERS):
+    """[(candidate, valid)] in input order, validated concurrently"""
+    candidates = list(candidates)
+    if not candidates:
+        return []
+    results = [False] * len(candidates)
+    workers = max(1, workers)
+    executor = _executor(workers)
+    futures = {executor.submit(validate, candidate): i for i, candidate in enumerate(candidates)}
+    try:
+        for future in as_completed(futures, timeout=_wait_budget(len(candidates), workers, deadline)):
+            try:
+                results[futures[future]] = bool(future.result())
+            except Exception as e:
+                print(f"⚠️ Session validation error: {e}")
+    except FuturesTimeout:
+        late = sum(1 for future in futures if not future.done())
+        print(f"⏱️ {late} session validations missed the {deadline:.0f}s deadline")
+    finally:
+        for future in futures:
+            future.cancel()
+    return list(zip(candidates, results))
@@ -14,6 +14,10 @@ from pathlib import Path
 
 from persistent_session_manager import AdvancedSessionManager
 from stealth_session_keeper import StealthSessionKeeper
+from session_validation import get_validation_cache
+from session_lifetime import SessionLifetimeEstimator
+
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
 
 class SmartSessionIntegration:
     def __init__(self, username: str = None, password: str = None):
@@ -23,6 +27,7 @@ class SmartSessionIntegration:
         self.stealth_keeper = StealthSessionKeeper()
         self.monitoring_active = False
         self.last_cookie_update = None
+        self.lifetime = SessionLifetimeEstimator()
         
         # Load credentials from environment if not provided
         if not self.username:
@@ -62,27 +67,30 @@ class SmartSessionIntegration:
         return None
     
     def validate_cookie_string(self, cookie_string: str) -> bool:
-        """Validate cookie string by testing API access"""
+        """Validate cookie string by testing API access (cookies checked moments ago are not re-requested)"""
         try:
-            import requests
-            
-            headers = {
-                'Cookie': cookie_string,
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-            }
-            
-            response = requests.get(
-                'https://www.sylectus.com/II14_managepostedloads.asp',
-                headers=headers,
-                timeout=10
-            )
-            
-            return response.status_code == 200 and 'Login.aspx' not in response.url
+            return get_validation_cache().validate(cookie_string, lambda: self._check_cookie_string(cookie_string))
             
         except Exception as e:
             print(f"⚠️ Cookie validation failed: {e}")
             return False
     
+    def _check_cookie_string(self, cookie_string: str) -> bool:
+        import requests
+        
+        headers = {
+            'Cookie': cookie_string,
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+        }
+        
+        response = requests.get(
+            'https://www.sylectus.com/II14_managepostedloads.asp',
+            headers=headers,
+            timeout=10
+        )
+        
+        return response.status_code == 200 and 'Login.aspx' not in response.url
+    
     def update_scraper_cookies(self, cookie_string: str):
         """Update the .env file with fresh cookies"""
         try:
@@ -163,7 +171,7 @@ class SmartSessionIntegration:
             subprocess.run([
                 'ssh', '-i', str(ssh_key),
                 'root@157.245.242.222',
-                'cd /opt/sylectus-scraper && nohup python3 api_scraper.py --startup > /tmp/scraper.log 2>&1 &'
+                'cd /opt/sylectus-scraper && nohup python3 api_scraper.py > /tmp/scraper.log 2>&1 &'
             ], timeout=30)
             
             print("🔄 Scraper restarted with fresh cookies")
@@ -173,13 +181,38 @@ class SmartSessionIntegration:
             print(f"❌ Failed to restart scraper: {e}")
             return False
     
+    def cookie_started_at(self):
+        """When the scraper's current cookies were issued (last update, else the local .env mtime)"""
+        if self.last_cookie_update:
+            return self.last_cookie_update.timestamp()
+        local_env = Path(".env")
+        if local_env.exists():
+            return local_env.stat().st_mtime
+        return None
+    
+    def refresh_before_expiry(self) -> bool:
+        """Log in again and hand the scraper new cookies before the current ones expire"""
+        print(f"⏰ Session is near its predicted {self.lifetime.lifetime_hours():.1f} hour lifetime, refreshing early...")
+        session = self.session_manager.create_new_session(self.username, self.password)
+        # Use the new login's cookies - the pool would still hand back the old, still-valid session
+        cookie_string = "; ".join(f"{c['name']}={c['value']}" for c in session['cookies']) if session else None
+        if not cookie_string:
+            print("❌ Proactive session refresh failed")
+            return False
+        
+        self.update_scraper_cookies(cookie_string)
+        if self.restart_scraper():
+            print("✅ Scraper switched to a fresh session")
+        return True
+    
     def monitor_and_refresh(self, check_interval: int = 7200):  # 2 hours
-        """Monitor sessions and refresh as needed"""
+        """Monitor sessions and refresh as needed (at most check_interval apart, sooner near the predicted expiry)"""
         print(f"👁️ Starting session monitor (checking every {check_interval/3600:.1f} hours)")
         
         while self.monitoring_active:
             try:
                 print(f"\n🔍 Session health check - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                sleep_seconds = check_interval
                 
                 # Check if current scraper is working
                 scraper_working = self.check_scraper_health()
@@ -204,13 +237,22 @@ class SmartSessionIntegration:
                         self.send_alert("Cookie refresh failed - manual intervention needed")
                 else:
                     print("✅ Scraper appears to be working normally")
+                    
+                    # Refresh ahead of the lifetime learned from past sessions
+                    self.lifetime.refresh()
+                    started_at = self.cookie_started_at()
+                    if started_at and self.username and self.password:
+                        if self.lifetime.due_for_refresh(started_at):
+                            self.refresh_before_expiry()
+                        else:
+                            sleep_seconds = self.lifetime.next_check_delay(started_at, max_delay=check_interval)
                 
                 # Maintain session pools
                 self.session_manager.cleanup_expired_sessions()
                 self.stealth_keeper.maintain_sessions()
                 
-                print(f"💤 Sleeping for {check_interval/3600:.1f} hours...")
-                time.sleep(check_interval)
+                print(f"💤 Sleeping for {sleep_seconds/3600:.1f} hours...")
+                time.sleep(sleep_seconds)
                 
             except Exception as e:
                 print(f"❌ Monitor error: {e}")
@@ -265,7 +307,7 @@ class SmartSessionIntegration:
             bot_token = "6331983207:AAEzrXpH7ISNP7dz9ZgXBfBadE6TpDxWwLw"
             chat_id = "6547104920"
             
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+            url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
             payload = {
                 'chat_id': chat_id,
                 'text': f"🚨 SESSION ALERT\n\n{message}\n\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Group-Committed State Writer
+Buffers dedup marks and load detail records for a monitoring cycle and
+commits them together with a single fsync. Load details go to the
+compressed load archive as one batch per cycle. Every write is first appended to
+a small write-ahead journal that is replayed after a crash, so an alerted
+load is never lost from dedup.
+
+With a background writer, dedup marks are still applied at commit but the
+archive write is handed off: the cycle's journal is renamed aside and only
+removed once its load details have been archived.
+"""
+
+import os
+import glob
+import json
+import time
+from datetime import datetime
+from load_archive import LoadArchive
+
+STATE_JOURNAL_FILE = os.getenv('STATE_JOURNAL_FILE', 'state_journal.log')
+
+class StateWriter:
+    """Per-cycle write buffer with a write-ahead journal"""
+
+    def __init__(self, dedup, journal_file=STATE_JOURNAL_FILE, archive=None, writer=None):
+        self.dedup = dedup
+        self.archive = archive or LoadArchive()
+        self.writer = writer
+        self.last_rotation = 0
+        self.journal_file = journal_file
+        self.pending_marks = []
+        self.pending_keys = set()
+        self.pending_details = []
+
+        self.replay()
+        self.journal = open(journal_file, 'a', encoding='utf-8')
+
+    def _rotated_journals(self):
+        """Journals set aside for a background write that had not finished, oldest first"""
+        rotated = [path for path in glob.glob(f"{self.journal_file}.*") if path.rsplit('.', 1)[1].isdigit()]
+        return sorted(rotated, key=lambda path: int(path.rsplit('.', 1)[1]))
+
+    def replay(self):
+        """Apply writes left in the journal by a crashed run"""
+        rotated = self._rotated_journals()
+        marks = []
+        details = []
+        for path in rotated + [self.journal_file]:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                continue
+
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn final write - everything before it is intact
+                if entry.get('op') == 'mark':
+                    marks.append(entry['key'])
+                elif entry.get('op') == 'details':
+                    details.append(entry['record'])
+
+        if marks or details:
+            self.dedup.mark_many(marks)
+            self.write_load_details(details)
+            print(f"♻️ Replayed state journal: {len(marks)} dedup marks, {len(details)} load records")
+
+        open(self.journal_file, 'w').close()
+        for path in rotated:
+            os.remove(path)
+
+    def _journal(self, entry):
+        # Reaches the OS right away (survives a process crash); fsync waits for commit()
+        self.journal.write(json.dumps(entry) + '\n')
+        self.journal.flush()
+
+    def seen(self, key):
+        """Dedup check that includes marks staged this cycle"""
+        return key in self.pending_keys or self.dedup.seen(key)
+
+    def mark_sent(self, key):
+        """Stage a dedup mark for the current cycle"""
+        self._journal({'op': 'mark', 'key': key})
+        self.pending_marks.append(key)
+        self.pending_keys.add(key)
+
+    def stage_load_details(self, load_info):
+        """Stage a load detail record for the current cycle"""
+        record = {
+            'saved_at': datetime.now().strftime("%Y%m%d_%H%M%S"),
+            'load_info': load_info
+        }
+        self._journal({'op': 'details', 'record': record})
+        self.pending_details.append(record)
+
+    def write_load_details(self, records):
+        """Append load detail records to the archive (the index keeps the latest copy, so replay is idempotent)"""
+        try:
+            self.archive.append_many(records)
+        except Exception as e:
+            print(f"❌ Error saving load details: {e}")
+
+    def commit(self):
+        """Make the cycle's writes durable as one group"""
+        if not self.pending_marks and not self.pending_details:
+            return 0
+
+        start_time = time.time()
+        count = len(self.pending_marks) + len(self.pending_details)
+
+        # Single fsync for the whole cycle - the journal is now the durable copy
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+        if self.writer is None:
+            self.dedup.mark_many(self.pending_marks)
+            self.write_load_details(self.pending_details)
+
+            # Everything is applied, the journal can start over
+            self.journal.truncate(0)
+        else:
+            # Marks stay synchronous so seen() is exact on the next cycle
+            self.dedup.mark_many(self.pending_marks)
+            if self.pending_details:
+                self._hand_off_details(self.pending_details)
+            else:
+                self.journal.truncate(0)
+        self.pending_marks = []
+        self.pending_keys = set()
+        self.pending_details = []
+
+        print(f"💾 Committed {count} state writes in {time.time() - start_time:.3f}s")
+        return count
+
+    def _hand_off_details(self, records):
+        """Set the cycle's journal aside and archive its details on the writer thread"""
+        self.journal.close()
+        # Millisecond sequence numbers keep rotated journals unique and ordered
+        self.last_rotation = max(int(time.time() * 1000), self.last_rotation + 1)
+        rotated = f"{self.journal_file}.{self.last_rotation}"
+        os.replace(self.journal_file, rotated)
+        self.journal = open(self.journal_file, 'a', encoding='utf-8')
+        self.writer.submit(self._archive_rotated, records, rotated, label='load details')
+
+    def _archive_rotated(self, records, rotated):
+        self.archive.append_many(records)
+        os.remove(rotated)
+
+    def close(self):
+        """Commit anything pending, wait for handed-off writes and close the journal"""
+        self.commit()
+        if self.writer is not None:
+            self.writer.flush()
+        self.journal.close()
+        self.archive.close()
@@ -118,7 +118,8 @@ def show_file_status():
         'mcp_firecrawl_client.py': 'Firecrawl client',
         'venv/': 'Virtual environment',
         'data/': 'Data directory',
-        'sent_items.txt': 'Sent items tracking'
+        'dedup_store.db': 'Sent items dedup store',
+        'telegram_outbox.db': 'Queued Telegram messages'
     }
     
     for file_path, description in important_files.items():
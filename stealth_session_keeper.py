@@ -12,11 +12,18 @@ import os
 import json
 import time
 import random
-import sqlite3
 import requests
 import subprocess
 from datetime import datetime, timedelta
 from pathlib import Path
+from session_db import get_session_db
+from session_validation import first_valid, validate_all, get_validation_cache
+
+LOG_ACTIVITY_SQL = '''
+    INSERT INTO session_logs
+    (profile_id, timestamp, action, result, response_time, error_details)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
 
 class StealthSessionKeeper:
     def __init__(self):
@@ -24,13 +31,15 @@ class StealthSessionKeeper:
         self.profiles_dir = Path("stealth_profiles")
         self.profiles_dir.mkdir(exist_ok=True)
         self.db_path = "stealth_sessions.db"
+        self.db = get_session_db(self.db_path)
         self.init_database()
         
     def init_database(self):
         """Initialize session database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self.db.transaction() as cursor:
+            self._create_tables(cursor)
+    
+    def _create_tables(self, cursor):
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS stealth_sessions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,8 +67,10 @@ class StealthSessionKeeper:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Indexes for the pool scans and per-profile lookups
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stealth_status ON stealth_sessions (status, last_validated)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stealth_last_validated ON stealth_sessions (last_validated)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_logs_profile ON session_logs (profile_id, timestamp)')
     
     def create_undetected_session(self, username: str, password: str) -> str:
         """Create new undetected browser session"""
@@ -300,10 +311,7 @@ class StealthSessionKeeper:
     
     def save_session_data(self, profile_id: str, cookies: list, session_data: dict, user_agent: str):
         """Save session data to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self.db.execute('''
             INSERT OR REPLACE INTO stealth_sessions 
             (profile_id, cookies, session_data, user_agent, created_at, last_validated)
             VALUES (?, ?, ?, ?, ?, ?)
@@ -315,98 +323,78 @@ class StealthSessionKeeper:
             datetime.now(),
             datetime.now()
         ))
-        
-        conn.commit()
-        conn.close()
     
     def validate_session(self, profile_id: str) -> bool:
         """Validate if a session is still active"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            result = self.db.fetchone('''
                 SELECT cookies, user_agent FROM stealth_sessions 
                 WHERE profile_id = ? AND status = 'active'
             ''', (profile_id,))
             
-            result = cursor.fetchone()
-            conn.close()
-            
             if not result:
                 return False
             
             cookies_json, user_agent = result
             cookies = json.loads(cookies_json)
             
-            # Test session with requests
-            session = requests.Session()
-            
-            # Set cookies
-            for cookie in cookies:
-                session.cookies.set(
-                    cookie['name'], 
-                    cookie['value'], 
-                    domain=cookie.get('domain', '.sylectus.com')
-                )
-            
-            # Set headers
-            session.headers.update({
-                'User-Agent': user_agent,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            })
-            
-            # Test API endpoint
-            start_time = time.time()
-            response = session.get(f"{self.base_url}/II14_managepostedloads.asp", timeout=15)
-            response_time = time.time() - start_time
-            
-            # Log the validation attempt
-            self.log_session_activity(profile_id, "validation", 
-                                    "success" if response.status_code == 200 and "Login.aspx" not in response.url else "failed",
-                                    response_time)
-            
-            # Update validation timestamp
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE stealth_sessions 
-                SET last_validated = ?, validation_count = validation_count + 1
-                WHERE profile_id = ?
-            ''', (datetime.now(), profile_id))
-            conn.commit()
-            conn.close()
-            
-            return response.status_code == 200 and "Login.aspx" not in response.url
+            # Recently checked cookies are answered from the cache
+            return get_validation_cache().validate(
+                cookies, lambda: self._check_session(profile_id, cookies, user_agent))
             
         except Exception as e:
             self.log_session_activity(profile_id, "validation", "error", 0, str(e))
             return False
     
-    def log_session_activity(self, profile_id: str, action: str, result: str, response_time: float, error_details: str = None):
-        """Log session activity for monitoring"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _check_session(self, profile_id: str, cookies: list, user_agent: str) -> bool:
+        """Live validation request for a stored session"""
+        # Test session with requests
+        session = requests.Session()
         
-        cursor.execute('''
-            INSERT INTO session_logs 
-            (profile_id, timestamp, action, result, response_time, error_details)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (profile_id, datetime.now(), action, result, response_time, error_details))
+        # Set cookies
+        for cookie in cookies:
+            session.cookies.set(
+                cookie['name'], 
+                cookie['value'], 
+                domain=cookie.get('domain', '.sylectus.com')
+            )
+        
+        # Set headers
+        session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1'
+        })
+        
+        # Test API endpoint
+        start_time = time.time()
+        response = session.get(f"{self.base_url}/II14_managepostedloads.asp", timeout=15)
+        response_time = time.time() - start_time
         
-        conn.commit()
-        conn.close()
+        # Log the validation attempt
+        self.log_session_activity(profile_id, "validation", 
+                                "success" if response.status_code == 200 and "Login.aspx" not in response.url else "failed",
+                                response_time)
+        
+        # Update validation timestamp
+        self.db.execute('''
+            UPDATE stealth_sessions 
+            SET last_validated = ?, validation_count = validation_count + 1
+            WHERE profile_id = ?
+        ''', (datetime.now(), profile_id))
+        
+        return response.status_code == 200 and "Login.aspx" not in response.url
+    
+    def log_session_activity(self, profile_id: str, action: str, result: str, response_time: float, error_details: str = None):
+        """Log session activity for monitoring (written in batches)"""
+        self.db.log(LOG_ACTIVITY_SQL, (profile_id, datetime.now(), action, result, response_time, error_details))
     
     def get_best_session(self) -> str:
         """Get the best performing active session"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Get sessions ordered by success rate and recency
-        cursor.execute('''
+        sessions = self.db.fetchall('''
             SELECT profile_id, validation_count, last_validated
             FROM stealth_sessions 
             WHERE status = 'active' 
@@ -414,29 +402,16 @@ class StealthSessionKeeper:
             LIMIT 5
         ''')
         
-        sessions = cursor.fetchall()
-        conn.close()
-        
-        # Test each session until we find a valid one
-        for profile_id, validation_count, last_validated in sessions:
-            if self.validate_session(profile_id):
-                return profile_id
-        
-        return None
+        # Test them all at once - the first healthy answer wins
+        return first_valid([profile_id for profile_id, _, _ in sessions], self.validate_session)
     
     def get_session_cookies(self, profile_id: str) -> str:
         """Get session cookies as string for scraper"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        result = self.db.fetchone('''
             SELECT cookies FROM stealth_sessions 
             WHERE profile_id = ? AND status = 'active'
         ''', (profile_id,))
         
-        result = cursor.fetchone()
-        conn.close()
-        
         if result:
             cookies = json.loads(result[0])
             cookie_string = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
@@ -446,40 +421,29 @@ class StealthSessionKeeper:
     
     def maintain_sessions(self, max_sessions: int = 3):
         """Maintain a pool of active sessions"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Count active sessions
-        cursor.execute('SELECT COUNT(*) FROM stealth_sessions WHERE status = "active"')
-        active_count = cursor.fetchone()[0]
-        
-        # Clean up expired sessions
-        cursor.execute('''
-            UPDATE stealth_sessions 
-            SET status = 'expired' 
-            WHERE last_validated < ? AND status = 'active'
-        ''', (datetime.now() - timedelta(hours=24),))
-        
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            # Count active sessions
+            cursor.execute("SELECT COUNT(*) FROM stealth_sessions WHERE status = 'active'")
+            active_count = cursor.fetchone()[0]
+            
+            # Clean up expired sessions
+            cursor.execute('''
+                UPDATE stealth_sessions 
+                SET status = 'expired' 
+                WHERE last_validated < ? AND status = 'active'
+            ''', (datetime.now() - timedelta(hours=24),))
         
         print(f"📊 Active sessions: {active_count}")
         
-        # Test existing sessions
-        valid_sessions = []
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT profile_id FROM stealth_sessions WHERE status = "active"')
-        
-        for (profile_id,) in cursor.fetchall():
-            if self.validate_session(profile_id):
-                valid_sessions.append(profile_id)
-            else:
-                # Mark as expired
-                cursor.execute('UPDATE stealth_sessions SET status = "expired" WHERE profile_id = ?', (profile_id,))
+        # Test existing sessions concurrently
+        profile_ids = [row[0] for row in self.db.fetchall("SELECT profile_id FROM stealth_sessions WHERE status = 'active'")]
+        results = validate_all(profile_ids, self.validate_session)
+        valid_sessions = [profile_id for profile_id, valid in results if valid]
+        expired = [(profile_id,) for profile_id, valid in results if not valid]
         
-        conn.commit()
-        conn.close()
+        # Mark failed sessions as expired in one batch
+        self.db.executemany("UPDATE stealth_sessions SET status = 'expired' WHERE profile_id = ?", expired)
+        self.db.flush_logs()
         
         print(f"✅ Valid sessions: {len(valid_sessions)}")
         return valid_sessions
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Subscriber Registry and Filter Index
+Routes each load to the chats whose filters match. Filters are compiled into
+indexes by origin state and vehicle type, so matching a load only looks at
+the subscribers in its buckets instead of testing every subscriber.
+
+subscribers.json:
+[
+  {"name": "Dallas sprinters", "chat_id": "123456",
+   "origin_states": ["TX"], "origin_radius": {"state": "OK", "miles": 250},
+   "destination_states": [], "vehicle_types": ["SPRINTER"],
+   "min_miles": 200, "min_credit_score": 80}
+]
+
+Without a subscribers file every load goes to TELEGRAM_CHAT_ID, as before.
+"""
+
+import os
+import re
+import json
+import math
+from dotenv import load_dotenv
+from load_keys import normalize_field, split_city_state
+
+load_dotenv()
+
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+SUBSCRIBERS_FILE = os.getenv('SUBSCRIBERS_FILE', 'subscribers.json')
+
+# Approximate geographic centers; radius filters are resolved at state level
+STATE_CENTROIDS = {
+    'AL': (32.8, -86.8), 'AK': (64.2, -152.5), 'AZ': (34.2, -111.7), 'AR': (34.9, -92.4),
+    'CA': (37.2, -119.5), 'CO': (39.0, -105.5), 'CT': (41.6, -72.7), 'DE': (39.0, -75.5),
+    'DC': (38.9, -77.0), 'FL': (28.6, -82.4), 'GA': (32.7, -83.4), 'HI': (20.8, -156.3),
+    'ID': (44.4, -114.6), 'IL': (40.0, -89.2), 'IN': (39.9, -86.3), 'IA': (42.1, -93.5),
+    'KS': (38.5, -98.4), 'KY': (37.5, -85.3), 'LA': (31.1, -92.0), 'ME': (45.4, -69.2),
+    'MD': (39.0, -76.8), 'MA': (42.3, -71.8), 'MI': (44.3, -85.4), 'MN': (46.3, -94.3),
+    'MS': (32.7, -89.7), 'MO': (38.4, -92.5), 'MT': (47.0, -109.6), 'NE': (41.5, -99.8),
+    'NV': (39.3, -116.6), 'NH': (43.7, -71.6), 'NJ': (40.2, -74.7), 'NM': (34.4, -106.1),
+    'NY': (42.9, -75.5), 'NC': (35.6, -79.4), 'ND': (47.5, -100.5), 'OH': (40.3, -82.8),
+    'OK': (35.6, -97.5), 'OR': (43.9, -120.6), 'PA': (40.9, -77.8), 'RI': (41.7, -71.5),
+    'SC': (33.9, -80.9), 'SD': (44.4, -100.2), 'TN': (35.9, -86.4), 'TX': (31.5, -99.3),
+    'UT': (39.3, -111.7), 'VT': (44.1, -72.7), 'VA': (37.5, -78.9), 'WA': (47.4, -120.5),
+    'WV': (38.6, -80.6), 'WI': (44.6, -89.9), 'WY': (43.0, -107.6)
+}
+
+def miles_between(a, b):
+    """Great-circle distance in miles between two (lat, lon) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 3959 * 2 * math.asin(math.sqrt(h))
+
+def states_within(state, radius_miles):
+    """States whose centers lie within the radius of a state's center (always includes the state)"""
+    state = normalize_field(state)
+    center = STATE_CENTROIDS.get(state)
+    if center is None:
+        return {state} if state else set()
+    return {code for code, point in STATE_CENTROIDS.items() if miles_between(center, point) <= radius_miles} | {state}
+
+def _number(value):
+    match = re.search(r'\d+(?:\.\d+)?', str(value or '').replace(',', ''))
+    return float(match.group()) if match else None
+
+def load_state(load_info, prefix):
+    """State for pickup/delivery from either a state field or a "CITY, ST" city field"""
+    state = normalize_field(load_info.get(f'{prefix}_state'))
+    if state:
+        return state
+    return split_city_state(load_info.get(f'{prefix}_city'))[1]
+
+class Subscriber:
+    """One chat and its compiled filters"""
+
+    def __init__(self, config):
+        self.chat_id = str(config['chat_id'])
+        self.name = config.get('name', self.chat_id)
+
+        origin_states = {normalize_field(s) for s in config.get('origin_states', [])}
+        radius = config.get('origin_radius')
+        if radius:
+            origin_states |= states_within(radius.get('state'), float(radius.get('miles', 0)))
+        self.origin_states = origin_states - {''}
+
+        self.destination_states = {normalize_field(s) for s in config.get('destination_states', [])} - {''}
+        self.vehicle_types = {normalize_field(v) for v in config.get('vehicle_types', [])} - {''}
+        self.min_miles = config.get('min_miles')
+        self.max_miles = config.get('max_miles')
+        self.min_credit_score = config.get('min_credit_score')
+
+    def accepts(self, load_info):
+        """Residual checks not covered by the index (unknown values fail a set filter)"""
+        if self.destination_states and load_state(load_info, 'delivery') not in self.destination_states:
+            return False
+
+        if self.min_miles is not None or self.max_miles is not None:
+            miles = _number(load_info.get('miles'))
+            if miles is None:
+                return False
+            if self.min_miles is not None and miles < self.min_miles:
+                return False
+            if self.max_miles is not None and miles > self.max_miles:
+                return False
+
+        if self.min_credit_score is not None:
+            credit = _number(load_info.get('credit_score'))
+            if credit is None or credit < self.min_credit_score:
+                return False
+
+        return True
+
+class SubscriberRegistry:
+    """Subscribers indexed by origin state and vehicle type"""
+
+    def __init__(self, subscribers_file=SUBSCRIBERS_FILE, default_chat_id=TELEGRAM_CHAT_ID):
+        self.subscribers_file = subscribers_file
+        self.default_chat_id = default_chat_id
+        self.loaded_mtime = None
+        self.subscribers = []
+        self.by_origin = {}
+        self.any_origin = set()
+        self.by_vehicle = {}
+        self.any_vehicle = set()
+        self.refresh()
+
+    def refresh(self):
+        """(Re)load subscribers.json when it changes; cheap to call every cycle"""
+        try:
+            mtime = os.path.getmtime(self.subscribers_file)
+        except OSError:
+            mtime = None
+
+        if mtime == self.loaded_mtime and self.subscribers:
+            return
+
+        configs = []
+        if mtime is not None:
+            try:
+                with open(self.subscribers_file, 'r') as f:
+                    configs = [c for c in json.load(f) if c.get('enabled', True)]
+            except Exception as e:
+                print(f"❌ Error loading subscribers: {e}")
+                if self.subscribers:
+                    return  # Keep the last good configuration
+
+        if not configs and self.default_chat_id:
+            configs = [{'chat_id': self.default_chat_id, 'name': 'default'}]
+
+        self.compile([Subscriber(config) for config in configs])
+        self.loaded_mtime = mtime
+        print(f"👥 {len(self.subscribers)} subscribers loaded")
+
+    def compile(self, subscribers):
+        """Build the state and vehicle indexes"""
+        self.subscribers = subscribers
+        self.by_origin = {}
+        self.any_origin = set()
+        self.by_vehicle = {}
+        self.any_vehicle = set()
+
+        for idx, subscriber in enumerate(subscribers):
+            if subscriber.origin_states:
+                for state in subscriber.origin_states:
+                    self.by_origin.setdefault(state, set()).add(idx)
+            else:
+                self.any_origin.add(idx)
+
+            if subscriber.vehicle_types:
+                for vehicle in subscriber.vehicle_types:
+                    self.by_vehicle.setdefault(vehicle, set()).add(idx)
+            else:
+                self.any_vehicle.add(idx)
+
+    def match(self, load_info):
+        """Chat ids that should receive this load"""
+        origin_matches = self.any_origin | self.by_origin.get(load_state(load_info, 'pickup'), set())
+        if not origin_matches:
+            return []
+
+        # Vehicle filters match as keywords ("SPRINTER" matches "SPRINTER VAN")
+        vehicle = normalize_field(load_info.get('vehicle_type'))
+        vehicle_matches = set(self.any_vehicle)
+        if vehicle:
+            for keyword, indexes in self.by_vehicle.items():
+                if keyword in vehicle:
+                    vehicle_matches |= indexes
+
+        chat_ids = []
+        for idx in sorted(origin_matches & vehicle_matches):
+            subscriber = self.subscribers[idx]
+            if subscriber.accepts(load_info) and subscriber.chat_id not in chat_ids:
+                chat_ids.append(subscriber.chat_id)
+        return chat_ids
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Telegram Interaction Service
+Long-polls getUpdates in its own thread and dispatches inline button presses
+right away, so BID/SKIP/Stop Loads work while the scraper keeps polling.
+The update offset and paused chats are persisted across restarts.
+
+Callbacks:  bid_<key>  skip_<key>  contact_<key>  stop_loads  (+ handlers registered by scrapers)
+Commands:   /resume  /pause
+"""
+
+import os
+import json
+import time
+import requests
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from board_snapshot import summarize_load
+
+load_dotenv()
+
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+TELEGRAM_UPDATES_STATE_FILE = os.getenv('TELEGRAM_UPDATES_STATE_FILE', 'telegram_updates.json')
+BID_QUEUE_FILE = os.getenv('BID_QUEUE_FILE', 'bid_queue.jsonl')
+TELEGRAM_POLL_TIMEOUT = 30  # Long-poll seconds
+RECENT_LOADS = 2000  # Alerted loads remembered for button lookups
+
+def load_keyboard(key, contact_email=None):
+    """BID / SKIP / Stop Loads / Contact Dispatcher buttons for a load alert"""
+    if contact_email and '@' in contact_email:
+        contact_button = {'text': 'Contact Dispatcher', 'url': f'mailto:{contact_email}'}
+    else:
+        contact_button = {'text': 'Contact Dispatcher', 'callback_data': f'contact_{key}'}
+    return {
+        'inline_keyboard': [
+            [
+                {'text': 'BID', 'callback_data': f'bid_{key}'},
+                {'text': 'SKIP', 'callback_data': f'skip_{key}'}
+            ],
+            [
+                {'text': 'Stop Loads', 'callback_data': 'stop_loads'},
+                contact_button
+            ]
+        ]
+    }
+
+class TelegramInteractions:
+    """getUpdates long-poller with callback and command dispatch"""
+
+    def __init__(self, outbox, dedup=None, bot_token=TELEGRAM_BOT_TOKEN,
+                 state_file=TELEGRAM_UPDATES_STATE_FILE, bid_queue_file=BID_QUEUE_FILE, api_base=TELEGRAM_API_BASE):
+        self.outbox = outbox
+        self.dedup = dedup
+        self.api_url = f"{api_base}/bot{bot_token}"
+        self.state_file = state_file
+        self.bid_queue_file = bid_queue_file
+        self.http = requests.Session()
+        self.stop_event = threading.Event()
+        self.poller = None
+
+        self.offset = 0
+        self.paused_chats = set()
+        self.recent = OrderedDict()
+        self.load_state()
+
+        # Callback prefix -> handler(chat_id, argument, callback_query) returning the answer text
+        self.handlers = {}
+        self.register('bid_', self.handle_bid)
+        self.register('skip_', self.handle_skip)
+        self.register('contact_', self.handle_contact)
+        self.register('stop_loads', self.handle_stop_loads)
+
+    def register(self, prefix, handler):
+        self.handlers[prefix] = handler
+
+    def load_state(self):
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+            self.offset = data.get('offset', 0)
+            self.paused_chats = set(data.get('paused_chats', []))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not load Telegram update state: {e}")
+
+    def save_state(self):
+        """Write offset and paused chats atomically"""
+        try:
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({'offset': self.offset, 'paused_chats': sorted(self.paused_chats)}, f)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"❌ Error saving Telegram update state: {e}")
+
+    def remember(self, key, load_info):
+        """Keep an alerted load so its buttons can look it up"""
+        self.recent[key] = summarize_load(load_info)
+        self.recent[key]['email'] = load_info.get('contact_email') or load_info.get('email', 'Unknown')
+        self.recent.move_to_end(key)
+        while len(self.recent) > RECENT_LOADS:
+            self.recent.popitem(last=False)
+
+    def active_chats(self, chat_ids):
+        """Chats that have not paused alerts"""
+        return [chat_id for chat_id in chat_ids if str(chat_id) not in self.paused_chats]
+
+    def alerts_paused(self, chat_id):
+        return str(chat_id) in self.paused_chats
+
+    # Built-in handlers
+
+    def handle_bid(self, chat_id, key, callback_query):
+        load = self.recent.get(key, {})
+        action = {
+            'queued_at': time.time(),
+            'key': key,
+            'load': load,
+            'chat_id': chat_id,
+            'user': callback_query.get('from', {}).get('username') or callback_query.get('from', {}).get('id'),
+            'message_text': callback_query.get('message', {}).get('text')
+        }
+        with open(self.bid_queue_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(action) + '\n')
+        print(f"💵 Bid queued for load {load.get('load_id', key)}")
+        return "💵 Bid queued"
+
+    def handle_skip(self, chat_id, key, callback_query):
+        if self.dedup is not None:
+            self.dedup.mark(key)
+
+        # Drop the buttons so the alert reads as handled
+        message = callback_query.get('message', {})
+        if message.get('message_id'):
+            self.outbox.enqueue_request('editMessageReplyMarkup', {
+                'chat_id': chat_id,
+                'message_id': message['message_id'],
+                'reply_markup': json.dumps({'inline_keyboard': []})
+            })
+        return "⏭️ Skipped"
+
+    def handle_contact(self, chat_id, key, callback_query):
+        email = self.recent.get(key, {}).get('email', 'Unknown')
+        if email in ('Unknown', 'Not provided', None):
+            return "📧 No email on file - contact via Sylectus"
+        return f"📧 {email}"
+
+    def handle_stop_loads(self, chat_id, argument, callback_query):
+        self.paused_chats.add(str(chat_id))
+        self.save_state()
+        self.outbox.enqueue("⏸️ Load alerts paused for this chat. Send /resume to turn them back on.", chat_id=chat_id)
+        return "⏸️ Alerts paused"
+
+    # Dispatch
+
+    def answer_callback(self, callback_id, text):
+        """Answer directly (not via the outbox) - Telegram expects it within seconds"""
+        try:
+            self.http.post(f"{self.api_url}/answerCallbackQuery",
+                           data={'callback_query_id': callback_id, 'text': text[:200]}, timeout=10)
+        except Exception as e:
+            print(f"⚠️ Could not answer callback: {e}")
+
+    def handle_callback(self, callback_query):
+        data = callback_query.get('data', '')
+        chat_id = str(callback_query.get('message', {}).get('chat', {}).get('id', ''))
+
+        answer = "⚠️ Unknown action"
+        for prefix, handler in self.handlers.items():
+            if data.startswith(prefix):
+                try:
+                    answer = handler(chat_id, data[len(prefix):], callback_query) or ""
+                except Exception as e:
+                    print(f"❌ Error handling {data}: {e}")
+                    answer = "❌ Action failed"
+                break
+        self.answer_callback(callback_query.get('id'), answer)
+
+    def handle_message(self, message):
+        chat_id = str(message.get('chat', {}).get('id', ''))
+        command = message.get('text', '').strip().split('@')[0].lower()
+
+        if command == '/resume' and chat_id in self.paused_chats:
+            self.paused_chats.discard(chat_id)
+            self.save_state()
+            self.outbox.enqueue("▶️ Load alerts resumed.", chat_id=chat_id)
+        elif command == '/pause':
+            self.handle_stop_loads(chat_id, '', {})
+
+    def poll_once(self):
+        """One getUpdates long-poll; returns the number of updates handled"""
+        response = self.http.get(f"{self.api_url}/getUpdates", params={
+            'offset': self.offset,
+            'timeout': TELEGRAM_POLL_TIMEOUT,
+            'allowed_updates': json.dumps(['callback_query', 'message'])
+        }, timeout=TELEGRAM_POLL_TIMEOUT + 10)
+        response.raise_for_status()
+
+        updates = response.json().get('result', [])
+        for update in updates:
+            if 'callback_query' in update:
+                self.handle_callback(update['callback_query'])
+            elif 'message' in update:
+                self.handle_message(update['message'])
+            self.offset = update['update_id'] + 1
+
+        if updates:
+            self.save_state()
+        return len(updates)
+
+    def _poll_loop(self):
+        failures = 0
+        while not self.stop_event.is_set():
+            try:
+                self.poll_once()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(60, 2 ** failures)
+                print(f"⚠️ Telegram getUpdates error: {e} (retrying in {delay}s)")
+                self.stop_event.wait(delay)
+
+    def start(self):
+        """Start the long-polling thread"""
+        if self.poller and self.poller.is_alive():
+            return
+        self.stop_event.clear()
+        self.poller = threading.Thread(target=self._poll_loop, daemon=True)
+        self.poller.start()
+        print("🎛️ Telegram interaction service started")
+
+    def stop(self):
+        """Stop polling (an in-flight long-poll is abandoned; the offset is already saved)"""
+        self.stop_event.set()
+        self.save_state()
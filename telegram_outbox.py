@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Persisted Telegram Outbox
+Messages are written to a SQLite queue and delivered by a dedicated sender
+thread that enforces Telegram's global and per-chat rate limits with token
+buckets and retries failures with backoff, so the polling loop never waits
+on delivery. Different chats are delivered in parallel by a small worker
+pool; each chat keeps its message order.
+
+Delivered load alerts are indexed (load key -> chat_id, message_id) so the
+alert can be marked or deleted once the load leaves the board. Alerts still
+queued at that point are cancelled, and one already in flight is retracted
+as soon as it is delivered.
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dotenv import load_dotenv
+from message_templates import unescape_markdown
+
+load_dotenv()
+
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+TELEGRAM_OUTBOX_DB = os.getenv('TELEGRAM_OUTBOX_DB', 'telegram_outbox.db')
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))  # Bot-wide messages per second
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))  # Messages per second per chat
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', 3))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv('TELEGRAM_MAX_ATTEMPTS', 8))
+TELEGRAM_SENDER_WORKERS = int(os.getenv('TELEGRAM_SENDER_WORKERS', 4))  # Chats delivered in parallel
+TELEGRAM_MAX_LENGTH = 4096
+MAX_BACKOFF = 300
+SENT_RETENTION = 86400  # Keep delivered rows for a day
+STALE_CLAIM_SECONDS = 120  # Rows claimed by a sender that died are retried after this
+ALERT_INDEX_RETENTION = 3 * 86400  # Telegram only allows edits for 48 hours anyway
+ALERT_REMOVAL_ACTION = os.getenv('ALERT_REMOVAL_ACTION', 'edit')  # 'edit', 'delete' or 'none'
+REMOVED_BANNER = "❌ **COVERED / REMOVED** - no longer on the board"
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.time()
+
+    def wait_time(self):
+        """Seconds until one token is available"""
+        now = time.time()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+class TelegramOutbox:
+    """Durable outgoing message queue with a background sender"""
+
+    def __init__(self, db_path=TELEGRAM_OUTBOX_DB, bot_token=TELEGRAM_BOT_TOKEN, default_chat_id=TELEGRAM_CHAT_ID,
+                 api_base=TELEGRAM_API_BASE):
+        self.db_path = db_path
+        self.api_url = f"{api_base}/bot{bot_token}"
+        self.default_chat_id = default_chat_id
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.sender = None
+        self.pool = None
+        self.http = requests.Session()
+
+        self.global_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_RATE)
+        self.chat_buckets = {}
+        self.chat_paused_until = {}
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.init_database()
+
+    def init_database(self):
+        """Create the outbox table"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id TEXT,
+                    method TEXT,
+                    payload TEXT,
+                    status TEXT DEFAULT 'pending',
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL,
+                    created_at REAL,
+                    claimed_at REAL,
+                    result TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, next_attempt_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_chat ON outbox (status, chat_id, id)')
+
+            # Older outboxes predate per-load alerts
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(outbox)')]
+            if 'load_key' not in columns:
+                cursor.execute('ALTER TABLE outbox ADD COLUMN load_key TEXT')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS alert_messages (
+                    load_key TEXT,
+                    chat_id TEXT,
+                    message_id INTEGER,
+                    text TEXT,
+                    sent_at REAL,
+                    PRIMARY KEY (load_key, chat_id, message_id)
+                ) WITHOUT ROWID
+            ''')
+
+            # Loads that left the board while their alert was still in flight
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS retracted_loads (
+                    load_key TEXT PRIMARY KEY,
+                    action TEXT,
+                    retracted_at REAL
+                ) WITHOUT ROWID
+            ''')
+            self.conn.commit()
+
+        self._requeue_stale_claims()
+
+    def _requeue_stale_claims(self):
+        """Messages claimed by a sender that died mid-delivery go back to the queue"""
+        with self.lock:
+            cursor = self.conn.execute('''
+                UPDATE outbox SET status = 'pending'
+                WHERE status = 'sending' AND claimed_at < ?
+            ''', (time.time() - STALE_CLAIM_SECONDS,))
+            self.conn.commit()
+        if cursor.rowcount:
+            print(f"📬 Requeued {cursor.rowcount} Telegram messages from an interrupted sender")
+
+    def enqueue_requests(self, calls, load_key=None):
+        """Persist (method, payload) Bot API calls in one transaction; returns outbox ids (None on failure)
+
+        Messages queued with a load_key are indexed on delivery for retract_alerts()
+        """
+        try:
+            now = time.time()
+            outbox_ids = []
+            with self.lock:
+                if load_key:
+                    # The load is (back) on the board - its new alert must not be retracted
+                    self.conn.execute('DELETE FROM retracted_loads WHERE load_key = ?', (load_key,))
+                for method, payload in calls:
+                    cursor = self.conn.execute('''
+                        INSERT INTO outbox (chat_id, method, payload, next_attempt_at, created_at, load_key)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (str(payload.get('chat_id')), method, json.dumps(payload), now, now, load_key))
+                    outbox_ids.append(cursor.lastrowid)
+                self.conn.commit()
+            self.wakeup.set()
+            return outbox_ids
+        except Exception as e:
+            print(f"❌ Failed to queue Telegram message: {e}")
+            return None
+
+    def enqueue_request(self, method, payload):
+        """Persist a Bot API call for delivery; returns the outbox id (None on failure)"""
+        outbox_ids = self.enqueue_requests([(method, payload)])
+        return outbox_ids[0] if outbox_ids else None
+
+    def _message_payload(self, text, chat_id, reply_markup, parse_mode):
+        payload = {
+            'chat_id': chat_id or self.default_chat_id,
+            'text': text[:TELEGRAM_MAX_LENGTH]  # Telegram max message length
+        }
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+        if reply_markup:
+            payload['reply_markup'] = json.dumps(reply_markup)
+        return payload
+
+    def enqueue(self, text, chat_id=None, reply_markup=None, parse_mode='Markdown'):
+        """Queue a sendMessage call"""
+        return self.enqueue_request('sendMessage', self._message_payload(text, chat_id, reply_markup, parse_mode))
+
+    def enqueue_fanout(self, text, chat_ids, reply_markup=None, parse_mode='Markdown', load_key=None):
+        """Queue the same message for several chats at once; True if all were queued"""
+        calls = [('sendMessage', self._message_payload(text, chat_id, reply_markup, parse_mode)) for chat_id in chat_ids]
+        return self.enqueue_requests(calls, load_key=load_key) is not None
+
+    def alert_messages(self, load_key):
+        """Delivered alerts for a load as [(chat_id, message_id, text)]"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT chat_id, message_id, text FROM alert_messages WHERE load_key = ?', (load_key,)
+            ).fetchall()
+
+    def retract_alerts(self, load_keys, action=ALERT_REMOVAL_ACTION):
+        """Mark (or delete) the alerts of loads that left the board; returns edits queued
+
+        All edits go through the queue in one transaction, so they share the
+        rate limiter with new alerts.
+        """
+        if action == 'none' or not load_keys:
+            return 0
+
+        calls = []
+        cancelled = 0
+        now = time.time()
+        with self.lock:
+            for load_key in load_keys:
+                rows = self.conn.execute(
+                    'SELECT chat_id, message_id, text FROM alert_messages WHERE load_key = ?', (load_key,)
+                ).fetchall()
+                calls.extend(self._retraction_call(action, chat_id, message_id, text)
+                             for chat_id, message_id, text in rows)
+
+                # Alerts not sent yet are dropped; ones being sent right now are retracted on delivery
+                cancelled += self.conn.execute(
+                    "UPDATE outbox SET status = 'cancelled' WHERE load_key = ? AND status = 'pending'", (load_key,)
+                ).rowcount
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO retracted_loads (load_key, action, retracted_at) VALUES (?, ?, ?)',
+                    (load_key, action, now)
+                )
+            self.conn.executemany('DELETE FROM alert_messages WHERE load_key = ?', [(key,) for key in load_keys])
+            self.conn.commit()
+
+        if cancelled:
+            print(f"🧹 Cancelled {cancelled} undelivered alerts for removed loads")
+        if calls and self.enqueue_requests(calls) is not None:
+            print(f"🧹 Queued {len(calls)} alert {'deletions' if action == 'delete' else 'edits'} for {len(load_keys)} removed loads")
+            return len(calls)
+        return 0
+
+    def _retraction_call(self, action, chat_id, message_id, text):
+        """Bot API call that deletes or marks a delivered alert"""
+        if action == 'delete':
+            return ('deleteMessage', {'chat_id': chat_id, 'message_id': message_id})
+        # No reply_markup in the edit, so the BID/SKIP buttons go away too
+        return ('editMessageText', {
+            'chat_id': chat_id,
+            'message_id': message_id,
+            'text': f"{REMOVED_BANNER}\n\n{text}"[:TELEGRAM_MAX_LENGTH],
+            'parse_mode': 'Markdown'
+        })
+
+    def pending_count(self):
+        """Messages not yet delivered"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+
+    def _chat_wait(self, chat_id, now):
+        """Seconds until this chat may receive another message"""
+        paused = self.chat_paused_until.get(chat_id, 0) - now
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return max(paused, bucket.wait_time())
+
+    def _claim(self, row_id):
+        """Atomically claim a row so concurrent senders never double-send"""
+        with self.lock:
+            cursor = self.conn.execute('''
+                UPDATE outbox SET status = 'sending', claimed_at = ?
+                WHERE id = ? AND status = 'pending'
+            ''', (time.time(), row_id))
+            self.conn.commit()
+            return cursor.rowcount == 1
+
+    def _finish(self, row_id, status, attempts, next_attempt_at=None, result=None, payload=None):
+        with self.lock:
+            if payload is not None:
+                self.conn.execute('UPDATE outbox SET payload = ? WHERE id = ?', (json.dumps(payload), row_id))
+            self.conn.execute('''
+                UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, result = ?
+                WHERE id = ?
+            ''', (status, attempts, next_attempt_at, result, row_id))
+            self.conn.commit()
+
+    def _backoff(self, attempts):
+        return min(MAX_BACKOFF, 2 ** attempts) + random.uniform(0, 1)
+
+    def _index_alert(self, load_key, chat_id, payload, response):
+        try:
+            message_id = response.json()['result']['message_id']
+        except (ValueError, KeyError, TypeError):
+            return
+        with self.lock:
+            retracted = self.conn.execute(
+                'SELECT action FROM retracted_loads WHERE load_key = ?', (load_key,)
+            ).fetchone()
+            if retracted is None:
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO alert_messages (load_key, chat_id, message_id, text, sent_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (load_key, chat_id, message_id, payload.get('text', ''), time.time()))
+                self.conn.commit()
+
+        if retracted is not None:
+            # The load left the board while this alert was in flight
+            self.enqueue_requests([self._retraction_call(retracted[0], chat_id, message_id, payload.get('text', ''))])
+
+    def _deliver(self, row_id, chat_id, method, payload, attempts, load_key=None):
+        """Make one delivery attempt and record the outcome"""
+        attempts += 1
+        try:
+            response = self.http.post(f"{self.api_url}/{method}", data=payload, timeout=10)
+        except Exception as e:
+            print(f"⚠️ Telegram delivery error (attempt {attempts}): {e}")
+            response = None
+
+        if response is not None and response.status_code == 200:
+            self._finish(row_id, 'sent', attempts, result=response.text)
+            if load_key and method == 'sendMessage':
+                self._index_alert(load_key, chat_id, payload, response)
+            return
+
+        if response is not None and response.status_code == 429:
+            # Rate limited - pause this chat instead of blocking everything
+            try:
+                retry_after = response.json().get('parameters', {}).get('retry_after', 30)
+            except ValueError:
+                retry_after = 30
+            print(f"⚠️ Telegram rate limit for chat {chat_id}, retrying in {retry_after}s")
+            self.chat_paused_until[chat_id] = time.time() + retry_after
+            self._finish(row_id, 'pending', attempts - 1, time.time() + retry_after)
+            return
+
+        if response is not None and response.status_code == 400 and payload.get('parse_mode') \
+                and "can't parse entities" in response.text:
+            # Broken Markdown - deliver as plain text rather than dropping the alert
+            print("⚠️ Telegram could not parse Markdown, resending as plain text")
+            payload = dict(payload)
+            payload.pop('parse_mode')
+            if 'text' in payload:
+                payload['text'] = unescape_markdown(payload['text'])
+            self._finish(row_id, 'pending', attempts, time.time(), payload=payload)
+            return
+
+        if response is not None and 400 <= response.status_code < 500:
+            print(f"❌ Telegram rejected message: {response.status_code} - {response.text}")
+            self._finish(row_id, 'failed', attempts, result=response.text)
+            return
+
+        if attempts >= TELEGRAM_MAX_ATTEMPTS:
+            print(f"❌ Giving up on Telegram message {row_id} after {attempts} attempts")
+            self._finish(row_id, 'failed', attempts)
+            return
+
+        self._finish(row_id, 'pending', attempts, time.time() + self._backoff(attempts))
+
+    def _send_due(self):
+        """Deliver every due message the rate limits allow; returns seconds to sleep"""
+        now = time.time()
+        # Only the oldest pending message of each chat is eligible: every chat
+        # gets a turn (a big fan-out to one chat can't starve the others) and
+        # each chat keeps its order
+        with self.lock:
+            rows = self.conn.execute('''
+                SELECT id, chat_id, method, payload, attempts, next_attempt_at, load_key FROM outbox
+                WHERE id IN (SELECT MIN(id) FROM outbox WHERE status = 'pending' GROUP BY chat_id)
+                ORDER BY id
+            ''').fetchall()
+
+        sleep_for = 1.0
+        deliveries = []
+        for row_id, chat_id, method, payload, attempts, next_attempt_at, load_key in rows:
+            if self.stop_event.is_set():
+                break
+
+            if next_attempt_at > now:
+                sleep_for = min(sleep_for, next_attempt_at - now)
+                continue
+
+            delay = max(self._chat_wait(chat_id, time.time()), self.global_bucket.wait_time())
+            if delay > 0:
+                sleep_for = min(sleep_for, delay)
+                continue
+
+            if not self._claim(row_id):
+                continue
+
+            self.chat_buckets[chat_id].consume()
+            self.global_bucket.consume()
+            deliveries.append(self.pool.submit(self._deliver, row_id, chat_id, method, json.loads(payload), attempts, load_key))
+
+        if deliveries:
+            wait(deliveries)
+            sleep_for = 0  # More may be due right away
+
+        return max(0.01, sleep_for)
+
+    def _prune(self):
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM outbox WHERE status IN ('sent', 'failed', 'cancelled') AND created_at < ?",
+                (time.time() - SENT_RETENTION,)
+            )
+            self.conn.execute('DELETE FROM alert_messages WHERE sent_at < ?', (time.time() - ALERT_INDEX_RETENTION,))
+            self.conn.execute('DELETE FROM retracted_loads WHERE retracted_at < ?', (time.time() - ALERT_INDEX_RETENTION,))
+            self.conn.commit()
+
+    def _sender_loop(self):
+        last_prune = 0
+        last_requeue = time.time()
+        while not self.stop_event.is_set():
+            try:
+                # Claims left by a process killed before startup went stale are picked up here
+                if time.time() - last_requeue > STALE_CLAIM_SECONDS / 2:
+                    self._requeue_stale_claims()
+                    last_requeue = time.time()
+                sleep_for = self._send_due()
+                if time.time() - last_prune > 3600:
+                    self._prune()
+                    last_prune = time.time()
+            except Exception as e:
+                print(f"❌ Outbox sender error: {e}")
+                sleep_for = 5
+
+            self.wakeup.wait(sleep_for)
+            self.wakeup.clear()
+
+    def start(self):
+        """Start the dedicated sender thread"""
+        if self.sender and self.sender.is_alive():
+            return
+        self.stop_event.clear()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, TELEGRAM_SENDER_WORKERS))
+        self.sender = threading.Thread(target=self._sender_loop, daemon=True)
+        self.sender.start()
+        print(f"📬 Telegram outbox sender started ({self.pending_count()} queued)")
+
+    def stop(self, drain_timeout=30):
+        """Give queued messages a chance to go out, then stop the sender"""
+        deadline = time.time() + drain_timeout
+        while self.sender and self.sender.is_alive() and time.time() < deadline:
+            if self.pending_count() == 0:
+                break
+            time.sleep(0.2)
+
+        self.stop_event.set()
+        self.wakeup.set()
+        if self.sender:
+            self.sender.join(timeout=15)
+        if self.pool:
+            self.pool.shutdown(wait=False)
+
+        remaining = self.pending_count()
+        if remaining:
+            print(f"📬 {remaining} Telegram messages left in outbox for next start")
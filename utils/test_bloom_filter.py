@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test the rotating Bloom filter and how the dedup store keeps it in sync
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bloom_filter
+import dedup_store
+from bloom_filter import RotatingBloomFilter
+from dedup_store import DedupStore
+
+class FakeClock:
+    """Stand-in for the time module so generations can be aged"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+class CountingConnection:
+    """Wraps a sqlite3 connection and counts statements"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = 0
+
+    def execute(self, *args):
+        self.statements += 1
+        return self.conn.execute(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def with_clock(test):
+    def run():
+        real_time = bloom_filter.time
+        bloom_filter.time = FakeClock()
+        try:
+            test(bloom_filter.time)
+        finally:
+            bloom_filter.time = real_time
+    run.__name__ = test.__name__
+    return run
+
+@with_clock
+def test_rotation_keeps_window(clock):
+    print("🧪 Testing Bloom filter rotation...")
+    bloom = RotatingBloomFilter(window=300, capacity=1000, generations=4)  # 100s spans
+    bloom.add('load')
+    assert bloom.might_contain('load')
+    assert not bloom.might_contain('other')
+
+    # A key stays for at least the window...
+    clock.now += 299
+    assert bloom.might_contain('load')
+
+    # ...and is gone once its generation rotates out
+    clock.now += 200
+    bloom.add('newer')
+    assert not bloom.might_contain('load')
+    assert bloom.might_contain('newer')
+
+    # Memory stays flat however long it runs
+    for _ in range(50):
+        clock.now += 100
+        bloom.add('tick')
+    assert len(bloom.filters) <= bloom.generations
+    print("✅ Rotation keeps keys for the window and drops them after")
+
+@with_clock
+def test_idle_longer_than_window_resets(clock):
+    bloom = RotatingBloomFilter(window=300, capacity=1000, generations=4)
+    bloom.add('load')
+    clock.now += 10_000
+    assert not bloom.might_contain('load')
+    assert len(bloom.filters) == 1
+
+@with_clock
+def test_save_load_roundtrip(clock):
+    print("🧪 Testing Bloom filter persistence...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bloom.bin')
+        bloom = RotatingBloomFilter(window=300, capacity=1000)
+        bloom.add('load')
+        assert bloom.save(path, watermark=123.5)
+
+        restored = RotatingBloomFilter(window=300, capacity=1000)
+        assert restored.load(path)
+        assert restored.watermark == 123.5
+        assert restored.might_contain('load')
+
+        # A filter sized differently is rebuilt rather than misread
+        assert not RotatingBloomFilter(window=300, capacity=50000).load(path)
+    print("✅ Saved filter restores with its watermark")
+
+def open_store(directory, bloom_file=None):
+    return DedupStore(os.path.join(directory, 'dedup.db'), legacy_file=None,
+                      bloom_file=os.path.join(directory, bloom_file) if bloom_file else None)
+
+def test_miss_skips_store():
+    print("🧪 Testing that a Bloom miss never touches SQLite...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        store.mark_many([f"key{i}" for i in range(300)])
+        store.conn = CountingConnection(store.conn)
+        for i in range(1000):
+            assert not store.seen(f"missing{i}")
+        assert store.conn.statements == 0
+        assert store.seen('key7')
+        assert store.conn.statements == 1
+        store.conn = store.conn.conn
+        store.close()
+    print("✅ Misses are answered in memory")
+
+def test_sync_picks_up_other_scrapers():
+    print("🧪 Testing Bloom sync across scrapers...")
+    with tempfile.TemporaryDirectory() as directory:
+        first = open_store(directory)
+        second = open_store(directory)
+        first.mark('shared')
+
+        # Between syncs the second scraper answers from its own filter
+        assert not second.seen('shared')
+
+        # Once the sync interval has passed it catches up from the insert-time index
+        second.last_sync -= dedup_store.DEDUP_SYNC_INTERVAL
+        assert second.seen('shared')
+        assert second.synced_through > 0
+        first.close()
+        second.close()
+    print("✅ Marks from another scraper are seen after a sync")
+
+def test_sync_after_crash():
+    print("🧪 Testing Bloom sync after an unclean shutdown...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory, 'bloom.bin')
+        store.mark('before')
+        store.close()
+
+        # Marked, then the process dies without saving the filter
+        crashed = open_store(directory, 'bloom.bin')
+        crashed.mark('after')
+
+        restarted = open_store(directory, 'bloom.bin')
+        assert restarted.seen('before')
+        assert restarted.seen('after')
+        restarted.close()
+    print("✅ Keys marked since the last save are recovered at startup")
+
+if __name__ == "__main__":
+    test_rotation_keeps_window()
+    test_idle_longer_than_window_resets()
+    test_save_load_roundtrip()
+    test_miss_skips_store()
+    test_sync_picks_up_other_scrapers()
+    test_sync_after_crash()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite dedup store: TTL expiry, compaction and sent_items.txt import
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup_store import DedupStore
+from load_keys import canonical_load_key, legacy_key_to_canonical
+
+def open_store(directory, **kwargs):
+    kwargs.setdefault('legacy_file', None)
+    kwargs.setdefault('bloom_file', None)
+    return DedupStore(os.path.join(directory, 'dedup.db'), **kwargs)
+
+def age_key(store, key, seconds):
+    """Pretend key was marked `seconds` ago"""
+    with store.lock:
+        store.conn.execute('UPDATE sent_items SET inserted_at = ? WHERE item_key = ?', (time.time() - seconds, key))
+        store.conn.commit()
+
+def test_ttl_expiry():
+    print("🧪 Testing dedup TTL expiry...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory, ttl=3600)
+        store.mark_many(['old', 'fresh'])
+        age_key(store, 'old', 7200)
+
+        # Past the TTL the key is no longer seen, even before compaction removes it
+        assert not store.seen('old')
+        assert store.seen('fresh')
+        assert store.count() == 2
+
+        assert store.expire() == 1
+        assert store.count() == 1
+        assert store.seen('fresh')
+
+        # Marking again refreshes the insert time
+        store.mark('old')
+        assert store.seen('old')
+        store.close()
+    print("✅ TTL expiry works")
+
+def test_compact_keeps_live_keys():
+    print("🧪 Testing dedup compaction...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory, ttl=3600)
+        store.mark_many([f"key{i}" for i in range(20)])
+        for i in range(10):
+            age_key(store, f"key{i}", 7200)
+        store.compact()
+        assert store.count() == 10
+        assert all(store.seen(f"key{i}") for i in range(10, 20))
+        store.close()
+    print("✅ Compaction keeps live keys")
+
+def test_legacy_import():
+    print("🧪 Testing sent_items.txt import...")
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_file = os.path.join(directory, 'sent_items.txt')
+        with open(legacy_file, 'w') as f:
+            f.write("123456_DALLAS, TX_HOUSTON, TX\n")                   # api_scraper format
+            f.write("ACME LOGISTICS_789012_ATLANTA, GA_MIAMI, FL\n")     # scraper_complete format
+            f.write("garbage\n")
+            f.write("\n")
+
+        store = open_store(directory, legacy_file=legacy_file)
+
+        # Legacy lines map onto the canonical key every scraper now uses
+        key = canonical_load_key({
+            'load_id': '123456', 'pickup_city': 'DALLAS', 'pickup_state': 'TX',
+            'delivery_city': 'HOUSTON', 'delivery_state': 'TX'
+        })
+        assert key == legacy_key_to_canonical("123456_DALLAS, TX_HOUSTON, TX")
+        assert store.seen(key)
+        assert store.seen(legacy_key_to_canonical("ACME LOGISTICS_789012_ATLANTA, GA_MIAMI, FL"))
+        assert store.count() == 2
+
+        # Imported once: the file is set aside, so a restart does not re-import it
+        assert not os.path.exists(legacy_file)
+        assert os.path.exists(f"{legacy_file}.migrated")
+        store.close()
+    print("✅ Legacy import works")
+
+if __name__ == "__main__":
+    test_ttl_expiry()
+    test_compact_keeps_live_keys()
+    test_legacy_import()
@@ -8,6 +8,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+
 def test_environment():
     """Test environment setup"""
     print("🔧 Testing environment...")
@@ -34,7 +36,7 @@ def test_telegram():
     chat_id = os.getenv('TELEGRAM_CHAT_ID')
     
     try:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
         data = {
             'chat_id': chat_id,
             'text': '🧪 **Hybrid Scraper Test**\n\nTesting Telegram connectivity...'
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the compressed load archive: get() and records() after re-archiving,
+segment rotation, a torn final member and the legacy file import
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_archive import LoadArchive, import_legacy_files
+
+def record(load_id, cycle):
+    return {'saved_at': f"cycle{cycle}", 'load_info': {'load_id': load_id, 'cycle': cycle}}
+
+def test_get_returns_latest_copy():
+    print("🧪 Testing get() after re-archiving...")
+    with tempfile.TemporaryDirectory() as directory:
+        archive = LoadArchive(directory=directory)
+        archive.append_many([record('1', 0), record('2', 0)])
+        archive.append_many([record('1', 1)])
+        archive.append_many([record('3', 2), record('1', 2)])
+
+        assert archive.get('1')['load_info']['cycle'] == 2
+        assert archive.get('2')['load_info']['cycle'] == 0
+        assert archive.get(3)['saved_at'] == 'cycle2'  # Numeric ids are looked up as strings
+        assert archive.get('missing') is None
+        archive.close()
+    print("✅ get() returns the newest copy")
+
+def test_records_yield_every_copy():
+    print("🧪 Testing records() across members and segments...")
+    with tempfile.TemporaryDirectory() as directory:
+        # Tiny segments: every batch rotates to a new file
+        archive = LoadArchive(directory=directory, segment_bytes=1)
+        archive.append_many([record('1', 0), record('2', 0)])
+        archive.append_many([record('1', 1), record('2', 1)])  # Whole batch re-archived
+        archive.append_many([record('3', 2)])
+        archive.close()
+        assert len([name for name in os.listdir(directory) if name.startswith('loads_')]) == 3
+
+        copies = [(r['load_info']['load_id'], r['load_info']['cycle']) for r in LoadArchive(directory=directory).records()]
+        assert copies == [('1', 0), ('2', 0), ('1', 1), ('2', 1), ('3', 2)]
+
+        # Several members in one segment read back the same way
+        single = os.path.join(directory, 'single')
+        archive = LoadArchive(directory=single)
+        for cycle in range(3):
+            archive.append_many([record('1', cycle)])
+        assert [r['load_info']['cycle'] for r in archive.records()] == [0, 1, 2]
+        archive.close()
+    print("✅ records() yields each copy once, in write order")
+
+def test_records_stop_at_torn_member():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = LoadArchive(directory=directory)
+        archive.append_many([record('1', 0)])
+        archive.append_many([record('2', 1)])
+        path = os.path.join(directory, archive.segment)
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 10)  # Crash mid-write of the last member
+
+        assert [r['load_info']['load_id'] for r in archive.records()] == ['1']
+        assert archive.get('1') is not None
+        archive.close()
+
+def test_import_legacy_files():
+    print("🧪 Testing the load_details_*.json import...")
+    with tempfile.TemporaryDirectory() as directory:
+        for load_id in ('101', '102'):
+            with open(os.path.join(directory, f"load_details_20240101_120000_{load_id}.json"), 'w') as f:
+                json.dump({'load_id': load_id}, f)
+        with open(os.path.join(directory, 'load_details_20240101_120000_bad.json'), 'w') as f:
+            f.write('{not json')
+
+        archive = LoadArchive(directory=os.path.join(directory, 'archive'))
+        assert import_legacy_files(archive, pattern=os.path.join(directory, 'load_details_*.json')) == 2
+        assert archive.get('101')['saved_at'] == '20240101_120000'
+        assert archive.get('102') is not None
+
+        # Imported files are removed; the unreadable one is left for a look
+        remaining = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+        assert remaining == ['load_details_20240101_120000_bad.json']
+        archive.close()
+    print("✅ Legacy files are archived and removed")
+
+if __name__ == "__main__":
+    test_get_returns_latest_copy()
+    test_records_yield_every_copy()
+    test_records_stop_at_torn_member()
+    test_import_legacy_files()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test the session lifetime estimator: Kaplan-Meier lifetime from synthetic
+validation history, refresh_at margins and the cookie expiry cap
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_lifetime import SessionLifetimeEstimator, cookie_expiry
+
+BASE = datetime(2024, 1, 1, 8, 0).timestamp()
+
+def stamp(hours):
+    return datetime.fromtimestamp(BASE + hours * 3600).isoformat(' ')
+
+def write_stealth_history(path, sessions):
+    """sessions: [(hours, died)] - stealth_sessions/session_logs layout"""
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE stealth_sessions (profile_id TEXT, created_at TIMESTAMP)')
+    conn.execute('CREATE TABLE session_logs (profile_id TEXT, action TEXT, result TEXT, timestamp TIMESTAMP)')
+    for i, (hours, died) in enumerate(sessions):
+        profile_id = f"profile{i}"
+        conn.execute('INSERT INTO stealth_sessions VALUES (?, ?)', (profile_id, stamp(0)))
+        conn.execute("INSERT INTO session_logs VALUES (?, 'validation', 'success', ?)", (profile_id, stamp(hours)))
+        if died:
+            conn.execute("INSERT INTO session_logs VALUES (?, 'validation', 'failed', ?)", (profile_id, stamp(hours + 0.5)))
+        conn.execute("INSERT INTO session_logs VALUES (?, 'navigation', 'failed', ?)", (profile_id, stamp(0.1)))
+    conn.commit()
+    conn.close()
+
+def write_manager_history(path, sessions):
+    """sessions: [(hours, died)] - sessions/session_health layout"""
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE sessions (id TEXT, created_at TIMESTAMP)')
+    conn.execute('CREATE TABLE session_health (session_id TEXT, timestamp TIMESTAMP, success BOOLEAN)')
+    for i, (hours, died) in enumerate(sessions):
+        session_id = f"session{i}"
+        conn.execute('INSERT INTO sessions VALUES (?, ?)', (session_id, stamp(0)))
+        conn.execute('INSERT INTO session_health VALUES (?, ?, 1)', (session_id, stamp(hours)))
+        if died:
+            conn.execute('INSERT INTO session_health VALUES (?, ?, 0)', (session_id, stamp(hours + 0.5)))
+    conn.commit()
+    conn.close()
+
+def test_default_without_history():
+    print("🧪 Testing the lifetime default with no history...")
+    with tempfile.TemporaryDirectory() as directory:
+        estimator = SessionLifetimeEstimator(history_dbs=[os.path.join(directory, 'missing.db')], default_hours=6)
+        assert estimator.observations == []
+        assert not estimator.learned()
+        assert estimator.lifetime_hours() == 6
+
+        # Too few expiries to trust yet
+        path = os.path.join(directory, 'stealth_sessions.db')
+        write_stealth_history(path, [(2, True), (4, True), (9, False)])
+        estimator = SessionLifetimeEstimator(history_dbs=[path], default_hours=6)
+        assert len(estimator.observations) == 3
+        assert not estimator.learned()
+        assert estimator.lifetime_hours() == 6
+    print("✅ Falls back to the default until enough sessions expired")
+
+def test_kaplan_meier_lifetime():
+    print("🧪 Testing the Kaplan-Meier lifetime...")
+    with tempfile.TemporaryDirectory() as directory:
+        # Deaths at 3, 5, 7, 9 hours; six sessions still alive at 10 hours.
+        # Survival: 9/10 after 3h, 0.9 * 8/9 = 0.8 after 5h - the 20% quantile
+        stealth = os.path.join(directory, 'stealth_sessions.db')
+        manager = os.path.join(directory, 'session_data.db')
+        write_stealth_history(stealth, [(3, True), (5, True), (10, False), (10, False), (10, False)])
+        write_manager_history(manager, [(7, True), (9, True), (10, False), (10, False), (10, False)])
+
+        estimator = SessionLifetimeEstimator(history_dbs=[stealth, manager], quantile=0.2)
+        assert len(estimator.observations) == 10
+        assert estimator.learned()
+        assert abs(estimator.lifetime_hours() - 5) < 1e-6
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Same deaths, but the live sessions were only checked up to 1 hour:
+        # they leave the risk set early, so the first death alone is 1 in 4
+        path = os.path.join(directory, 'session_data.db')
+        write_manager_history(path, [(3, True), (5, True), (7, True), (9, True)] + [(1, False)] * 6)
+        estimator = SessionLifetimeEstimator(history_dbs=[path], quantile=0.2)
+        assert abs(estimator.lifetime_hours() - 3) < 1e-6
+    print("✅ Censored sessions are handled")
+
+def test_refresh_at():
+    print("🧪 Testing refresh scheduling...")
+    with tempfile.TemporaryDirectory() as directory:
+        no_history = [os.path.join(directory, 'missing.db')]
+        estimator = SessionLifetimeEstimator(history_dbs=no_history, default_hours=6, margin_minutes=30)
+        assert estimator.refresh_at(BASE) == BASE + 5.5 * 3600
+        assert estimator.refresh_at(stamp(0)) == BASE + 5.5 * 3600  # Stored datetime strings work too
+        assert not estimator.due_for_refresh(BASE, now=BASE + 5 * 3600)
+        assert estimator.due_for_refresh(BASE, now=BASE + 5.5 * 3600)
+        assert estimator.next_check_delay(BASE, now=BASE) == 7200
+        assert estimator.next_check_delay(BASE, now=BASE + 5.5 * 3600 - 60) == 300
+
+        # A margin longer than the lifetime never schedules before a quarter of it
+        short = SessionLifetimeEstimator(history_dbs=no_history, default_hours=0.5, margin_minutes=30)
+        assert short.refresh_at(BASE) == BASE + 450
+    print("✅ Refresh lands a margin before the predicted expiry")
+
+def test_cookie_expiry_caps_prediction():
+    print("🧪 Testing the cookie expiry cap...")
+    with tempfile.TemporaryDirectory() as directory:
+        estimator = SessionLifetimeEstimator(history_dbs=[os.path.join(directory, 'missing.db')],
+                                             default_hours=6, margin_minutes=30)
+        cookies = [
+            {'name': 'ASP.NET_SessionId', 'expires': BASE + 2 * 3600},
+            {'name': 'tracking', 'expires': BASE + 3600},   # Not an auth cookie
+            {'name': 'prefs', 'expires': -1},               # Browser-session cookie
+        ]
+        assert cookie_expiry(cookies) == BASE + 2 * 3600
+        assert estimator.predicted_expiry(BASE, cookies) == BASE + 2 * 3600
+        assert estimator.refresh_at(BASE, cookies) == BASE + 1.5 * 3600
+
+        # Selenium's 'expiry' key; no auth cookie, so the earliest one counts
+        assert cookie_expiry([{'name': 'a', 'expiry': BASE + 600}, {'name': 'b', 'expiry': BASE + 900}]) == BASE + 600
+
+        # A cookie that expires later than predicted, or already expired, does not extend or break it
+        assert estimator.predicted_expiry(BASE, [{'name': 'auth', 'expires': BASE + 24 * 3600}]) == BASE + 6 * 3600
+        assert estimator.predicted_expiry(BASE, [{'name': 'auth', 'expires': BASE - 60}]) == BASE + 6 * 3600
+        assert cookie_expiry(None) is None
+    print("✅ Auth cookie expiry caps the prediction")
+
+if __name__ == "__main__":
+    test_default_without_history()
+    test_kaplan_meier_lifetime()
+    test_refresh_at()
+    test_cookie_expiry_caps_prediction()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test the persisted Telegram outbox against a fake Bot API:
+per-chat ordering, 429 pauses and the plain-text retry
+"""
+
+import os
+import sys
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telegram_outbox
+from telegram_outbox import TelegramOutbox
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self.body
+
+class FakeBotAPI:
+    """Records calls; `script` maps text -> list of status codes to answer with, in turn"""
+
+    def __init__(self, script=None):
+        self.script = script or {}
+        self.calls = []
+
+    def post(self, url, data=None, timeout=None):
+        self.calls.append((url.rsplit('/', 1)[1], dict(data)))
+        codes = self.script.get(data.get('text'), [])
+        status = codes.pop(0) if codes else 200
+        if status == 429:
+            return FakeResponse(429, {'ok': False, 'parameters': {'retry_after': 30}})
+        if status == 400:
+            return FakeResponse(400, {'ok': False, 'description': "Bad Request: can't parse entities"})
+        if status != 200:
+            return FakeResponse(status, {'ok': False})
+        return FakeResponse(200, {'ok': True, 'result': {'message_id': len(self.calls)}})
+
+    def texts(self, chat_id=None):
+        return [data['text'] for method, data in self.calls
+                if method == 'sendMessage' and (chat_id is None or data['chat_id'] == chat_id)]
+
+def open_outbox(directory, api):
+    outbox = TelegramOutbox(db_path=os.path.join(directory, 'outbox.db'), bot_token='test', default_chat_id='1')
+    outbox.http = api
+    outbox.pool = ThreadPoolExecutor(max_workers=4)
+    return outbox
+
+def drain(outbox, rounds=20):
+    """Run sender passes, making retries due right away"""
+    for _ in range(rounds):
+        with outbox.lock:
+            outbox.conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE status = 'pending'")
+            outbox.conn.commit()
+        outbox._send_due()
+        if outbox.pending_count() == 0:
+            return
+
+def without_chat_limits(test):
+    def run():
+        saved = telegram_outbox.TELEGRAM_CHAT_RATE, telegram_outbox.TELEGRAM_CHAT_BURST
+        telegram_outbox.TELEGRAM_CHAT_RATE, telegram_outbox.TELEGRAM_CHAT_BURST = 1000, 1000
+        try:
+            test()
+        finally:
+            telegram_outbox.TELEGRAM_CHAT_RATE, telegram_outbox.TELEGRAM_CHAT_BURST = saved
+    run.__name__ = test.__name__
+    return run
+
+@without_chat_limits
+def test_per_chat_order():
+    print("🧪 Testing per-chat delivery order...")
+    with tempfile.TemporaryDirectory() as directory:
+        # The first message to chat A fails twice; A's later messages must wait for it
+        api = FakeBotAPI({'a1': [500, 500]})
+        outbox = open_outbox(directory, api)
+        for text, chat_id in [('a1', 'A'), ('b1', 'B'), ('a2', 'A'), ('b2', 'B'), ('a3', 'A')]:
+            outbox.enqueue(text, chat_id=chat_id)
+
+        drain(outbox)
+        assert api.texts('A') == ['a1', 'a1', 'a1', 'a2', 'a3']
+        assert api.texts('B') == ['b1', 'b2']
+        assert outbox.pending_count() == 0
+        outbox.pool.shutdown()
+    print("✅ Each chat keeps its order; other chats are not held up")
+
+@without_chat_limits
+def test_rate_limit_pauses_chat():
+    print("🧪 Testing 429 handling...")
+    with tempfile.TemporaryDirectory() as directory:
+        api = FakeBotAPI({'a1': [429]})
+        outbox = open_outbox(directory, api)
+        outbox.enqueue('a1', chat_id='A')
+        outbox.enqueue('b1', chat_id='B')
+
+        outbox._send_due()
+        assert outbox.chat_paused_until['A'] > telegram_outbox.time.time() + 20
+
+        # The rate-limited attempt is not counted, and chat A waits out retry_after
+        attempts, status = outbox.conn.execute("SELECT attempts, status FROM outbox WHERE chat_id = 'A'").fetchone()
+        assert (attempts, status) == (0, 'pending')
+        outbox._send_due()
+        assert api.texts('A') == ['a1']
+        assert api.texts('B') == ['b1']
+
+        # Once the pause is over it goes out
+        outbox.chat_paused_until['A'] = 0
+        drain(outbox)
+        assert api.texts('A') == ['a1', 'a1']
+        outbox.pool.shutdown()
+    print("✅ A 429 pauses only the affected chat")
+
+@without_chat_limits
+def test_plain_text_retry():
+    print("🧪 Testing the plain-text retry for broken Markdown...")
+    with tempfile.TemporaryDirectory() as directory:
+        text = "🏢 **Company:** A\\_B \\*Freight\\*"
+        api = FakeBotAPI({text: [400]})
+        outbox = open_outbox(directory, api)
+        outbox.enqueue(text, chat_id='A')
+
+        drain(outbox)
+        first, retry = [data for _, data in api.calls]
+        assert first['parse_mode'] == 'Markdown'
+        assert 'parse_mode' not in retry
+        assert retry['text'] == "🏢 **Company:** A_B *Freight*"  # Escapes are dropped
+        assert outbox.pending_count() == 0
+        outbox.pool.shutdown()
+    print("✅ Unparseable Markdown is resent as plain text")
+
+if __name__ == "__main__":
+    test_per_chat_order()
+    test_rate_limit_pauses_chat()
+    test_plain_text_retry()
@@ -10,6 +10,10 @@ import subprocess
 import requests
 from dotenv import load_dotenv
 
+load_dotenv()
+
+TELEGRAM_API_BASE = os.getenv('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+
 def check_python_packages():
     """Check if all required Python packages are installed"""
     print("🐍 Checking Python packages...")
@@ -175,7 +179,7 @@ def test_telegram_connection():
         return True
     
     try:
-        url = f"https://api.telegram.org/bot{bot_token}/getMe"
+        url = f"{TELEGRAM_API_BASE}/bot{bot_token}/getMe"
         response = requests.get(url, timeout=10)
         
         if response.status_code == 200:
@@ -185,7 +189,7 @@ def test_telegram_connection():
                 print(f"  ✅ Bot connected: @{bot_name}")
                 
                 # Test sending a message
-                test_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+                test_url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
                 test_data = {
                     'chat_id': chat_id,
                     'text': '🧪 Setup validation test - Sylectus Monitor'